@@ -6,20 +6,54 @@ import logging
 
 from homeassistant.config_entries import ConfigEntry, ConfigEntryState
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
+from .const import CONF_SOURCE_ENTITY, CONF_SOURCES, DOMAIN, source_slug_from_entity_id
+from .sensor import async_reconfigure_entry
+from .services import async_setup_services
+from .storage import async_get_snapshot_store, async_get_totals_store
 
 # Use explicit name so configuration.yaml logger config and log viewer filter match
 _MAIN_LOGGER = logging.getLogger("custom_components.energy_window_tracker")
 
 PLATFORMS = ["sensor"]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+def _entry_source_keys(entry: ConfigEntry) -> list[tuple[str, str]]:
+    """(entry_id, source_slug) for the source of an entry (one entry = one source)."""
+    sources = {**entry.data, **(entry.options or {})}.get(CONF_SOURCES)
+    if not isinstance(sources, list) or not sources or not isinstance(sources[0], dict):
+        return []
+    source_entity = sources[0].get(CONF_SOURCE_ENTITY)
+    if isinstance(source_entity, list):
+        source_entity = source_entity[0] if source_entity else None
+    if not source_entity:
+        return []
+    return [(entry.entry_id, source_slug_from_entity_id(str(source_entity), "source_0"))]
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Register the integration's services."""
+    async_setup_services(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Energy Window Tracker from a config entry."""
     logging.warning("[energy_window_tracker] Integration loaded entry_id=%s", entry.entry_id)
     _MAIN_LOGGER.warning("init: Integration loaded - entry_id=%s", entry.entry_id)
     hass.data.setdefault(DOMAIN, {})
+    # Read snapshots for every entry in one concurrent batch (shared by all entries setting
+    # up at boot) before forwarding, so sensor setup takes its data from memory.
+    await async_get_snapshot_store(hass).async_preload(
+        key
+        for other in hass.config_entries.async_entries(DOMAIN)
+        if not other.disabled_by
+        for key in _entry_source_keys(other)
+    )
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     entry.async_on_unload(entry.add_update_listener(async_update_options))
     return True
@@ -47,5 +81,15 @@ async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
             entry.state,
         )
         return
+    # Window and settings edits are applied to the running sensors; anything else reloads.
+    if await async_reconfigure_entry(hass, entry):
+        return
     _MAIN_LOGGER.warning("init: async_update_options - entry_id=%s, reloading", entry.entry_id)
     await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop a deleted entry's snapshots and totals from the shared stores."""
+    _MAIN_LOGGER.warning("init: async_remove_entry - entry_id=%s", entry.entry_id)
+    await async_get_snapshot_store(hass).async_remove_entry(entry.entry_id)
+    await async_get_totals_store(hass).async_remove_entry(entry.entry_id)
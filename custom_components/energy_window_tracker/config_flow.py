@@ -29,29 +29,41 @@ from homeassistant import config_entries, data_entry_flow
 from homeassistant.core import callback
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers import selector
-from homeassistant.helpers.storage import Store
 from homeassistant.helpers.translation import async_get_translations
 
 from .const import (
+    CONF_CHECKPOINT_INTERVAL,
     CONF_COST_PER_KWH,
+    CONF_COST_SENSORS,
+    CONF_COUNT_THROUGH_RESETS,
+    CONF_EXPORT_STATISTICS,
+    CONF_MIN_DELTA,
+    CONF_MIN_INTERVAL,
     CONF_NAME,
+    CONF_SAVE_DELAY,
     CONF_SOURCE_ENTITY,
     CONF_SOURCES,
     CONF_WINDOW_END,
     CONF_WINDOW_NAME,
     CONF_WINDOW_START,
     CONF_WINDOWS,
+    DEFAULT_CHECKPOINT_INTERVAL,
+    DEFAULT_COST_SENSORS,
+    DEFAULT_COUNT_THROUGH_RESETS,
     DEFAULT_ENTRY_TITLE_KEY,
+    DEFAULT_EXPORT_STATISTICS,
+    DEFAULT_MIN_DELTA,
+    DEFAULT_MIN_INTERVAL,
     DEFAULT_NAME_KEY,
+    DEFAULT_SAVE_DELAY,
     DEFAULT_SOURCE_ENTITY,
     DEFAULT_WINDOW_END,
     DEFAULT_WINDOW_FALLBACK_KEY,
     DEFAULT_WINDOW_START,
     DOMAIN,
-    STORAGE_KEY,
-    STORAGE_VERSION,
     source_slug_from_entity_id,
 )
+from .storage import async_get_snapshot_store, async_get_totals_store
 
 _MAIN_LOGGER = logging.getLogger("custom_components.energy_window_tracker")
 
@@ -1075,6 +1087,14 @@ def _build_init_menu_options() -> dict[str, str]:
     }
 
 
+def _build_options_menu_options() -> dict[str, str]:
+    """Options flow main menu: window management plus entry-level settings."""
+    return {
+        **_build_init_menu_options(),
+        "settings": "⚙️ Settings",
+    }
+
+
 def _build_configure_menu_options_with_done() -> dict[str, str]:
     """Same as init menu plus Done (for config flow after first window)."""
     return {
@@ -1194,6 +1214,77 @@ def _build_source_entity_schema(
     return vol.Schema(schema_dict)
 
 
+def _build_settings_schema(current: dict[str, Any]) -> vol.Schema:
+    """Build schema for entry-level settings (apply to every window of the entry)."""
+    return vol.Schema(
+        {
+            vol.Optional(
+                CONF_SAVE_DELAY,
+                default=current.get(CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY),
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=0, max=600, step=1, mode="box", unit_of_measurement="s"
+                )
+            ),
+            vol.Optional(
+                CONF_COST_SENSORS,
+                default=current.get(CONF_COST_SENSORS, DEFAULT_COST_SENSORS),
+            ): selector.BooleanSelector(),
+            vol.Optional(
+                CONF_MIN_DELTA,
+                default=current.get(CONF_MIN_DELTA, DEFAULT_MIN_DELTA),
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=0, max=10, step=0.001, mode="box", unit_of_measurement="kWh"
+                )
+            ),
+            vol.Optional(
+                CONF_MIN_INTERVAL,
+                default=current.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=0, max=3600, step=1, mode="box", unit_of_measurement="s"
+                )
+            ),
+            vol.Optional(
+                CONF_CHECKPOINT_INTERVAL,
+                default=current.get(CONF_CHECKPOINT_INTERVAL, DEFAULT_CHECKPOINT_INTERVAL),
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=0, max=1440, step=1, mode="box", unit_of_measurement="min"
+                )
+            ),
+            vol.Optional(
+                CONF_COUNT_THROUGH_RESETS,
+                default=current.get(CONF_COUNT_THROUGH_RESETS, DEFAULT_COUNT_THROUGH_RESETS),
+            ): selector.BooleanSelector(),
+            vol.Optional(
+                CONF_EXPORT_STATISTICS,
+                default=current.get(CONF_EXPORT_STATISTICS, DEFAULT_EXPORT_STATISTICS),
+            ): selector.BooleanSelector(),
+        }
+    )
+
+
+def _settings_from_input(user_input: dict[str, Any]) -> dict[str, Any]:
+    """Coerce submitted settings to stored types."""
+    return {
+        CONF_SAVE_DELAY: int(user_input.get(CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY)),
+        CONF_COST_SENSORS: bool(user_input.get(CONF_COST_SENSORS, DEFAULT_COST_SENSORS)),
+        CONF_MIN_DELTA: float(user_input.get(CONF_MIN_DELTA, DEFAULT_MIN_DELTA)),
+        CONF_MIN_INTERVAL: int(user_input.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL)),
+        CONF_CHECKPOINT_INTERVAL: int(
+            user_input.get(CONF_CHECKPOINT_INTERVAL, DEFAULT_CHECKPOINT_INTERVAL)
+        ),
+        CONF_COUNT_THROUGH_RESETS: bool(
+            user_input.get(CONF_COUNT_THROUGH_RESETS, DEFAULT_COUNT_THROUGH_RESETS)
+        ),
+        CONF_EXPORT_STATISTICS: bool(
+            user_input.get(CONF_EXPORT_STATISTICS, DEFAULT_EXPORT_STATISTICS)
+        ),
+    }
+
+
 def _get_start_end_from_input(user_input: dict[str, Any]) -> tuple[str, str]:
     """Get start and end time strings from form input (keys 'start'/'end')."""
     start = _time_to_str(user_input.get("start") or "00:00")
@@ -1342,7 +1433,7 @@ class EnergyWindowOptionsFlow(config_entries.OptionsFlow):
         """Show Configure Energy Window Tracker menu."""
         _MAIN_LOGGER.warning("options flow step init: showing main menu")
         self._get_current_source()
-        menu_options = _build_init_menu_options()
+        menu_options = _build_options_menu_options()
         return self._async_show_menu(
             step_id="init",
             menu_options=menu_options,
@@ -1525,12 +1616,10 @@ class EnergyWindowOptionsFlow(config_entries.OptionsFlow):
                         retain_ids.append(entity_entry.unique_id)
                 self._retain_ids_after_save = retain_ids
 
-            store = Store(
-                self.hass,
-                STORAGE_VERSION,
-                f"{STORAGE_KEY}_{self._config_entry.entry_id}_{source_slug_from_entity_id(source_entity)}",
-            )
-            await store.async_save({})
+            for store in (async_get_snapshot_store(self.hass), async_get_totals_store(self.hass)):
+                await store.async_remove_source(
+                    self._config_entry.entry_id, source_slug_from_entity_id(source_entity)
+                )
 
             options_to_persist = await self._save_source(new_entity, windows, source_name=source_name)
             if getattr(self, "_retain_ids_after_save", None) is not None:
@@ -1546,6 +1635,23 @@ class EnergyWindowOptionsFlow(config_entries.OptionsFlow):
             ),
         )
 
+    async def async_step_settings(
+        self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.FlowResult:
+        """Entry-level settings (form)."""
+        _MAIN_LOGGER.warning(
+            "options flow step settings: user_input=%s",
+            "submitted" if user_input is not None else "show form",
+        )
+        if user_input is not None:
+            options = {**(self._config_entry.options or {}), **_settings_from_input(user_input)}
+            return self._async_create_options_entry(options)
+        current = {**self._config_entry.data, **(self._config_entry.options or {})}
+        return self.async_show_form(
+            step_id="settings",
+            data_schema=_build_settings_schema(current),
+        )
+
     async def async_step_add_window(
         self, user_input: dict[str, Any] | None = None
     ) -> config_entries.FlowResult:
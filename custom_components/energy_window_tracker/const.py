@@ -19,6 +19,22 @@ CONF_WINDOW_END = "end"
 # Stored config key for window name (snake_case). Form field is "window_name"; flow saves under this key.
 CONF_WINDOW_NAME = "name"
 CONF_COST_PER_KWH = "cost_per_kwh"
+# Entry-level settings (options flow "Settings" step); apply to every window of the entry
+CONF_SAVE_DELAY = "save_delay"
+# Expose cost as separate monetary sensors instead of a fast-changing energy sensor attribute
+CONF_COST_SENSORS = "cost_sensors"
+# Hysteresis for window sensor state writes: minimum change (kWh) and minimum seconds between
+# writes while a value is counting up; window boundaries and midnight always write.
+CONF_MIN_DELTA = "min_delta"
+CONF_MIN_INTERVAL = "min_interval"
+# Minutes between checkpoints of the last seen source value (0 = off). After a crash the
+# checkpoint stands in for a missed start snapshot and reveals a meter reset while down.
+CONF_CHECKPOINT_INTERVAL = "checkpoint_interval"
+# Keep counting when the source drops to a fraction of its last reading mid-window (meter
+# reset or reboot) instead of clamping the window at 0.
+CONF_COUNT_THROUGH_RESETS = "count_through_resets"
+# Write hourly window sums as external long-term statistics when a window ends
+CONF_EXPORT_STATISTICS = "export_statistics"
 
 # Translation keys for config.defaults (entry_title, window_name, window_fallback)
 DEFAULT_ENTRY_TITLE_KEY = "config.defaults.entry_title"
@@ -27,9 +43,41 @@ DEFAULT_WINDOW_FALLBACK_KEY = "config.defaults.window_fallback"
 DEFAULT_SOURCE_ENTITY = "sensor.today_load"
 DEFAULT_WINDOW_START = "11:00"
 DEFAULT_WINDOW_END = "14:00"
+# Seconds to coalesce snapshot writes into one Store write (pending writes flush on shutdown)
+DEFAULT_SAVE_DELAY = 10
+DEFAULT_COST_SENSORS = False
+DEFAULT_MIN_DELTA = 0.0
+DEFAULT_MIN_INTERVAL = 0
+DEFAULT_CHECKPOINT_INTERVAL = 0
+DEFAULT_COUNT_THROUGH_RESETS = False
+DEFAULT_EXPORT_STATISTICS = False
+
+# hass.data key for the domain-wide window boundary scheduler (shared by all entries)
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+# hass.data key for the domain-wide snapshot store (storage.SnapshotStore)
+DATA_STORE = f"{DOMAIN}_store"
+# hass.data key for the domain-wide store of daily / period window totals
+DATA_TOTALS_STORE = f"{DOMAIN}_totals_store"
+# hass.data key for the shared, resolved HA config time zone
+DATA_TIME_ZONE = f"{DOMAIN}_time_zone"
+# hass.data key for the domain-wide orphaned entity cleanup (runs once HA has started)
+DATA_ORPHANS = f"{DOMAIN}_orphans"
+# hass.data key for the domain-wide recorder lookups of past source values
+DATA_HISTORY = f"{DOMAIN}_history"
+# hass.data key for the domain-wide export of window sums as long-term statistics
+DATA_STATISTICS = f"{DOMAIN}_statistics"
+
+# Days of daily window totals kept per window (totals.DailyTotals ring size)
+HISTORY_DAYS = 400
 
 STORAGE_VERSION = 1
 STORAGE_KEY = "energy_window_tracker_snapshots"
+# Daily and period totals, kept apart so snapshot writes do not rewrite the 400-day rings
+STORAGE_TOTALS_KEY = "energy_window_tracker_totals"
+# Number of .storage files the snapshots of all entries are spread over (by entry_id hash).
+# Changing it moves entries to other shards; a source found in another loaded shard is
+# moved to its new shard on load (files beyond a lowered count are no longer read).
+STORAGE_SHARDS = 1
 
 
 def source_slug_from_entity_id(entity_id: str, fallback: str = "source_0") -> str:
@@ -43,3 +91,16 @@ def source_slug_from_entity_id(entity_id: str, fallback: str = "source_0") -> st
 ATTR_SOURCE_ENTITY = "source_entity"
 ATTR_STATUS = "status"
 ATTR_COST = "cost"
+# Daily history of a window (totals.DailyTotals), days before today
+ATTR_YESTERDAY = "yesterday"
+ATTR_LAST_7_DAYS = "last_7_days"
+ATTR_LAST_30_DAYS = "last_30_days"
+# Calendar rollups of a window (totals.PeriodTotals), including today's finished ranges
+ATTR_WEEK_TO_DATE = "week_to_date"
+ATTR_MONTH_TO_DATE = "month_to_date"
+
+# recalculate service: recompute past days' window totals from recorder history
+SERVICE_RECALCULATE = "recalculate"
+ATTR_START_DATE = "start_date"
+ATTR_END_DATE = "end_date"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
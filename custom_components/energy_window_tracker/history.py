@@ -0,0 +1,538 @@
+"""Recorder lookups and statistics export for Energy Window Tracker.
+
+When a window's start snapshot was missed (Home Assistant was not running at the
+start time), the source value at that instant is looked up in the recorder instead
+of counting the window from 0. Lookups from every entry and source are gathered and
+answered by one recorder query in the recorder's executor, once Home Assistant has
+started; results are cached per (entity_id, timestamp).
+
+With statistics export on, each finished window is split into hourly sums that are
+written as external long-term statistics (``energy_window_tracker:<source>_<window>_<hash>``),
+batched across windows and entries.
+
+The recalculate service recomputes past days from the recorder one day at a time:
+each (entity_id, day) is read with one query in the recorder's executor and cached,
+so every window of every entry on that source shares it.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Sequence
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.const import UnitOfEnergy
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.start import async_at_started
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_HISTORY, DATA_STATISTICS, DOMAIN
+
+_MAIN_LOGGER = logging.getLogger("custom_components.energy_window_tracker")
+
+# Readings further apart than this around an instant are not interpolated
+INTERPOLATION_MAX_GAP = timedelta(minutes=15).total_seconds()
+# Looked-up values kept in memory (two boundaries per window and day is plenty)
+_CACHE_SIZE = 256
+# Days of source readings kept in memory for recalculation
+_DAY_CACHE_SIZE = 64
+_HOUR = 3600
+
+
+def interpolate_reading(
+    readings: Iterable[tuple[float, float]], at: float, max_gap: float = INTERPOLATION_MAX_GAP
+) -> float | None:
+    """Value at timestamp `at` from (timestamp, value) readings sorted by time.
+
+    Linear between the last reading at or before `at` and the first one after it.
+    Returns None without a reading on both sides (unless one is exactly at `at`), when
+    they are more than max_gap seconds apart, or when the meter reset in between.
+    """
+    before: tuple[float, float] | None = None
+    after: tuple[float, float] | None = None
+    for reading in readings:
+        if reading[0] <= at:
+            before = reading
+        else:
+            after = reading
+            break
+    if before is None:
+        return None
+    t0, v0 = before
+    if t0 == at:
+        return v0
+    if after is None:
+        return None
+    t1, v1 = after
+    if t1 - t0 > max_gap or v1 < v0:
+        return None
+    return v0 + (v1 - v0) * (at - t0) / (t1 - t0)
+
+
+def _query_values(
+    hass: HomeAssistant, keys: Sequence[tuple[str, float]]
+) -> dict[tuple[str, float], float | None]:
+    """Look up every (entity_id, timestamp) with one recorder history query (executor).
+
+    Values are interpolated between the recorded states around each instant, or else
+    taken from the state in effect at that instant.
+    """
+    from homeassistant.components.recorder import history
+
+    entity_ids = sorted({entity_id for entity_id, _ in keys})
+    times = [at for _, at in keys]
+    states = history.get_significant_states(
+        hass,
+        dt_util.utc_from_timestamp(min(times) - INTERPOLATION_MAX_GAP),
+        dt_util.utc_from_timestamp(max(times) + INTERPOLATION_MAX_GAP),
+        entity_ids,
+        include_start_time_state=True,
+        significant_changes_only=False,
+        no_attributes=True,
+    )
+    readings = {entity_id: _numeric_readings(states.get(entity_id, [])) for entity_id in entity_ids}
+    return {(entity_id, at): value_at(readings[entity_id], at) for entity_id, at in keys}
+
+
+def _numeric_readings(states: Iterable[Any]) -> list[tuple[float, float]]:
+    """(last_updated timestamp, value) of the numeric states among recorded states."""
+    series: list[tuple[float, float]] = []
+    for state in states:
+        try:
+            value = float(state.state)
+        except (TypeError, ValueError):
+            continue
+        series.append((state.last_updated.timestamp(), value))
+    return series
+
+
+def value_at(readings: Sequence[tuple[float, float]], at: float) -> float | None:
+    """Value at `at`: interpolated, or else the state in effect then (the last one before it)."""
+    value = interpolate_reading(readings, at)
+    if value is None:
+        value = next((v for ts, v in reversed(readings) if ts <= at), None)
+    return value
+
+
+def window_total(
+    readings: Sequence[tuple[float, float]],
+    start: float,
+    end: float,
+    reset_ratio: float | None = None,
+) -> float | None:
+    """Energy between timestamps `start` and `end` from recorded (timestamp, value) readings.
+
+    The rise from the value at start to the value at end, at least 0. With reset_ratio,
+    a reading below that fraction of the previous one is a meter reset: the energy
+    counted before it is kept and counting continues from 0, as the live sensors do.
+    None without a value at start or end.
+    """
+    first = value_at(readings, start)
+    last = value_at(readings, end)
+    if first is None or last is None:
+        return None
+    total = 0.0
+    base = previous = first
+    if reset_ratio is not None:
+        for ts, value in readings:
+            if not start < ts < end:
+                continue
+            if value < previous * reset_ratio:
+                total += max(0.0, previous - base)
+                base = 0.0
+            previous = value
+        if last < previous * reset_ratio:
+            total += max(0.0, previous - base)
+            base = 0.0
+    return total + max(0.0, last - base)
+
+
+def _query_day(
+    hass: HomeAssistant, entity_id: str, start: float, end: float
+) -> list[tuple[float, float]]:
+    """Readings of entity_id for one day, with some margin to interpolate its edges (executor)."""
+    from homeassistant.components.recorder import history
+
+    states = history.get_significant_states(
+        hass,
+        dt_util.utc_from_timestamp(start - INTERPOLATION_MAX_GAP),
+        dt_util.utc_from_timestamp(end + INTERPOLATION_MAX_GAP),
+        [entity_id],
+        include_start_time_state=True,
+        significant_changes_only=False,
+        no_attributes=True,
+    )
+    return _numeric_readings(states.get(entity_id, []))
+
+
+class SourceHistory:
+    """Domain-wide, batched and cached lookups of source values at past instants.
+
+    Requests are queued and answered together: once Home Assistant has started (so
+    boot does not also wait on the database), then on the next loop iteration. A
+    request gets no answer when the recorder is not loaded or has no usable states.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._cache: OrderedDict[tuple[str, float], float] = OrderedDict()
+        self._pending: dict[tuple[str, float], list[Callable[[float], None]]] = {}
+        self._flush_scheduled = False
+        # (entity_id, local midnight timestamp) -> readings of that day
+        self._days: OrderedDict[tuple[str, float], list[tuple[float, float]]] = OrderedDict()
+
+    async def async_day_readings(
+        self, entity_id: str, day_start: datetime, day_end: datetime
+    ) -> list[tuple[float, float]] | None:
+        """Recorded readings of entity_id from day_start to day_end, or None without a recorder."""
+        from homeassistant.components.recorder import get_instance
+
+        key = (entity_id, day_start.timestamp())
+        if (readings := self._days.get(key)) is not None:
+            self._days.move_to_end(key)
+            return readings
+        if "recorder" not in self.hass.config.components:
+            return None
+        readings = await get_instance(self.hass).async_add_executor_job(
+            _query_day, self.hass, entity_id, day_start.timestamp(), day_end.timestamp()
+        )
+        self._days[key] = readings
+        while len(self._days) > _DAY_CACHE_SIZE:
+            self._days.popitem(last=False)
+        return readings
+
+    @callback
+    def async_request(
+        self, entity_id: str, when: datetime, on_value: Callable[[float], None]
+    ) -> None:
+        """Call on_value with the value of entity_id at `when`, if the recorder knows it."""
+        key = (entity_id, when.timestamp())
+        if (value := self._cache.get(key)) is not None:
+            self._cache.move_to_end(key)
+            on_value(value)
+            return
+        if "recorder" not in self.hass.config.components:
+            return
+        self._pending.setdefault(key, []).append(on_value)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            async_at_started(self.hass, self._async_schedule_flush)
+
+    @callback
+    def _async_schedule_flush(self, hass: HomeAssistant) -> None:
+        hass.async_create_task(self._async_flush())
+
+    async def _async_flush(self) -> None:
+        """Answer every queued request with one recorder query."""
+        from homeassistant.components.recorder import get_instance
+
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        keys = list(pending)
+        try:
+            results: dict[tuple[str, float], Any] = await get_instance(
+                self.hass
+            ).async_add_executor_job(_query_values, self.hass, keys)
+        except Exception as err:  # noqa: BLE001
+            _MAIN_LOGGER.warning("history: recorder lookup failed: %s", err)
+            return
+        found = 0
+        for key, callbacks in pending.items():
+            if (value := results.get(key)) is None:
+                continue
+            found += 1
+            self._cache[key] = value
+            while len(self._cache) > _CACHE_SIZE:
+                self._cache.popitem(last=False)
+            for on_value in callbacks:
+                on_value(value)
+        _MAIN_LOGGER.debug(
+            "history: recorder lookup - %s request(s), %s value(s) found", len(pending), found
+        )
+
+
+@callback
+def async_get_source_history(hass: HomeAssistant) -> SourceHistory:
+    """Return the domain-wide source history lookups, creating them on first use."""
+    if (source_history := hass.data.get(DATA_HISTORY)) is None:
+        source_history = hass.data[DATA_HISTORY] = SourceHistory(hass)
+    return source_history
+
+
+def hourly_split(points: Sequence[tuple[float, float]]) -> dict[float, float]:
+    """Split the rise between (timestamp, value) points into sums per UTC hour start.
+
+    The rise between two points is spread over the hours they span in proportion to
+    time, so points at every hour boundary give exact hourly sums and fewer points
+    still give a sensible split. Drops (meter resets) count as 0.
+    """
+    hourly: dict[float, float] = {}
+    for (t0, v0), (t1, v1) in zip(points, points[1:]):
+        rise = max(0.0, v1 - v0)
+        if t1 <= t0:
+            if rise:
+                hour = t0 - t0 % _HOUR
+                hourly[hour] = hourly.get(hour, 0.0) + rise
+            continue
+        t = t0
+        while t < t1:
+            hour = t - t % _HOUR
+            part_end = min(t1, hour + _HOUR)
+            hourly[hour] = hourly.get(hour, 0.0) + rise * (part_end - t) / (t1 - t0)
+            t = part_end
+    return hourly
+
+
+def window_hourly(
+    points: Sequence[tuple[float, float]], total: float
+) -> dict[float, float]:
+    """Hourly sums of a window from its (timestamp, value) points, scaled to add up to total.
+
+    The scaling keeps energy carried over a meter reset; without any rise between the
+    points the total goes to the last hour.
+    """
+    hourly = hourly_split(points)
+    split = sum(hourly.values())
+    if split > 0:
+        return {hour: value * total / split for hour, value in hourly.items()}
+    if total > 0:
+        end = points[-1][0] - 1
+        return {end - end % _HOUR: total}
+    return {}
+
+
+def _last_statistics(
+    hass: HomeAssistant, statistic_ids: Sequence[str]
+) -> dict[str, tuple[float, float, float]]:
+    """(start, state, sum) of the newest row of each statistic (executor)."""
+    from homeassistant.components.recorder.statistics import get_last_statistics
+
+    last: dict[str, tuple[float, float, float]] = {}
+    for statistic_id in statistic_ids:
+        rows = get_last_statistics(hass, 1, statistic_id, True, {"state", "sum"}).get(statistic_id)
+        if rows:
+            row = rows[0]
+            last[statistic_id] = (row["start"], row.get("state") or 0.0, row.get("sum") or 0.0)
+    return last
+
+
+def _all_statistics(
+    hass: HomeAssistant, statistic_ids: Sequence[str]
+) -> dict[str, list[tuple[float, float, float]]]:
+    """(start, state, sum) of every hourly row of each statistic, oldest first (executor)."""
+    from homeassistant.components.recorder.statistics import statistics_during_period
+
+    stats = statistics_during_period(
+        hass,
+        dt_util.utc_from_timestamp(0),
+        None,
+        set(statistic_ids),
+        "hour",
+        None,
+        {"state", "sum"},
+    )
+    return {
+        statistic_id: [
+            (row["start"], row.get("state") or 0.0, row.get("sum") or 0.0)
+            for row in stats.get(statistic_id, [])
+        ]
+        for statistic_id in statistic_ids
+    }
+
+
+class StatisticsExporter:
+    """Domain-wide, batched export of hourly window sums as external statistics.
+
+    Finished windows queue their hourly sums; one flush (once Home Assistant has
+    started, then on the next loop iteration) appends the new hours to the running sum
+    of each statistic's newest row. That row is kept in memory after every write, since
+    the recorder may not have committed it yet; only statistics not written since
+    startup are read, in one executor job. An
+    hour equal to the newest row (two ranges of one window in the same hour) adds to
+    it; older hours are skipped.
+
+    Recalculated days replace the rows of their hours instead, and the running sum of
+    every later row is rewritten, once the recorder has committed the queued writes.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        # statistic_id -> (name, {hour start: kWh})
+        self._pending: dict[str, tuple[str, dict[float, float]]] = {}
+        # statistic_id -> (name, {(start, end) replaced: {hour start: kWh}})
+        self._replacing: dict[str, tuple[str, dict[tuple[float, float], dict[float, float]]]] = {}
+        # statistic_id -> (start, state, sum) of the newest row written or read
+        self._last: dict[str, tuple[float, float, float]] = {}
+        self._flush_scheduled = False
+
+    @callback
+    def async_add(self, statistic_id: str, name: str, hourly: dict[float, float]) -> None:
+        """Queue hourly sums (kWh per UTC hour start) for a statistic."""
+        if "recorder" not in self.hass.config.components or not hourly:
+            return
+        _, queued = self._pending.setdefault(statistic_id, (name, {}))
+        for hour, value in hourly.items():
+            queued[hour] = queued.get(hour, 0.0) + value
+        self._schedule_flush()
+
+    @callback
+    def async_replace(
+        self, statistic_id: str, name: str, start: float, end: float, hourly: dict[float, float]
+    ) -> None:
+        """Queue hourly sums replacing every row of a statistic from start to end (timestamps).
+
+        Replacing a range already queued drops the earlier values.
+        """
+        if "recorder" not in self.hass.config.components:
+            return
+        _, ranges = self._replacing.setdefault(statistic_id, (name, {}))
+        ranges[(start, end)] = dict(hourly)
+        self._schedule_flush()
+
+    @callback
+    def _schedule_flush(self) -> None:
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            async_at_started(self.hass, self._async_schedule_flush)
+
+    @callback
+    def _async_schedule_flush(self, hass: HomeAssistant) -> None:
+        hass.async_create_task(self._async_flush())
+
+    async def _async_flush(self) -> None:
+        """Write every queued statistic, continuing from its newest stored row."""
+        from homeassistant.components.recorder import get_instance
+        from homeassistant.components.recorder.models import StatisticData
+
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        replacing, self._replacing = self._replacing, {}
+        if replacing:
+            await self._async_rewrite(replacing, pending)
+        if not pending:
+            return
+        if unknown := [statistic_id for statistic_id in pending if statistic_id not in self._last]:
+            try:
+                last = await get_instance(self.hass).async_add_executor_job(
+                    _last_statistics, self.hass, unknown
+                )
+            except Exception as err:  # noqa: BLE001
+                _MAIN_LOGGER.warning("history: reading last statistics failed: %s", err)
+                return
+            self._last.update(last)
+        rows_written = 0
+        for statistic_id, (name, hourly) in pending.items():
+            last_start, state, total = self._last.get(statistic_id, (None, 0.0, 0.0))
+            rows: list[StatisticData] = []
+            for hour in sorted(hourly):
+                value = hourly[hour]
+                if last_start is not None and hour < last_start:
+                    _MAIN_LOGGER.debug(
+                        "history: %s skipping hour %s before last exported hour", statistic_id, hour
+                    )
+                    continue
+                state = state + value if hour == last_start else value
+                total += value
+                last_start = hour
+                rows.append(
+                    StatisticData(
+                        start=dt_util.utc_from_timestamp(hour), state=round(state, 3), sum=round(total, 3)
+                    )
+                )
+            if not rows:
+                continue
+            self._write(statistic_id, name, rows)
+            self._last[statistic_id] = (last_start, state, total)
+            rows_written += len(rows)
+        _MAIN_LOGGER.debug(
+            "history: exported %s statistic(s), %s hourly row(s)", len(pending), rows_written
+        )
+
+    async def _async_rewrite(
+        self,
+        replacing: dict[str, tuple[str, dict[tuple[float, float], dict[float, float]]]],
+        pending: dict[str, tuple[str, dict[float, float]]],
+    ) -> None:
+        """Replace the rows of recalculated ranges and rewrite the running sum after them.
+
+        Stored rows of a replaced range without a new value become 0 (rows can't be
+        deleted). Appends queued for the same statistic are merged in, so they are
+        removed from `pending`.
+        """
+        from homeassistant.components.recorder import get_instance
+        from homeassistant.components.recorder.models import StatisticData
+
+        instance = get_instance(self.hass)
+        try:
+            # Rows are read back in full, so earlier imports must be committed first
+            await instance.async_block_till_done()
+            stored = await instance.async_add_executor_job(
+                _all_statistics, self.hass, list(replacing)
+            )
+        except Exception as err:  # noqa: BLE001
+            _MAIN_LOGGER.warning("history: reading statistics failed: %s", err)
+            return
+        for statistic_id, (name, ranges) in replacing.items():
+            _, appended = pending.pop(statistic_id, (name, {}))
+            rows = stored.get(statistic_id, [])
+            states = {start: state for start, state, _ in rows}
+            for hour in states:
+                if any(start <= hour < end for start, end in ranges):
+                    states[hour] = 0.0
+            for hourly in (*ranges.values(), appended):
+                for hour, value in hourly.items():
+                    states[hour] = states.get(hour, 0.0) + value
+            first = min((start - start % _HOUR for start, _ in ranges), default=None)
+            if appended:
+                first = min(first, min(appended)) if first is not None else min(appended)
+            if first is None:
+                continue
+            total = next((row_sum for start, _, row_sum in reversed(rows) if start < first), 0.0)
+            new_rows: list[StatisticData] = []
+            for hour in sorted(h for h in states if h >= first):
+                total += states[hour]
+                new_rows.append(
+                    StatisticData(
+                        start=dt_util.utc_from_timestamp(hour),
+                        state=round(states[hour], 3),
+                        sum=round(total, 3),
+                    )
+                )
+            if new_rows:
+                self._write(statistic_id, name, new_rows)
+                self._last[statistic_id] = (hour, states[hour], total)
+            _MAIN_LOGGER.debug(
+                "history: %s rewritten from %s - %s hourly row(s)", statistic_id, first, len(new_rows)
+            )
+
+    @callback
+    def _write(self, statistic_id: str, name: str, rows: list[Any]) -> None:
+        from homeassistant.components.recorder.models import StatisticMetaData
+        from homeassistant.components.recorder.statistics import (
+            async_add_external_statistics,
+        )
+
+        async_add_external_statistics(
+            self.hass,
+            StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=name,
+                source=DOMAIN,
+                statistic_id=statistic_id,
+                unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+            ),
+            rows,
+        )
+
+
+@callback
+def async_get_statistics_exporter(hass: HomeAssistant) -> StatisticsExporter:
+    """Return the domain-wide statistics exporter, creating it on first use."""
+    if (exporter := hass.data.get(DATA_STATISTICS)) is None:
+        exporter = hass.data[DATA_STATISTICS] = StatisticsExporter(hass)
+    return exporter
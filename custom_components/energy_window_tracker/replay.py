@@ -0,0 +1,344 @@
+"""Offline replay of an exported source history through a window layout.
+
+Answers "what would these windows have measured" from a state export, without a
+running Home Assistant: readings are streamed from a CSV (History panel download,
+``entity_id,state,last_changed``) or JSON file (``/api/history`` response, a JSON
+array of states or JSON Lines) and drive a virtual clock. Window boundaries are
+snapshotted as the live sensors do (interpolated between the readings around the
+boundary instant), and each day's totals come from the same window math
+(sensor.window_value). Only the current day is held in memory.
+
+    python -m custom_components.energy_window_tracker.replay export.csv \\
+        --window "Peak=16:00-19:00" --time-zone Europe/London
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import json
+import logging
+import sys
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, tzinfo
+from pathlib import Path
+from typing import IO, Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_SOURCES,
+    CONF_WINDOW_END,
+    CONF_WINDOW_NAME,
+    CONF_WINDOW_START,
+    CONF_WINDOWS,
+)
+from .history import INTERPOLATION_MAX_GAP, interpolate_reading
+from .sensor import (
+    _RESET_DROP_RATIO,
+    WindowConfig,
+    WindowSnapshots,
+    WindowTable,
+    _parse_windows,
+    window_value,
+)
+
+_MAIN_LOGGER = logging.getLogger("custom_components.energy_window_tracker")
+
+_CHUNK_SIZE = 1 << 16
+_JSON_SEPARATORS = " \t\r\n[],"
+_MINUTES_PER_DAY = 24 * 60
+
+
+def _iter_json_objects(fp: IO[str], chunk_size: int = _CHUNK_SIZE) -> Iterator[dict[str, Any]]:
+    """Objects of a JSON array (also nested, as /api/history returns) or JSON Lines file.
+
+    Decoded one at a time from a bounded buffer, so the file is never loaded whole.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    while True:
+        while pos < len(buffer) and buffer[pos] in _JSON_SEPARATORS:
+            pos += 1
+        if pos < len(buffer):
+            try:
+                obj, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                if isinstance(obj, dict):
+                    yield obj
+                continue
+        elif eof:
+            return
+        chunk = fp.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def iter_rows(fp: IO[str], fmt: str) -> Iterator[Mapping[str, Any]]:
+    """State rows of an export file ("csv" or "json"), streamed."""
+    if fmt == "csv":
+        return csv.DictReader(fp)
+    return _iter_json_objects(fp)
+
+
+def iter_readings(
+    rows: Iterable[Mapping[str, Any]], entity_id: str | None = None
+) -> Iterator[tuple[float, float]]:
+    """(timestamp, value) of the numeric states of one entity, oldest first.
+
+    Without entity_id the first entity in the file is used. Rows older than the
+    previous reading are skipped (exports are sorted by time per entity).
+    """
+    last_ts: float | None = None
+    skipped = 0
+    for row in rows:
+        row_entity = row.get("entity_id")
+        if entity_id is None and row_entity:
+            entity_id = row_entity
+        if row_entity and row_entity != entity_id:
+            continue
+        when = row.get("last_updated") or row.get("last_changed")
+        parsed = dt_util.parse_datetime(when) if isinstance(when, str) else None
+        if parsed is None:
+            continue
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=dt_util.UTC)
+        try:
+            value = float(row.get("state"))  # type: ignore[arg-type]
+        except (TypeError, ValueError):
+            continue
+        ts = parsed.timestamp()
+        if last_ts is not None and ts < last_ts:
+            skipped += 1
+            continue
+        last_ts = ts
+        yield ts, value
+    if skipped:
+        _MAIN_LOGGER.warning("replay: %s out-of-order row(s) of %s skipped", skipped, entity_id)
+
+
+@dataclass(frozen=True, slots=True)
+class DayResult:
+    """Window totals (kWh, ranges of a name summed) of one replayed day."""
+
+    day: date
+    totals: dict[str, float]
+
+
+class ReplayEngine:
+    """Replays (timestamp, value) readings through a window table on a virtual clock.
+
+    The clock is the time of each reading. Boundaries passed since the previous
+    reading are snapshotted with the value interpolated at the boundary instant (or
+    the previous reading when the two are further apart than max_gap or the meter
+    reset in between, except that a start across a reset counts from 0.0); a start without any earlier reading uses the 0.0 baseline,
+    like a late start snapshot. Ends are taken before starts at the same instant.
+    """
+
+    def __init__(
+        self,
+        windows: WindowTable,
+        tz: tzinfo,
+        *,
+        count_through_resets: bool = False,
+        max_gap: float = INTERPOLATION_MAX_GAP,
+    ) -> None:
+        self._windows = windows
+        self._tz = tz
+        self._count_through_resets = count_through_resets
+        self._max_gap = max_gap
+        # (minute, 0 = end / 1 = start, window), in the order they are taken
+        self._boundaries = sorted(
+            (
+                *((w.end_min, 0, w) for w in windows),
+                *((w.start_min, 1, w) for w in windows),
+            ),
+            key=lambda b: (b[0], b[1], b[2].index),
+        )
+        self._day: date | None = None
+        self._pending: list[tuple[float, int, WindowConfig]] = []
+        self._snapshots: dict[int, WindowSnapshots] = {}
+        self._last: tuple[float, float] | None = None
+
+    def run(self, readings: Iterable[tuple[float, float]]) -> Iterator[DayResult]:
+        """Feed every reading; yield each day's totals as soon as the day is over."""
+        for ts, value in readings:
+            yield from self.feed(ts, value)
+        if (result := self.finish()) is not None:
+            yield result
+
+    def feed(self, ts: float, value: float) -> Iterator[DayResult]:
+        """Advance the clock to one reading; yields the previous day's totals on a day change."""
+        day = datetime.fromtimestamp(ts, self._tz).date()
+        if self._day is not None and day != self._day:
+            self._take_boundaries(ts, value, until=None)
+            yield self._close_day()
+        if self._day != day:
+            self._begin_day(day)
+        self._take_boundaries(ts, value, until=ts)
+        if self._count_through_resets and self._last is not None:
+            previous = self._last[1]
+            if value < previous * _RESET_DROP_RATIO:
+                for index, snap in self._snapshots.items():
+                    if snap.snapshot_start is not None and snap.snapshot_end is None:
+                        self._snapshots[index] = WindowSnapshots(snap.snapshot_start - previous, None)
+        self._last = (ts, value)
+
+    def finish(self) -> DayResult | None:
+        """Close the last day (boundaries after the last reading use its value)."""
+        if self._day is None:
+            return None
+        if self._last is not None:
+            self._take_boundaries(self._last[0], self._last[1], until=None, after=False)
+        return self._close_day()
+
+    def _begin_day(self, day: date) -> None:
+        midnight = datetime.combine(day, time(0), tzinfo=self._tz)
+        self._day = day
+        self._snapshots = {w.index: WindowSnapshots(None, None) for w in self._windows}
+        self._pending = [
+            ((midnight + timedelta(minutes=minute)).timestamp(), kind, window)
+            for minute, kind, window in self._boundaries
+        ]
+
+    def _take_boundaries(
+        self, ts: float, value: float, until: float | None, after: bool = True
+    ) -> None:
+        """Snapshot pending boundaries up to `until` (all if None) from the readings around them."""
+        taken = 0
+        for at, kind, window in self._pending:
+            if until is not None and at > until:
+                break
+            taken += 1
+            readings = [r for r in (self._last, (ts, value) if after else None) if r is not None]
+            boundary_value = interpolate_reading(readings, at, self._max_gap)
+            if boundary_value is None and self._last is not None and self._last[0] <= at:
+                boundary_value = self._last[1]
+                if (
+                    kind == 1
+                    and after
+                    and self._last[0] < at
+                    and value < self._last[1] * _RESET_DROP_RATIO
+                ):
+                    # The meter reset across a start (a daily counter at midnight); an end
+                    # keeps the last reading before the reset
+                    boundary_value = 0.0
+            snap = self._snapshots[window.index]
+            if kind == 1:
+                self._snapshots[window.index] = WindowSnapshots(
+                    0.0 if boundary_value is None else boundary_value, None
+                )
+            elif boundary_value is not None and snap.snapshot_start is not None:
+                self._snapshots[window.index] = WindowSnapshots(snap.snapshot_start, boundary_value)
+        del self._pending[:taken]
+
+    def _close_day(self) -> DayResult:
+        total = self._last[1] if self._last is not None else None
+        totals: dict[str, float] = {}
+        for window in self._windows:
+            value, _ = window_value(
+                window, self._snapshots[window.index], total, _MINUTES_PER_DAY
+            )
+            if value is not None:
+                totals[window.name] = round(totals.get(window.name, 0.0) + value, 3)
+        assert self._day is not None
+        return DayResult(self._day, totals)
+
+
+def _window_arg(text: str) -> dict[str, str]:
+    """NAME=HH:MM-HH:MM as a window config dict."""
+    name, sep, span = text.rpartition("=")
+    start, dash, end = span.partition("-")
+    if not sep or not dash or not name:
+        raise argparse.ArgumentTypeError(f"expected NAME=HH:MM-HH:MM, got {text!r}")
+    return {CONF_WINDOW_NAME: name, CONF_WINDOW_START: start, CONF_WINDOW_END: end}
+
+
+def _load_window_config(path: str) -> list[dict[str, Any]]:
+    """Windows of a JSON file: {"windows": [...]} or an entry's data with "sources"."""
+    with open(path, encoding="utf-8") as fp:
+        config = json.load(fp)
+    if isinstance(config, dict) and isinstance(config.get(CONF_SOURCES), list) and config[CONF_SOURCES]:
+        config = config[CONF_SOURCES][0]
+    windows = config.get(CONF_WINDOWS) if isinstance(config, dict) else config
+    if not isinstance(windows, list):
+        raise SystemExit(f"{path}: no windows found")
+    return windows
+
+
+def _open_export(path: str) -> tuple[IO[str], str]:
+    """Open an export (optionally .gz) and detect its format from the name or first character."""
+    opener = gzip.open if path.endswith(".gz") else open
+    fp: IO[str] = opener(path, "rt", encoding="utf-8", newline="")  # type: ignore[operator]
+    suffix = Path(path.removesuffix(".gz")).suffix.lower()
+    if suffix == ".csv":
+        return fp, "csv"
+    if suffix in (".json", ".jsonl"):
+        return fp, "json"
+    head = fp.read(1)
+    while head.isspace():
+        head = fp.read(1)
+    fp.seek(0)
+    return fp, "json" if head and head in "[{" else "csv"
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI: print date,window,kwh for every replayed day, then each window's total."""
+    parser = argparse.ArgumentParser(
+        prog="python -m custom_components.energy_window_tracker.replay",
+        description="Replay an exported source history through a window layout.",
+    )
+    parser.add_argument("export", help="CSV or JSON state export (.gz allowed)")
+    parser.add_argument("--window", action="append", type=_window_arg, default=[], metavar="NAME=HH:MM-HH:MM")
+    parser.add_argument("--config", help="JSON file with the windows (or an entry's data)")
+    parser.add_argument("--entity", help="Source entity_id (default: first entity in the export)")
+    parser.add_argument("--time-zone", default="UTC", help="Time zone of the windows (default UTC)")
+    parser.add_argument("--count-through-resets", action="store_true")
+    args = parser.parse_args(argv)
+
+    window_configs = list(args.window)
+    if args.config:
+        try:
+            window_configs.extend(_load_window_config(args.config))
+        except (OSError, ValueError) as err:
+            parser.error(f"{args.config}: {err}")
+    if not window_configs:
+        parser.error("give at least one --window or --config")
+    if (tz := dt_util.get_time_zone(args.time_zone)) is None:
+        parser.error(f"unknown time zone {args.time_zone!r}")
+    # _parse_windows logs every parse; only problems matter here
+    _MAIN_LOGGER.setLevel(logging.ERROR)
+    windows, warnings_by_name = _parse_windows({CONF_WINDOWS: window_configs})
+    for name, warnings in warnings_by_name.items():
+        for warning in warnings:
+            print(f"{name}: {warning}", file=sys.stderr)
+
+    engine = ReplayEngine(windows, tz, count_through_resets=args.count_through_resets)
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["date", "window", "kwh"])
+    grand_totals: dict[str, float] = {}
+    try:
+        fp, fmt = _open_export(args.export)
+        with fp:
+            for result in engine.run(iter_readings(iter_rows(fp, fmt), args.entity)):
+                for name, value in result.totals.items():
+                    writer.writerow([result.day.isoformat(), name, f"{value:.3f}"])
+                    grand_totals[name] = grand_totals.get(name, 0.0) + value
+    except (OSError, ValueError, csv.Error) as err:
+        # Missing or unreadable file, bad gzip / UTF-8 / JSON (all ValueError or OSError)
+        parser.error(f"{args.export}: {err}")
+    for name, value in grand_totals.items():
+        writer.writerow(["total", name, f"{value:.3f}"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
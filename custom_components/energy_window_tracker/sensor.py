@@ -2,53 +2,110 @@
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import logging
 import re
-from collections import OrderedDict
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, tzinfo
 from typing import Any
 
 from homeassistant.components.sensor import (
     RestoreSensor,
     SensorDeviceClass,
+    SensorEntity,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfEnergy
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.const import EVENT_CORE_CONFIG_UPDATE, UnitOfEnergy
+from homeassistant.core import Event, HomeAssistant, State, callback
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.event import (
+    async_call_later,
+    async_track_point_in_time,
     async_track_state_change_event,
-    async_track_time_change,
 )
-from homeassistant.helpers.storage import Store
+from homeassistant.helpers.start import async_at_started
 from homeassistant.util import dt as dt_util
 
 from .const import (
     ATTR_COST,
     ATTR_SOURCE_ENTITY,
     ATTR_STATUS,
+    CONF_CHECKPOINT_INTERVAL,
     CONF_COST_PER_KWH,
+    CONF_COST_SENSORS,
+    CONF_COUNT_THROUGH_RESETS,
+    CONF_EXPORT_STATISTICS,
+    CONF_MIN_DELTA,
+    CONF_MIN_INTERVAL,
     CONF_NAME,
+    CONF_SAVE_DELAY,
     CONF_SOURCE_ENTITY,
     CONF_SOURCES,
     CONF_WINDOW_END,
     CONF_WINDOW_NAME,
     CONF_WINDOW_START,
     CONF_WINDOWS,
+    DATA_ORPHANS,
+    DATA_SCHEDULER,
+    DATA_TIME_ZONE,
+    DEFAULT_CHECKPOINT_INTERVAL,
+    DEFAULT_COST_SENSORS,
+    DEFAULT_COUNT_THROUGH_RESETS,
+    DEFAULT_EXPORT_STATISTICS,
+    DEFAULT_MIN_DELTA,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_SAVE_DELAY,
     DOMAIN,
-    STORAGE_KEY,
-    STORAGE_VERSION,
     source_slug_from_entity_id,
 )
+from .history import (
+    _HOUR,
+    SourceHistory,
+    StatisticsExporter,
+    async_get_source_history,
+    async_get_statistics_exporter,
+    interpolate_reading,
+    value_at,
+    window_hourly,
+    window_total,
+)
+from .storage import (
+    SourceSnapshotStore,
+    async_get_snapshot_store,
+    async_get_totals_store,
+)
+from .totals import DailyTotals, PeriodTotals
 
 _MAIN_LOGGER = logging.getLogger("custom_components.energy_window_tracker")
 
 _RE_NON_SLUG = re.compile(r"[^a-z0-9_]+")
 
+# unique_id suffix of a window's cost sensor (appended to the energy sensor's unique_id)
+_COST_UNIQUE_ID_SUFFIX = "_cost"
+
+# Window statuses whose value does not follow the source until the next boundary
+_FROZEN_STATUSES = frozenset({"before_window", "after_window", "after_window (no snapshots)"})
+
+# Recent source readings kept per source to interpolate snapshots at the boundary instant
+_SOURCE_HISTORY_SIZE = 8
+# With count_through_resets, a reading below this fraction of the previous one is a meter
+# reset; smaller drops are treated as meter jitter.
+_RESET_DROP_RATIO = 0.5
+
+_BOUNDARY_START = "start"
+_BOUNDARY_END = "end"
+_BOUNDARY_MIDNIGHT = "midnight"
+# Second of the day the midnight reset runs at; 00:00 window starts are deferred to the
+# same slot and handled after the reset, so the reset does not wipe their snapshot.
+_MIDNIGHT_SECOND = 2
+
 
 def _window_slug(window_name: str) -> str:
     """Make a stable slug for a window name (unique_id component)."""
@@ -57,16 +114,31 @@ def _window_slug(window_name: str) -> str:
     return (base or "window")[:48]
 
 
+def _window_name_hash(window_name: str) -> str:
+    """Short hash of the exact window name (tells apart names with the same slug)."""
+    return hashlib.md5(
+        (window_name or "").encode("utf-8"), usedforsecurity=False
+    ).hexdigest()[:8]
+
+
+def _statistic_id(source_slug: str, window_name: str) -> str:
+    """External statistic id of a window (no doubled or edge underscores).
+
+    Carries the same name hash as the unique_id, so "Peak" and "peak" don't share one.
+    """
+    object_id = re.sub(
+        r"_+", "_", f"{source_slug}_{_window_slug(window_name)}_{_window_name_hash(window_name)}"
+    ).strip("_")
+    return f"{DOMAIN}:{object_id}"
+
+
 def _stable_window_unique_id(entry_id: str, source_slug: str, window_name: str) -> str:
     """Stable unique_id for a window sensor.
 
     Includes a short hash to avoid collisions when different names slugify the same.
     """
     slug = _window_slug(window_name)
-    h = hashlib.md5(
-        (window_name or "").encode("utf-8"), usedforsecurity=False
-    ).hexdigest()[:8]
-    return f"{entry_id}_{source_slug}_{slug}_{h}"
+    return f"{entry_id}_{source_slug}_{slug}_{_window_name_hash(window_name)}"
 
 
 def _window_name_from_original_name(original_name: str, source_slug: str) -> str:
@@ -82,9 +154,9 @@ def _window_name_from_original_name(original_name: str, source_slug: str) -> str
     return name
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class WindowConfig:
-    """Configuration for a single window."""
+    """Configuration for a single window (immutable; minute offsets precomputed)."""
 
     start_h: int
     start_m: int
@@ -93,6 +165,72 @@ class WindowConfig:
     name: str
     index: int
     cost_per_kwh: float = 0.0
+    start_min: int = field(init=False, repr=False, compare=False)
+    end_min: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "start_min", self.start_h * 60 + self.start_m)
+        object.__setattr__(self, "end_min", self.end_h * 60 + self.end_m)
+
+
+class WindowTable:
+    """Compiled, immutable table of a source's windows.
+
+    Behaves like a read-only sequence in config order, plus an index -> window map and
+    an interval index: the sorted start/end minutes split the day into segments, each
+    with a precomputed tuple of active windows, so active_at() is one bisect.
+    """
+
+    __slots__ = ("_windows", "_by_index", "_edges", "_active")
+
+    def __init__(self, windows: list[WindowConfig]) -> None:
+        self._windows: tuple[WindowConfig, ...] = tuple(windows)
+        self._by_index: dict[int, WindowConfig] = {w.index: w for w in windows}
+        self._edges: list[int] = sorted({m for w in windows for m in (w.start_min, w.end_min)})
+        # _active[i] covers minutes [_edges[i - 1], _edges[i]); _active[0] is before the first edge
+        self._active: list[tuple[WindowConfig, ...]] = [()]
+        for edge in self._edges:
+            self._active.append(
+                tuple(w for w in self._windows if w.start_min <= edge < w.end_min)
+            )
+
+    def __iter__(self) -> Iterator[WindowConfig]:
+        return iter(self._windows)
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def __getitem__(self, position: int) -> WindowConfig:
+        return self._windows[position]
+
+    def get(self, index: int) -> WindowConfig | None:
+        """Window by its WindowConfig.index."""
+        return self._by_index.get(index)
+
+    def active_at(self, minute_of_day: int) -> tuple[WindowConfig, ...]:
+        """Windows with start_min <= minute_of_day < end_min."""
+        return self._active[bisect_right(self._edges, minute_of_day)]
+
+
+@dataclass(frozen=True, slots=True)
+class EvaluationContext:
+    """Clock snapshot for one update pass, shared by every range and sensor of a source."""
+
+    now: datetime
+    minute_of_day: int
+    date: str
+    # Pass started by a window boundary or midnight: sensors write exact values at once
+    boundary: bool = False
+
+    @classmethod
+    def at(cls, now: datetime, boundary: bool = False) -> EvaluationContext:
+        """Context for a local datetime."""
+        return cls(
+            now=now,
+            minute_of_day=now.hour * 60 + now.minute,
+            date=now.date().isoformat(),
+            boundary=boundary,
+        )
 
 
 @dataclass
@@ -103,6 +241,13 @@ class WindowSnapshots:
     snapshot_end: float | None
 
 
+def _finished_total(snap: WindowSnapshots) -> float | None:
+    """Energy of a finished window (both snapshots), else None."""
+    if snap.snapshot_start is None or snap.snapshot_end is None:
+        return None
+    return max(0.0, snap.snapshot_end - snap.snapshot_start)
+
+
 def _parse_hhmm(time_str: str) -> tuple[int, int]:
     """Parse 'HH:MM' or 'HH:MM:SS' into (hour, minute)."""
     parts = str(time_str).split(":")
@@ -140,7 +285,7 @@ def _time_str(h: int, m: int) -> str:
     return f"{h:02d}:{m:02d}"
 
 
-def _parse_windows(config: dict[str, Any]) -> tuple[list[WindowConfig], dict[str, list[str]]]:
+def _parse_windows(config: dict[str, Any]) -> tuple[WindowTable, dict[str, list[str]]]:
     """Parse window config from entry data."""
     windows_data = config.get(CONF_WINDOWS) or []
     _MAIN_LOGGER.warning("_parse_windows: len(windows_data)=%s", len(windows_data))
@@ -183,7 +328,89 @@ def _parse_windows(config: dict[str, Any]) -> tuple[list[WindowConfig], dict[str
                 cost_per_kwh=cost_per_kwh,
             )
         )
-    return windows, warnings_by_name
+    return WindowTable(windows), warnings_by_name
+
+
+def _without_cost(attributes: dict[str, Any] | None) -> dict[str, Any] | None:
+    """Attributes minus cost, which follows the value and is held back with it."""
+    if not attributes or ATTR_COST not in attributes:
+        return attributes
+    return {key: value for key, value in attributes.items() if key != ATTR_COST}
+
+
+def window_value(
+    window: WindowConfig,
+    snap: WindowSnapshots,
+    total: float | None,
+    current_minutes: int,
+) -> tuple[float | None, str]:
+    """Energy value and status of a window from its snapshots and the source total.
+
+    Shared by WindowData.get_window_value and the offline replay (replay.py).
+    """
+    in_window = window.start_min <= current_minutes < window.end_min
+    window_ended = current_minutes >= window.end_min
+
+    if total is None:
+        return None, "unavailable"
+
+    if not in_window and not window_ended:
+        return 0.0, "before_window"
+    if in_window:
+        if snap and snap.snapshot_start is not None:
+            value = max(0.0, total - snap.snapshot_start)
+            return round(value, 3), "during_window"
+        return 0.0, "during_window (no snapshot)"
+    if (
+        window_ended
+        and snap
+        and snap.snapshot_start is not None
+        and snap.snapshot_end is not None
+    ):
+        value = max(0.0, snap.snapshot_end - snap.snapshot_start)
+        return round(value, 3), "after_window"
+    if window_ended and snap and snap.snapshot_start is not None:
+        return max(
+            0.0, total - snap.snapshot_start
+        ), "after_window (missing end snapshot)"
+    return 0.0, "after_window (no snapshots)"
+
+
+class StateWriteBatcher:
+    """Per-source batch of sensors waiting for a state write, flushed in one loop iteration.
+
+    A burst of source updates marks sensors dirty; the flush writes each once, and only
+    if its rendered state or attributes differ from its last write (and, unless forced,
+    the change is significant). The flush is one tracked task per burst, so shutdown and
+    async_block_till_done wait for it.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        # Dirty sensor -> force (bypass the significant-change check)
+        self._dirty: dict[WindowEnergySensor, bool] = {}
+        self._flush_task: asyncio.Task[None] | None = None
+
+    @callback
+    def async_schedule(self, entity: WindowEnergySensor, force: bool = False) -> None:
+        """Mark a sensor dirty; the first one of a burst schedules the flush."""
+        self._dirty[entity] = force or self._dirty.get(entity, False)
+        if self._flush_task is None:
+            self._flush_task = self.hass.async_create_task(self._async_flush())
+
+    @callback
+    def async_discard(self, entity: WindowEnergySensor) -> None:
+        """Forget a removed sensor."""
+        self._dirty.pop(entity, None)
+
+    async def _async_flush(self) -> None:
+        """Write every dirty sensor whose rendering changed."""
+        self._flush_task = None
+        dirty, self._dirty = self._dirty, {}
+        written = sum(entity.async_write_if_changed(force) for entity, force in dirty.items())
+        _MAIN_LOGGER.debug(
+            "sensor: state write batch - %s dirty, %s written", len(dirty), written
+        )
 
 
 class WindowData:
@@ -194,41 +421,232 @@ class WindowData:
         hass: HomeAssistant,
         entry_id: str,
         source_entity: str,
-        windows: list[WindowConfig],
-        store: Store,
-        tz: datetime.tzinfo | None = None,
+        windows: WindowTable,
+        store: SourceSnapshotStore,
+        totals_store: SourceSnapshotStore,
+        tz: tzinfo | None = None,
         config_warnings_by_name: dict[str, list[str]] | None = None,
+        save_delay: float = DEFAULT_SAVE_DELAY,
+        min_delta: float = DEFAULT_MIN_DELTA,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        history: SourceHistory | None = None,
+        checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+        count_through_resets: bool = DEFAULT_COUNT_THROUGH_RESETS,
+        statistics: StatisticsExporter | None = None,
+        export_statistics: bool = DEFAULT_EXPORT_STATISTICS,
     ) -> None:
         self.hass = hass
         self._entry_id = entry_id
         self._source_entity = source_entity
         self._windows = windows
         self._store = store
+        # Daily / period totals are saved apart from the snapshots, only when they change
+        self._totals_store = totals_store
+        self._totals_save_pending = False
         self._tz = tz or dt_util.get_default_time_zone()
         self._config_warnings_by_name = config_warnings_by_name or {}
+        self._save_delay = save_delay
+        # Significant-change hysteresis for sensor writes between boundaries
+        self._min_delta = min_delta
+        self._min_interval = min_interval
+        self._save_pending = False
         self._snapshots: dict[int, WindowSnapshots] = {
             w.index: WindowSnapshots(snapshot_start=None, snapshot_end=None)
             for w in windows
         }
         self._snapshot_date: str | None = None
-        self._update_callbacks: list[callback] = []
+        self._update_callbacks: list[Callable[[], None]] = []
+        # Callbacks whose value can still move with the source. Sensors frozen until their
+        # next boundary drop out of here; boundaries and midnight notify everyone again.
+        self._awake_callbacks: dict[Callable[[], None], None] = {}
+        self._unsub_source: Callable[[], None] | None = None
+        # Parsed source value and its last_updated, refreshed once per state change event
+        # while subscribed, so every range and sensor of a tick reuses one parse.
+        self._source_cached = False
+        self._source_value: float | None = None
+        self._source_updated: datetime | None = None
+        # (last_updated timestamp, value) of recent readings, and boundary snapshots taken
+        # from a reading before the boundary that await the first reading after it.
+        self._source_history: deque[tuple[float, float]] = deque(maxlen=_SOURCE_HISTORY_SIZE)
+        self._pending_snapshots: list[tuple[float, int, str]] = []
+        # Recorder lookups replacing the 0.0 baseline of late start snapshots; windows
+        # whose start snapshot is still that baseline and awaits a looked-up value.
+        self._history = history
+        self._recovering: set[int] = set()
+        # Source seen dropping across midnight (a daily counter): the recorder value at
+        # 00:00 is then yesterday's total, so 00:00 starts keep the 0.0 baseline.
+        self._resets_at_midnight = False
+        # (last_updated timestamp, value) of the last checkpointed reading of today, saved
+        # with the snapshots every checkpoint_interval minutes (0 = off). After a load it
+        # is compared once with the first reading to detect a meter reset while down.
+        self._checkpoint_interval = checkpoint_interval
+        self._checkpoint: tuple[float, float] | None = None
+        self._check_reset_since_checkpoint = False
+        # Previous reading, tracked (and saved) with count_through_resets. On a reset the
+        # energy open windows had counted is carried into their start snapshot, so each
+        # window keeps the running sum of every rise of the source since its start.
+        self._count_through_resets = count_through_resets
+        self._last_reading: float | None = None
+        # Totals of past days per window name, recorded when a window's end snapshot is taken
+        self.daily_totals = DailyTotals()
+        # Week-to-date / month-to-date sums per window name, added to at each window end
+        self.period_totals = PeriodTotals()
+        # Hourly window sums exported as long-term statistics at each window end, and
+        # (timestamp, value) of the source interpolated at each UTC hour boundary of today
+        # so those sums follow the actual readings rather than an even spread.
+        self._statistics = statistics
+        self._export_statistics = export_statistics and statistics is not None
+        self._hour_marks: list[tuple[float, float]] = []
+        # Clock snapshot of the update pass in progress (None outside a pass)
+        self._context: EvaluationContext | None = None
+        # Sensors of this source, set by the platform (used to reconfigure without a reload)
+        self.entities: SourceEntities | None = None
+        self.writer = StateWriteBatcher(hass)
+
+    @callback
+    def async_reconfigure(
+        self,
+        windows: WindowTable,
+        config_warnings_by_name: dict[str, list[str]],
+        save_delay: float,
+        min_delta: float = DEFAULT_MIN_DELTA,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+        count_through_resets: bool = DEFAULT_COUNT_THROUGH_RESETS,
+        export_statistics: bool = DEFAULT_EXPORT_STATISTICS,
+    ) -> None:
+        """Swap in a new window table live, carrying over snapshots of unchanged windows.
+
+        A window keeps both snapshots when its name, start and end are unchanged, and
+        its start snapshot when only the end moved; other windows start without any.
+        """
+        old_exact = {(w.name, w.start_min, w.end_min): w.index for w in self._windows}
+        old_start = {(w.name, w.start_min): w.index for w in self._windows}
+        snapshots: dict[int, WindowSnapshots] = {}
+        for w in windows:
+            snap = WindowSnapshots(snapshot_start=None, snapshot_end=None)
+            if (old := old_exact.get((w.name, w.start_min, w.end_min))) is not None:
+                snap = self._snapshots.get(old) or snap
+            elif (old := old_start.get((w.name, w.start_min))) is not None:
+                if (prev := self._snapshots.get(old)) is not None:
+                    snap = WindowSnapshots(snapshot_start=prev.snapshot_start, snapshot_end=None)
+            snapshots[w.index] = snap
+        self._windows = windows
+        self._snapshots = snapshots
+        self.daily_totals.retain({w.name for w in windows})
+        self.period_totals.retain({w.name for w in windows})
+        self._pending_snapshots = []
+        self._recovering = set()
+        self._config_warnings_by_name = config_warnings_by_name
+        self._save_delay = save_delay
+        self._min_delta = min_delta
+        self._min_interval = min_interval
+        self._checkpoint_interval = checkpoint_interval
+        if not checkpoint_interval:
+            self._checkpoint = None
+        self._count_through_resets = count_through_resets
+        if not count_through_resets:
+            self._last_reading = None
+        self._export_statistics = export_statistics and self._statistics is not None
+        if not self._export_statistics:
+            self._hour_marks = []
+        self._schedule_save()
+        self._schedule_totals_save()
 
     def _now(self) -> datetime:
         """Current time in the integration timezone (HA config time_zone)."""
         return dt_util.now(self._tz)
 
-    def add_update_callback(self, cb: callback) -> None:
-        """Register a callback to run when snapshots change."""
+    @callback
+    def set_time_zone(self, tz: tzinfo) -> None:
+        """Switch to a new time zone live (core config changed) and refresh sensors."""
+        self._tz = tz
+        self._notify_update()
+
+    def add_update_callback(self, cb: Callable[[], None]) -> Callable[[], None]:
+        """Register a callback to run when the source or snapshots change.
+
+        The first registration subscribes to the source entity; all sensors of this
+        source share that one listener. Returns a callable that unregisters the
+        callback and drops the subscription once no callbacks remain.
+        """
         self._update_callbacks.append(cb)
+        self._awake_callbacks[cb] = None
+        if self._unsub_source is None:
+            self._source_cached = False
+            self._unsub_source = async_track_state_change_event(
+                self.hass, [self._source_entity], self._handle_source_change
+            )
 
-    def _notify_update(self) -> None:
-        """Notify all sensors to update."""
-        for cb in self._update_callbacks:
-            cb()
+        @callback
+        def _remove() -> None:
+            if cb in self._update_callbacks:
+                self._update_callbacks.remove(cb)
+            self._awake_callbacks.pop(cb, None)
+            if not self._update_callbacks and self._unsub_source is not None:
+                self._unsub_source()
+                self._unsub_source = None
+                self._source_cached = False
 
-    def get_source_value(self) -> float | None:
-        """Get current source entity value."""
-        state = self.hass.states.get(self._source_entity)
+        return _remove
+
+    def set_sleeping(self, cb: Callable[[], None], sleeping: bool) -> None:
+        """Detach (or re-attach) a callback from source-change fan-out.
+
+        A sensor whose every range is before or after its window cannot change until
+        the next boundary, so it sleeps; boundary and midnight passes still reach it.
+        """
+        if sleeping:
+            self._awake_callbacks.pop(cb, None)
+        elif cb in self._update_callbacks:
+            self._awake_callbacks[cb] = None
+
+    @callback
+    def _handle_source_change(self, event: Event) -> None:
+        """Parse the new source state once, then fan it out to every awake sensor.
+
+        When the source turns (un)available every sensor is notified, since that
+        changes sleeping sensors too.
+        """
+        was_available = self._source_cached and self._source_value is not None
+        self._cache_source_state(event.data.get("new_state"))
+        self._maybe_checkpoint()
+        refined = bool(self._pending_snapshots) and self._refine_pending_snapshots()
+        if refined:
+            self._schedule_save()
+        self._notify_update(
+            awake_only=not refined and was_available and self._source_value is not None
+        )
+
+    def _notify_update(self, awake_only: bool = False) -> None:
+        """Notify sensors to update, all reading the same clock snapshot."""
+        callbacks = self._awake_callbacks if awake_only else self._update_callbacks
+        with self.evaluation_pass():
+            for cb in list(callbacks):
+                cb()
+
+    @contextmanager
+    def evaluation_pass(self, boundary: bool = False) -> Iterator[EvaluationContext]:
+        """Pin one EvaluationContext for every window evaluated inside the block.
+
+        Nested passes reuse the outer context, so a boundary and the sensor updates it
+        triggers all see the same instant.
+        """
+        if self._context is not None:
+            yield self._context
+            return
+        self._context = EvaluationContext.at(self._now(), boundary)
+        try:
+            yield self._context
+        finally:
+            self._context = None
+
+    def evaluation_context(self) -> EvaluationContext:
+        """Context of the current pass, or a fresh one outside a pass."""
+        return self._context or EvaluationContext.at(self._now())
+
+    def _parse_source_state(self, state: State | None) -> float | None:
+        """Numeric value of a source state, or None if missing or not numeric."""
         if state is None or state.state in ("unknown", "unavailable"):
             return None
         try:
@@ -241,14 +659,213 @@ class WindowData:
             )
             return None
 
-    def _snapshots_valid_today(self) -> bool:
+    def _cache_source_state(self, state: State | None) -> None:
+        """Store the parsed value and last_updated of the current source state."""
+        self._source_value = self._parse_source_state(state)
+        self._source_updated = state.last_updated if state is not None else None
+        self._source_cached = True
+        if self._source_value is not None and self._source_updated is not None:
+            ts = self._source_updated.timestamp()
+            if not self._source_history or ts > self._source_history[-1][0]:
+                if self._source_history:
+                    self._check_midnight_reset(self._source_history[-1], (ts, self._source_value))
+                if self._export_statistics and self._source_history:
+                    self._mark_hours(self._source_history[-1], (ts, self._source_value))
+                self._source_history.append((ts, self._source_value))
+            if self._check_reset_since_checkpoint:
+                self._check_reset_since_checkpoint = False
+                if self._resume_from_checkpoint(self._source_value):
+                    self._last_reading = None
+            if self._count_through_resets:
+                self._track_resets(self._source_value)
+
+    def _check_midnight_reset(self, before: tuple[float, float], after: tuple[float, float]) -> None:
+        """Learn whether the source restarts at midnight from two readings around one."""
+        (t0, v0), (t1, v1) = before, after
+        if v0 <= 0 or datetime.fromtimestamp(t0, self._tz).date() == datetime.fromtimestamp(t1, self._tz).date():
+            return
+        resets = v1 < v0
+        if resets != self._resets_at_midnight:
+            self._resets_at_midnight = resets
+            self._schedule_save()
+
+    def _mark_hours(self, before: tuple[float, float], after: tuple[float, float]) -> None:
+        """Record the source value at each UTC hour boundary between two readings."""
+        (t0, v0), (t1, v1) = before, after
+        hour = t0 - t0 % _HOUR + _HOUR
+        while hour <= t1:
+            self._hour_marks.append((hour, v0 + (v1 - v0) * (hour - t0) / (t1 - t0)))
+            hour += _HOUR
+
+    def _maybe_checkpoint(self) -> None:
+        """Checkpoint the latest reading once checkpoint_interval minutes have passed."""
+        if not self._checkpoint_interval or self._source_value is None or self._source_updated is None:
+            return
+        ts = self._source_updated.timestamp()
+        if self._checkpoint is not None and ts - self._checkpoint[0] < self._checkpoint_interval * 60:
+            return
+        self._checkpoint = (ts, self._source_value)
+        self._schedule_save()
+
+    def _resume_from_checkpoint(self, value: float) -> bool:
+        """Carry the energy counted up to the checkpoint over a meter reset while down.
+
+        A first reading below today's checkpoint means the meter reset in between; open
+        windows keep what they had counted by the checkpoint and continue from 0.
+        Returns True if a reset was found.
+        """
+        if self._checkpoint is None or value >= self._checkpoint[1]:
+            return False
+        checkpoint_value = self._checkpoint[1]
+        shifted = self._carry_over_reset(
+            checkpoint_value,
+            (
+                index
+                for index, snap in self._snapshots.items()
+                if snap.snapshot_start is not None and snap.snapshot_end is None
+            ),
+        )
+        _MAIN_LOGGER.warning(
+            "sensor: %s reset while down (checkpoint %.3f, now %.3f) - %s open window(s) resumed",
+            self._source_entity,
+            checkpoint_value,
+            value,
+            shifted,
+        )
+        self._checkpoint = (self._source_updated.timestamp(), value) if self._source_updated else None
+        self._schedule_save()
+        return True
+
+    def _track_resets(self, value: float) -> None:
+        """Compare a reading with the previous one; on a reset carry the running windows over."""
+        previous, self._last_reading = self._last_reading, value
+        if previous is None or value >= previous * _RESET_DROP_RATIO:
+            return
+        minute = self.evaluation_context().minute_of_day
+        shifted = self._carry_over_reset(
+            previous, (w.index for w in self._windows.active_at(minute))
+        )
+        _MAIN_LOGGER.warning(
+            "sensor: %s reset (%.3f -> %.3f) - %s running window(s) carried over",
+            self._source_entity,
+            previous,
+            value,
+            shifted,
+        )
+
+    def _carry_over_reset(self, carried: float, indexes: Iterable[int]) -> int:
+        """Lower the start snapshot of open windows by the reading lost to a reset.
+
+        The window value (total - start) then continues from what it had counted.
+        Returns the number of windows carried over.
+        """
+        shifted = 0
+        for index in list(indexes):
+            snap = self._snapshots.get(index)
+            if snap is None or snap.snapshot_start is None or snap.snapshot_end is not None:
+                continue
+            self._snapshots[index] = WindowSnapshots(snap.snapshot_start - carried, None)
+            shifted += 1
+        if shifted:
+            self._schedule_save()
+        return shifted
+
+    def _interpolate_source(self, at: float) -> float | None:
+        """Source value at timestamp `at`, interpolated between the buffered readings around it."""
+        return interpolate_reading(self._source_history, at)
+
+    def _reset_after(self, at: float) -> bool:
+        """True if the first buffered reading after `at` is a meter reset from the one before."""
+        before: float | None = None
+        for t, value in self._source_history:
+            if t <= at:
+                before = value
+            else:
+                return before is not None and value < before * _RESET_DROP_RATIO
+        return False
+
+    def _boundary_time(self, minute: int) -> datetime:
+        """Instant of today's boundary at `minute` past local midnight."""
+        now = self.evaluation_context().now
+        return datetime.combine(now.date(), time(0), tzinfo=now.tzinfo) + timedelta(minutes=minute)
+
+    def _boundary_value(self, window: WindowConfig, minute: int, kind: str) -> float | None:
+        """Source value at a window boundary of today.
+
+        Interpolated when readings on both sides are buffered. Otherwise the current
+        value is used and, if it predates the boundary, the snapshot is refined once the
+        first reading after the boundary arrives.
+        """
+        at = self._boundary_time(minute).timestamp()
+        if (value := self._interpolate_source(at)) is not None:
+            return value
+        value = self.get_source_value()
+        if value is not None and self._source_history and self._source_history[-1][0] < at:
+            self._pending_snapshots.append((at, window.index, kind))
+        return value
+
+    def _refine_pending_snapshots(self) -> bool:
+        """Interpolate snapshots awaiting a reading after their boundary; True if any changed."""
+        if not self._source_history:
+            return False
+        latest = self._source_history[-1][0]
+        still_pending: list[tuple[float, int, str]] = []
+        changed = False
+        for at, index, kind in self._pending_snapshots:
+            if latest <= at:
+                still_pending.append((at, index, kind))
+                continue
+            value = self._interpolate_source(at)
+            if value is None and kind == _BOUNDARY_START and self._reset_after(at):
+                # Reset just after the boundary (e.g. a daily counter at 00:00:10): count from it
+                value = 0.0
+            snap = self._snapshots.get(index)
+            if value is None or snap is None:
+                continue
+            if kind == _BOUNDARY_START and snap.snapshot_start is not None:
+                refined = WindowSnapshots(value, snap.snapshot_end)
+            elif kind == _BOUNDARY_END and snap.snapshot_end is not None:
+                refined = WindowSnapshots(snap.snapshot_start, value)
+            else:
+                continue
+            self._set_snapshots(index, refined)
+            _MAIN_LOGGER.debug(
+                "sensor: %s snapshot of window %d refined to %.3f kWh", kind, index, value
+            )
+            changed = True
+        self._pending_snapshots = still_pending
+        return changed
+
+    def get_source_value(self) -> float | None:
+        """Get current source entity value.
+
+        While the shared source listener is active the value is parsed once per state
+        change event and reused; otherwise the state machine is read directly.
+        """
+        if self._source_cached:
+            return self._source_value
+        state = self.hass.states.get(self._source_entity)
+        if self._unsub_source is None:
+            return self._parse_source_state(state)
+        self._cache_source_state(state)
+        return self._source_value
+
+    @property
+    def source_last_updated(self) -> datetime | None:
+        """last_updated of the source state behind get_source_value()."""
+        if not self._source_cached:
+            state = self.hass.states.get(self._source_entity)
+            return state.last_updated if state is not None else None
+        return self._source_updated
+
+    def _snapshots_valid_today(self, ctx: EvaluationContext | None = None) -> bool:
         """Return True if stored snapshots are from today (invalid for 'today' sources otherwise).
 
         Uses HA config timezone so 'today' matches the frontend date.
         """
         if not self._snapshot_date:
             return False
-        return self._snapshot_date == self._now().date().isoformat()
+        return self._snapshot_date == (ctx or self.evaluation_context()).date
 
     def get_window_value(self, window: WindowConfig) -> tuple[float | None, str]:
         """Get energy value and status for a window (same-day only; start < end).
@@ -257,76 +874,115 @@ class WindowData:
         local time, so 11:00–14:00 means 11am–2pm local.
         """
         total = self.get_source_value()
-        now = self._now()
-        current_minutes = now.hour * 60 + now.minute
-        if not self._snapshots_valid_today():
+        ctx = self.evaluation_context()
+        if not self._snapshots_valid_today(ctx):
             snap = WindowSnapshots(None, None)
         else:
             snap = self._snapshots.get(window.index) or WindowSnapshots(None, None)
-        start_min = window.start_h * 60 + window.start_m
-        end_min = window.end_h * 60 + window.end_m
-        in_window = start_min <= current_minutes < end_min
-        window_ended = current_minutes >= end_min
-
-        if total is None:
-            return None, "unavailable"
-
-        if not in_window and not window_ended:
-            return 0.0, "before_window"
-        if in_window:
-            if snap and snap.snapshot_start is not None:
-                value = max(0.0, total - snap.snapshot_start)
-                return round(value, 3), "during_window"
-            return 0.0, "during_window (no snapshot)"
-        if (
-            window_ended
-            and snap
-            and snap.snapshot_start is not None
-            and snap.snapshot_end is not None
-        ):
-            value = max(0.0, snap.snapshot_end - snap.snapshot_start)
-            return round(value, 3), "after_window"
-        if window_ended and snap and snap.snapshot_start is not None:
-            return max(
-                0.0, total - snap.snapshot_start
-            ), "after_window (missing end snapshot)"
-        return 0.0, "after_window (no snapshots)"
+        return window_value(window, snap, total, ctx.minute_of_day)
 
     def take_late_start_snapshot(self, window_index: int) -> bool:
         """If we're during the window with no start snapshot, use 0 as baseline so the window shows current total.
 
         (Using current value as baseline would zero the display until more energy is used.)
+        The value at the start time is preferred: interpolated from buffered readings
+        when they span it, otherwise looked up in the recorder. Until (or unless) the
+        recorder answers, today's checkpoint stands in for the 0.0 baseline.
         """
         if self.get_source_value() is None:
             return False
         snap = self._snapshots.get(window_index) or WindowSnapshots(None, None)
         if snap.snapshot_start is not None:
             return False
-        now = self._now()
-        current_minutes = now.hour * 60 + now.minute
-        for w in self._windows:
-            if w.index != window_index:
-                continue
-            start_min = w.start_h * 60 + w.start_m
-            end_min = w.end_h * 60 + w.end_m
-            in_window = start_min <= current_minutes < end_min
-            if not in_window:
-                return False
-            if not self._snapshot_date:
-                self._snapshot_date = self._now().date().isoformat()
-            self._snapshots[window_index] = WindowSnapshots(
-                snapshot_start=0.0,
-                snapshot_end=None,
-            )
+        window = self._windows.get(window_index)
+        if window is None:
+            return False
+        ctx = self.evaluation_context()
+        if window not in self._windows.active_at(ctx.minute_of_day):
+            return False
+        if not self._snapshot_date:
+            self._snapshot_date = ctx.date
+        start = self._boundary_time(window.start_min).timestamp()
+        if (value := self._interpolate_source(start)) is not None:
+            self._snapshots[window_index] = WindowSnapshots(value, None)
             self._schedule_save()
             return True
-        return False
+        baseline = 0.0
+        if self._checkpoint is not None and self._checkpoint[1] <= (self.get_source_value() or 0.0):
+            # Before the start it overcounts, inside the window it undercounts; either
+            # is closer than 0.0 until the recorder value at the start is known.
+            baseline = self._checkpoint[1]
+            _MAIN_LOGGER.warning(
+                "sensor: window '%s' start resumed from checkpoint - %.3f kWh",
+                window.name,
+                baseline,
+            )
+        self._snapshots[window_index] = WindowSnapshots(
+            snapshot_start=baseline,
+            snapshot_end=None,
+        )
+        self._schedule_save()
+        if self._history is not None and not (window.start_min == 0 and self._resets_at_midnight):
+            self._recovering.add(window_index)
+            date = self._snapshot_date
+
+            @callback
+            def _on_value(value: float) -> None:
+                self._apply_recovered_start(window_index, date, value, baseline)
+
+            self._history.async_request(
+                self._source_entity, self._boundary_time(window.start_min), _on_value
+            )
+        return True
+
+    @callback
+    def _apply_recovered_start(
+        self, window_index: int, date: str | None, value: float, baseline: float = 0.0
+    ) -> None:
+        """Replace a window's start baseline (0.0 or a checkpoint) with the recorder value."""
+        if window_index not in self._recovering or self._snapshot_date != date:
+            return
+        self._recovering.discard(window_index)
+        snap = self._snapshots.get(window_index)
+        if snap is None or snap.snapshot_start != baseline:
+            return
+        # Above the current reading the source has reset since the start (e.g. a daily
+        # counter at midnight); the baseline is the better guess then.
+        current = snap.snapshot_end if snap.snapshot_end is not None else self.get_source_value()
+        if current is None or value > current:
+            _MAIN_LOGGER.debug(
+                "sensor: window %d recorder start %.3f above current %s - kept 0.0 baseline",
+                window_index,
+                value,
+                current,
+            )
+            return
+        self._set_snapshots(window_index, WindowSnapshots(value, snap.snapshot_end))
+        _MAIN_LOGGER.warning(
+            "sensor: window %d start recovered from recorder - %.3f kWh", window_index, value
+        )
+        self._schedule_save()
+        self._notify_update()
 
     async def load(self) -> None:
         """Load snapshots from storage. Discard if snapshot_date is not today (e.g. after restart)."""
         stored = await self._store.async_load()
+        totals = await self._totals_store.async_load()
         today = self._now().date().isoformat()
+        if not totals and stored and ("history" in stored or "periods" in stored):
+            # Earlier versions saved the totals with the snapshots: move them to their store
+            totals = stored
+            self._schedule_totals_save()
+            self._schedule_save()
+        if totals and "history" in totals:
+            self.daily_totals = DailyTotals.from_dict(totals["history"])
+            self.daily_totals.retain({w.name for w in self._windows})
+        if totals and "periods" in totals:
+            self.period_totals = PeriodTotals.from_dict(totals["periods"])
+            self.period_totals.retain({w.name for w in self._windows})
+            self.period_totals.roll(date.fromisoformat(today))
         if stored:
+            self._resets_at_midnight = stored.get("resets_at_midnight") is True
             self._snapshot_date = stored.get("snapshot_date")
             if self._snapshot_date != today:
                 self._snapshot_date = today
@@ -351,13 +1007,24 @@ class WindowData:
                             snapshot_end=sd.get("snapshot_end"),
                         )
                         loaded += 1
+                if self._checkpoint_interval and isinstance(cp := stored.get("checkpoint"), dict):
+                    try:
+                        self._checkpoint = (float(cp["updated"]), float(cp["value"]))
+                    except (KeyError, TypeError, ValueError):
+                        self._checkpoint = None
+                    self._check_reset_since_checkpoint = self._checkpoint is not None
+                if self._count_through_resets and isinstance(
+                    last := stored.get("last_value"), (int, float)
+                ):
+                    self._last_reading = float(last)
                 _MAIN_LOGGER.warning("sensor: load - %s snapshot_date=%s loaded %s window(s)", self._source_entity, self._snapshot_date, loaded)
         else:
             self._snapshot_date = today
             _MAIN_LOGGER.warning("sensor: load - %s no stored data", self._source_entity)
 
-    async def save(self) -> None:
-        """Persist snapshots to storage."""
+    def _data_to_save(self) -> dict[str, Any]:
+        """Build the stored payload (called by Store when a write actually happens)."""
+        self._save_pending = False
         snapshots_data = {
             str(idx): {
                 "snapshot_start": s.snapshot_start,
@@ -365,15 +1032,42 @@ class WindowData:
             }
             for idx, s in self._snapshots.items()
         }
-        await self._store.async_save(
-            {"windows": snapshots_data, "snapshot_date": self._snapshot_date}
-        )
         _MAIN_LOGGER.warning("sensor: save - %s snapshot_date=%s %s window(s)", self._source_entity, self._snapshot_date, len(snapshots_data))
+        data: dict[str, Any] = {"windows": snapshots_data, "snapshot_date": self._snapshot_date}
+        if self._checkpoint is not None:
+            data["checkpoint"] = {"updated": self._checkpoint[0], "value": self._checkpoint[1]}
+        if self._count_through_resets and self._last_reading is not None:
+            data["last_value"] = self._last_reading
+        if self._resets_at_midnight:
+            data["resets_at_midnight"] = True
+        return data
+
+    def _totals_to_save(self) -> dict[str, Any]:
+        """Build the stored daily / period totals (called by Store when a write actually happens)."""
+        self._totals_save_pending = False
+        data: dict[str, Any] = {}
+        if self.daily_totals:
+            data["history"] = self.daily_totals.as_dict()
+        if periods := self.period_totals.as_dict():
+            data["periods"] = periods
+        return data
 
-    def _handle_window_start(self, window: WindowConfig, now: datetime) -> None:
-        """Snapshot at window start."""
-        local_now = self._now()
-        self._snapshot_date = local_now.date().isoformat()
+    async def save(self) -> None:
+        """Persist snapshots to storage now (cancels any pending delayed write)."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_flush(self) -> None:
+        """Write a pending delayed save immediately (on unload, before a reload reads the store)."""
+        if self._save_pending:
+            await self.save()
+        if self._totals_save_pending:
+            await self._totals_store.async_save(self._totals_to_save())
+
+    def _take_start_snapshot(self, window: WindowConfig, now: datetime) -> bool:
+        """Record the start snapshot for a window; return True if one was taken."""
+        ctx = self.evaluation_context()
+        local_now = ctx.now
+        self._snapshot_date = ctx.date
         _MAIN_LOGGER.debug(
             "sensor: window '%s' start fired at callback_now=%s local_now=%s tz=%s",
             window.name,
@@ -381,54 +1075,490 @@ class WindowData:
             local_now.isoformat(),
             getattr(self._tz, "key", str(self._tz)),
         )
-        value = self.get_source_value()
-        if value is not None:
-            self._snapshots[window.index] = WindowSnapshots(
-                snapshot_start=value,
-                snapshot_end=None,
-            )
-            _MAIN_LOGGER.warning("sensor: window '%s' start - %.3f kWh", window.name, value)
-            self._schedule_save()
+        value = self._boundary_value(window, window.start_min, _BOUNDARY_START)
+        if value is None:
+            return False
+        self._snapshots[window.index] = WindowSnapshots(
+            snapshot_start=value,
+            snapshot_end=None,
+        )
+        _MAIN_LOGGER.warning("sensor: window '%s' start - %.3f kWh", window.name, value)
+        return True
+
+    def _take_end_snapshot(self, window: WindowConfig, now: datetime) -> bool:
+        """Record the end snapshot for a window; return True if one was taken."""
+        value = self._boundary_value(window, window.end_min, _BOUNDARY_END)
+        if value is None:
+            return False
+        snap = self._snapshots.get(window.index) or WindowSnapshots(None, None)
+        self._set_snapshots(
+            window.index,
+            WindowSnapshots(snapshot_start=snap.snapshot_start, snapshot_end=value),
+        )
+        _MAIN_LOGGER.warning("sensor: window '%s' end - %.3f kWh", window.name, value)
+        return True
+
+    def _set_snapshots(self, window_index: int, snap: WindowSnapshots) -> None:
+        """Replace a window's snapshots; a change to a finished window updates its daily total."""
+        old = self._snapshots.get(window_index) or WindowSnapshots(None, None)
+        self._snapshots[window_index] = snap
+        window = self._windows.get(window_index)
+        if window is None or not self._snapshot_date or (total := _finished_total(snap)) is None:
+            return
+        day = date.fromisoformat(self._snapshot_date)
+        delta = total - (_finished_total(old) or 0.0)
+        self.daily_totals.add(window.name, day, delta)
+        self.period_totals.add(window.name, day, delta)
+        self._schedule_totals_save()
+        if self._export_statistics:
+            self._export_window(window, snap, total, delta if _finished_total(old) is not None else None)
+
+    def _export_window(
+        self, window: WindowConfig, snap: WindowSnapshots, total: float, delta: float | None
+    ) -> None:
+        """Queue a finished window's hourly sums (or a later correction) for export.
+
+        The rise between the start snapshot, today's hour marks inside the window and
+        the end snapshot is split per UTC hour and scaled to the window total (which
+        may include energy carried over a meter reset). A correction of an already
+        exported window (delta) goes to its last hour.
+        """
+        start = self._boundary_time(window.start_min).timestamp()
+        end = self._boundary_time(window.end_min).timestamp()
+        if delta is not None:
+            hourly = {(end - 1) - (end - 1) % _HOUR: delta} if delta else {}
+        else:
+            points = [(start, snap.snapshot_start)]
+            points.extend(mark for mark in self._hour_marks if start < mark[0] < end)
+            points.append((end, snap.snapshot_end))
+            hourly = window_hourly(points, total)
+        if not hourly or self._statistics is None:
+            return
+        self._statistics.async_add(*self._statistic_of(window.name), hourly)
+
+    def _statistic_of(self, window_name: str) -> tuple[str, str]:
+        """(statistic_id, name) of a window's exported statistic."""
+        source_slug = source_slug_from_entity_id(self._source_entity, "source")
+        source_name = self.entities.source_name if self.entities is not None else source_slug
+        return _statistic_id(source_slug, window_name), f"{source_name} {window_name}"
+
+    async def async_recalculate_day(self, day: date) -> bool:
+        """Recompute the window totals of a past day from the source's recorder history.
+
+        Replaces the day's daily totals (and week / month to date sums when the day is
+        in the current week or month) and, with statistics export on, its statistics.
+        Returns False when the recorder has nothing for the day.
+        """
+        if self._history is None:
+            return False
+        day_start = datetime.combine(day, time(0), tzinfo=self._tz)
+        day_end = datetime.combine(day + timedelta(days=1), time(0), tzinfo=self._tz)
+        readings = await self._history.async_day_readings(self._source_entity, day_start, day_end)
+        if not readings:
+            return False
+        reset_ratio = _RESET_DROP_RATIO if self._count_through_resets else None
+        totals: dict[str, float] = {}
+        hourly: dict[str, dict[float, float]] = {}
+        for window in self._windows:
+            start = (day_start + timedelta(minutes=window.start_min)).timestamp()
+            end = (day_start + timedelta(minutes=window.end_min)).timestamp()
+            if (total := window_total(readings, start, end, reset_ratio)) is None:
+                continue
+            totals[window.name] = totals.get(window.name, 0.0) + total
+            if self._export_statistics:
+                points = [(start, value_at(readings, start))]
+                points.extend(r for r in readings if start < r[0] < end)
+                points.append((end, value_at(readings, end)))
+                window_hours = hourly.setdefault(window.name, {})
+                for hour, value in window_hourly(points, total).items():
+                    window_hours[hour] = window_hours.get(hour, 0.0) + value
+        if not totals:
+            return False
+        today = date.fromisoformat(self.evaluation_context().date)
+        for name, total in totals.items():
+            delta = total - (self.daily_totals.total(name, day) or 0.0)
+            self.daily_totals.add(name, day, delta)
+            self.period_totals.adjust(name, day, today, delta)
+        if self._export_statistics and self._statistics is not None:
+            for name, window_hours in hourly.items():
+                self._statistics.async_replace(
+                    *self._statistic_of(name), day_start.timestamp(), day_end.timestamp(), window_hours
+                )
+        _MAIN_LOGGER.debug(
+            "sensor: %s recalculated %s - %s window(s)", self._source_entity, day, len(totals)
+        )
+        return True
+
+    @callback
+    def async_recalculated(self) -> None:
+        """Save and refresh sensors after a run of async_recalculate_day."""
+        self._schedule_save()
+        self._schedule_totals_save()
         self._notify_update()
 
+    def daily_summary(self, window_name: str) -> dict[str, float | None] | None:
+        """Yesterday / last 7 / last 30 days and week / month to date totals of a window.
+
+        None without any recorded window end.
+        """
+        today = date.fromisoformat(self.evaluation_context().date)
+        daily = self.daily_totals.summary(window_name, today)
+        periods = self.period_totals.summary(window_name, today)
+        if daily is None or periods is None:
+            return daily or periods
+        return {**daily, **periods}
+
+    @callback
+    def _handle_window_start(self, window: WindowConfig, now: datetime) -> None:
+        """Snapshot at window start."""
+        self._handle_boundaries([window], [], now)
+
+    @callback
     def _handle_window_end(self, window: WindowConfig, now: datetime) -> None:
         """Snapshot at window end."""
-        value = self.get_source_value()
-        if value is not None:
-            snap = self._snapshots.get(window.index) or WindowSnapshots(None, None)
-            self._snapshots[window.index] = WindowSnapshots(
-                snapshot_start=snap.snapshot_start,
-                snapshot_end=value,
-            )
-            _MAIN_LOGGER.warning("sensor: window '%s' end - %.3f kWh", window.name, value)
-            self._schedule_save()
-        self._notify_update()
+        self._handle_boundaries([], [window], now)
 
+    @callback
+    def _handle_boundaries(
+        self,
+        starts: list[WindowConfig],
+        ends: list[WindowConfig],
+        now: datetime,
+    ) -> None:
+        """Snapshot every window starting or ending at this instant, then save and notify once.
+
+        Ends are handled before starts so back-to-back windows (10:00-11:00, 11:00-12:00)
+        close the first window before opening the second.
+        """
+        with self.evaluation_pass(boundary=True):
+            changed = False
+            for window in ends:
+                changed = self._take_end_snapshot(window, now) or changed
+            for window in starts:
+                changed = self._take_start_snapshot(window, now) or changed
+            if changed:
+                self._schedule_save()
+            self._notify_update()
+
+    @callback
     def _handle_midnight(self, now: datetime) -> None:
         """Reset snapshots at midnight (day always starts at 00:00 local)."""
-        local_now = self._now()
+        with self.evaluation_pass(boundary=True) as ctx:
+            _MAIN_LOGGER.debug(
+                "sensor: midnight fired at callback_now=%s local_now=%s tz=%s",
+                now.isoformat() if now.tzinfo else str(now) + " (naive)",
+                ctx.now.isoformat(),
+                getattr(self._tz, "key", str(self._tz)),
+            )
+            _MAIN_LOGGER.warning("sensor: _handle_midnight - resetting snapshots for %s", self._source_entity)
+            self._snapshots = {
+                w.index: WindowSnapshots(snapshot_start=None, snapshot_end=None)
+                for w in self._windows
+            }
+            self._pending_snapshots = []
+            self._recovering = set()
+            self._checkpoint = None
+            self._hour_marks = []
+            self._snapshot_date = ctx.date
+            self.period_totals.roll(date.fromisoformat(ctx.date))
+            self._schedule_save()
+            self._schedule_totals_save()
+            self._notify_update()
+
+    def _schedule_save(self) -> None:
+        """Coalesce snapshot writes: one Store write per burst, save_delay seconds after the first.
+
+        Store flushes pending delayed writes on EVENT_HOMEASSISTANT_FINAL_WRITE, and
+        async_flush() writes them on unload, so a burst is never lost on shutdown.
+        """
+        self._save_pending = True
+        self._store.async_delay_save(self._data_to_save, self._save_delay)
         _MAIN_LOGGER.debug(
-            "sensor: midnight fired at callback_now=%s local_now=%s tz=%s",
-            now.isoformat() if now.tzinfo else str(now) + " (naive)",
-            local_now.isoformat(),
-            getattr(self._tz, "key", str(self._tz)),
+            "sensor: save scheduled - %s in %ss, %s window(s)",
+            self._source_entity,
+            self._save_delay,
+            len(self._snapshots),
         )
-        _MAIN_LOGGER.warning("sensor: _handle_midnight - resetting snapshots for %s", self._source_entity)
-        self._snapshots = {
-            w.index: WindowSnapshots(snapshot_start=None, snapshot_end=None)
-            for w in self._windows
-        }
-        self._snapshot_date = local_now.date().isoformat()
-        self._schedule_save()
-        self._notify_update()
 
-    def _schedule_save(self) -> None:
-        """Schedule save() on the event loop (time handlers may run from a thread)."""
-        self.hass.loop.call_soon_threadsafe(
-            lambda: self.hass.async_create_task(self.save())
+    def _schedule_totals_save(self) -> None:
+        """Coalesce writes of the daily / period totals like _schedule_save does for snapshots."""
+        self._totals_save_pending = True
+        self._totals_store.async_delay_save(self._totals_to_save, self._save_delay)
+
+
+class BoundaryScheduler:
+    """Domain-wide scheduler for window start/end and midnight boundaries.
+
+    Keeps a sorted table of boundary times (seconds since local midnight) for every
+    registered WindowData and arms a single async_track_point_in_time timer for the
+    next one. All boundaries sharing a time are handled in one batch, grouped per
+    WindowData so each source saves and notifies its sensors once.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._datas: list[WindowData] = []
+        self._slots: list[int] = []
+        self._by_slot: dict[int, list[tuple[str, WindowData, WindowConfig | None]]] = {}
+        self._next_fire: datetime | None = None
+        # (local day, slot) of the armed timer; re-arming continues from it, not from the
+        # fire time, which differs from the slot's wall time inside a DST gap
+        self._next_slot: tuple[date, int] | None = None
+        self._unsub_timer: Callable[[], None] | None = None
+
+    @property
+    def _tz(self) -> tzinfo:
+        """Timezone of the registered sources (all use the HA config time_zone)."""
+        return self._datas[0]._tz
+
+    @callback
+    def async_add(self, data: WindowData) -> Callable[[], None]:
+        """Register a source's windows; return a callable that unregisters them."""
+        self._datas.append(data)
+        self._rebuild()
+
+        @callback
+        def _remove() -> None:
+            if data in self._datas:
+                self._datas.remove(data)
+                self._rebuild()
+
+        return _remove
+
+    @callback
+    def async_refresh(self) -> None:
+        """Re-arm for the current boundaries (e.g. after the time zone changed)."""
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Rebuild the boundary table and re-arm the timer."""
+        by_slot: dict[int, list[tuple[str, WindowData, WindowConfig | None]]] = {}
+        for data in self._datas:
+            for w in data._windows:
+                start = w.start_min * 60 or _MIDNIGHT_SECOND
+                by_slot.setdefault(start, []).append((_BOUNDARY_START, data, w))
+                by_slot.setdefault(w.end_min * 60, []).append((_BOUNDARY_END, data, w))
+            by_slot.setdefault(_MIDNIGHT_SECOND, []).append((_BOUNDARY_MIDNIGHT, data, None))
+        self._by_slot = by_slot
+        self._slots = sorted(by_slot)
+        self._next_fire = None
+        self._next_slot = None
+        if not self._datas:
+            self._cancel_timer()
+            return
+        # Timers run on the real clock, so arm from utcnow rather than the local "now".
+        self._arm(dt_util.utcnow())
+
+    def _cancel_timer(self) -> None:
+        """Cancel the pending boundary timer, if any."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    def _slot_after(self, day: date, second_of_day: int) -> tuple[date, int] | None:
+        """(local day, slot) of the first boundary strictly after second_of_day on day."""
+        if not self._slots:
+            return None
+        i = bisect_right(self._slots, second_of_day)
+        if i == len(self._slots):
+            i = 0
+            day += timedelta(days=1)
+        return day, self._slots[i]
+
+    def _slot_time(self, day: date, slot: int) -> datetime:
+        """Local datetime of a slot, normalized through UTC.
+
+        A wall time inside a spring-forward gap does not exist; it maps to the instant
+        the same distance past the gap (02:30 becomes 03:30).
+        """
+        local = datetime.combine(
+            day, time(slot // 3600, slot // 60 % 60, slot % 60), tzinfo=self._tz
+        )
+        return dt_util.as_utc(local).astimezone(self._tz)
+
+    def _arm(self, after: datetime) -> None:
+        """Cancel any pending timer and arm one for the next boundary after `after`."""
+        local_dt = after.astimezone(self._tz)
+        second_of_day = local_dt.hour * 3600 + local_dt.minute * 60 + local_dt.second
+        self._arm_slot(self._slot_after(local_dt.date(), second_of_day))
+
+    def _arm_slot(self, next_slot: tuple[date, int] | None) -> None:
+        """Cancel any pending timer and arm one for next_slot (a slot already past fires now)."""
+        self._cancel_timer()
+        self._next_slot = next_slot
+        self._next_fire = None if next_slot is None else self._slot_time(*next_slot)
+        if self._next_fire is None:
+            return
+        self._unsub_timer = async_track_point_in_time(
+            self.hass, self._handle_timer, self._next_fire
+        )
+
+    @callback
+    def _handle_timer(self, now: datetime) -> None:
+        """Fire every boundary due at the armed slot, then arm the next one."""
+        self._unsub_timer = None
+        fired = self._next_fire
+        if fired is None or self._next_slot is None:
+            return
+        day, slot = self._next_slot
+        starts: dict[WindowData, list[WindowConfig]] = {}
+        ends: dict[WindowData, list[WindowConfig]] = {}
+        midnight: list[WindowData] = []
+        for kind, data, window in self._by_slot.get(slot, []):
+            if kind == _BOUNDARY_START:
+                starts.setdefault(data, []).append(window)
+            elif kind == _BOUNDARY_END:
+                ends.setdefault(data, []).append(window)
+            else:
+                midnight.append(data)
+        _MAIN_LOGGER.debug(
+            "sensor: boundary %s fired - %s start(s), %s end(s), %s midnight reset(s)",
+            fired.isoformat(),
+            sum(len(w) for w in starts.values()),
+            sum(len(w) for w in ends.values()),
+            len(midnight),
+        )
+        # Reset first: 00:00 window starts share the midnight slot and must survive it
+        for data in midnight:
+            data._handle_midnight(now)
+        for data in dict.fromkeys([*ends, *starts]):
+            data._handle_boundaries(starts.get(data, []), ends.get(data, []), now)
+        self._arm_slot(self._slot_after(day, slot))
+
+
+class TimeZoneCache:
+    """HA config time zone, resolved once and shared by every WindowData.
+
+    Resolving a zone can hit the disk, so it runs in the executor, once per process
+    rather than once per source. A core config change of time_zone re-resolves it
+    and pushes the new zone to all running sources and the boundary scheduler.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._tz: tzinfo | None = None
+        self._tz_str: str | None = None
+        self._resolving: asyncio.Task[None] | None = None
+        hass.bus.async_listen(EVENT_CORE_CONFIG_UPDATE, self._handle_core_config_update)
+
+    async def async_get(self) -> tzinfo:
+        """Return the cached zone; concurrent first callers share one executor job."""
+        if self._tz is None:
+            if self._resolving is None:
+                self._resolving = self.hass.async_create_task(self._async_resolve())
+            await self._resolving
+        assert self._tz is not None
+        return self._tz
+
+    async def _async_resolve(self) -> None:
+        tz_str = getattr(self.hass.config, "time_zone", None) or "UTC"
+        tz = await self.hass.async_add_executor_job(dt_util.get_time_zone, tz_str)
+        self._tz = tz or dt_util.get_default_time_zone()
+        self._tz_str = tz_str
+        self._resolving = None
+        _MAIN_LOGGER.debug("sensor: time zone resolved - %s", tz_str)
+
+    @callback
+    def _handle_core_config_update(self, event: Event) -> None:
+        """Invalidate on a time_zone change and update running sources without a reload."""
+        if self._tz_str is None or self.hass.config.time_zone == self._tz_str:
+            return
+        self._tz = None
+        self.hass.async_create_task(self._async_apply_time_zone())
+
+    async def _async_apply_time_zone(self) -> None:
+        tz = await self.async_get()
+        _MAIN_LOGGER.warning("sensor: time zone changed to %s, updating windows", self._tz_str)
+        for entry_data in self.hass.data.get(DOMAIN, {}).values():
+            for data in entry_data.values():
+                data.set_time_zone(tz)
+        if (scheduler := self.hass.data.get(DATA_SCHEDULER)) is not None:
+            scheduler.async_refresh()
+
+
+class OrphanCleanup:
+    """Domain-wide, deferred removal of registry entries for windows that no longer exist.
+
+    Entries queue their orphans during setup; they are removed in one batch once Home
+    Assistant has started (at once if it already has), so boot does not also write
+    entity registry changes. A later setup of the same entry replaces its queue.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._pending: dict[str, dict[str, str]] = {}
+        self._unsub_started: Callable[[], None] | None = None
+
+    @callback
+    def async_schedule(self, entry_id: str, orphans: dict[str, str]) -> Callable[[], None]:
+        """Queue an entry's orphans (entity_id -> unique_id); return a callable that drops them."""
+        self._pending.pop(entry_id, None)
+        if orphans:
+            self._pending[entry_id] = orphans
+            if self._unsub_started is None:
+                self._unsub_started = async_at_started(self.hass, self._async_flush)
+
+        @callback
+        def _cancel() -> None:
+            if self._pending.get(entry_id) is orphans:
+                del self._pending[entry_id]
+
+        return _cancel
+
+    @callback
+    def _async_flush(self, hass: HomeAssistant) -> None:
+        """Remove every queued orphan that is still registered for its entry."""
+        self._unsub_started = None
+        pending, self._pending = self._pending, {}
+        registry = er.async_get(hass)
+        removed = 0
+        for entry_id, orphans in pending.items():
+            for entity_id, unique_id in orphans.items():
+                entity_entry = registry.async_get(entity_id)
+                if (
+                    entity_entry is None
+                    or entity_entry.unique_id != unique_id
+                    or entity_entry.config_entry_id != entry_id
+                ):
+                    continue
+                _MAIN_LOGGER.warning(
+                    "sensor: removing orphaned entity %s (unique_id: %s)",
+                    entity_id,
+                    unique_id,
+                )
+                registry.async_remove(entity_id)
+                removed += 1
+        _MAIN_LOGGER.debug(
+            "sensor: orphan cleanup - %s entry(ies), %s entity(ies) removed",
+            len(pending),
+            removed,
         )
 
 
+@callback
+def _async_get_orphan_cleanup(hass: HomeAssistant) -> OrphanCleanup:
+    """Return the shared orphan cleanup, creating it on first use."""
+    if (cleanup := hass.data.get(DATA_ORPHANS)) is None:
+        cleanup = hass.data[DATA_ORPHANS] = OrphanCleanup(hass)
+    return cleanup
+
+
+@callback
+def _async_get_time_zone_cache(hass: HomeAssistant) -> TimeZoneCache:
+    """Return the shared time zone cache, creating it on first use."""
+    if (cache := hass.data.get(DATA_TIME_ZONE)) is None:
+        cache = hass.data[DATA_TIME_ZONE] = TimeZoneCache(hass)
+    return cache
+
+
+@callback
+def _async_get_scheduler(hass: HomeAssistant) -> BoundaryScheduler:
+    """Return the shared boundary scheduler, creating it on first use."""
+    if (scheduler := hass.data.get(DATA_SCHEDULER)) is None:
+        scheduler = hass.data[DATA_SCHEDULER] = BoundaryScheduler(hass)
+    return scheduler
+
+
 def _get_sources_from_config(config: dict[str, Any]) -> list[dict[str, Any]]:
     """Return the single source from config (one entry = one source)."""
     raw = config.get(CONF_SOURCES)
@@ -437,6 +1567,217 @@ def _get_sources_from_config(config: dict[str, Any]) -> list[dict[str, Any]]:
     return []
 
 
+@dataclass
+class SourceEntities:
+    """Window sensors of one source and what is needed to add more after setup."""
+
+    async_add_entities: AddEntitiesCallback
+    source_name: str
+    source_index: int
+    cost_sensors: bool
+    sensors: dict[str, WindowEnergySensor] = field(default_factory=dict)
+
+
+def _group_by_name(windows: WindowTable) -> OrderedDict[str, list[WindowConfig]]:
+    """Group time ranges by window name: one sensor per name, value = sum over its ranges."""
+    by_name: OrderedDict[str, list[WindowConfig]] = OrderedDict()
+    for w in windows:
+        by_name.setdefault(w.name, []).append(w)
+    return by_name
+
+
+class EntryRegistryIndex:
+    """One pass over an entry's window sensors in the entity registry.
+
+    Built once per setup or reconfigure; window-name lookups and orphan detection
+    then work on this snapshot instead of walking the registry again.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._entry_id = entry_id
+        registry = er.async_get(hass)
+        self._entries: dict[str, er.RegistryEntry] = {
+            entity_entry.unique_id: entity_entry
+            for entity_entry in registry.entities.get_entries_for_config_entry_id(entry_id)
+            if entity_entry.domain == "sensor" and entity_entry.platform == DOMAIN
+        }
+
+    def unique_ids_by_name(self, slug: str) -> dict[str, str]:
+        """Registry unique_ids of a source's window sensors, keyed by window name.
+
+        Preserves existing unique_ids by window name so entity_ids don't reshuffle
+        when window order changes (older versions used index-based unique_ids).
+        """
+        prefix = f"{self._entry_id}_{slug}_"
+        by_name: dict[str, str] = {}
+        for unique_id, entity_entry in self._entries.items():
+            if not unique_id.startswith(prefix) or unique_id.endswith(_COST_UNIQUE_ID_SUFFIX):
+                continue
+            if entity_entry.original_name:
+                key = _window_name_from_original_name(entity_entry.original_name, slug)
+                if key and key not in by_name:
+                    by_name[key] = unique_id
+        return by_name
+
+    def orphans(self, keep: set[str]) -> dict[str, str]:
+        """entity_id -> unique_id of registry entries whose unique_id is not in keep."""
+        return {
+            entity_entry.entity_id: unique_id
+            for unique_id, entity_entry in self._entries.items()
+            if unique_id not in keep
+        }
+
+
+def _create_window_sensors(
+    hass: HomeAssistant,
+    entry_id: str,
+    data: WindowData,
+    slug: str,
+    window_name: str,
+    ranges: list[WindowConfig],
+    name_index: int,
+    existing_unique_id: str | None,
+) -> list[WindowEnergySensor | WindowCostSensor]:
+    """Energy sensor for one window name, plus its cost sensor if enabled and rated."""
+    entities = data.entities
+    assert entities is not None
+    _MAIN_LOGGER.warning(
+        "sensor: async_setup_entry - creating sensor source=%r window=%r ranges=%s",
+        data._source_entity,
+        window_name,
+        len(ranges),
+    )
+    sensor = WindowEnergySensor(
+        hass=hass,
+        entry_id=entry_id,
+        config_name=entities.source_name,
+        window_name=window_name,
+        ranges=ranges,
+        data=data,
+        source_slug=slug,
+        source_index=entities.source_index,
+        name_index=name_index,
+        existing_unique_id=existing_unique_id,
+    )
+    entities.sensors[window_name] = sensor
+    created: list[WindowEnergySensor | WindowCostSensor] = [sensor]
+    if entities.cost_sensors and any(r.cost_per_kwh > 0 for r in ranges):
+        cost_sensor = WindowCostSensor(sensor, source_slug=slug)
+        sensor.set_cost_sensor(cost_sensor)
+        created.append(cost_sensor)
+    return created
+
+
+async def _async_remove_entity(hass: HomeAssistant, entity: SensorEntity) -> None:
+    """Remove a live entity and its registry entry."""
+    entity_id = entity.entity_id
+    await entity.async_remove(force_remove=True)
+    registry = er.async_get(hass)
+    if entity_id and registry.async_get(entity_id) is not None:
+        registry.async_remove(entity_id)
+
+
+async def async_reconfigure_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Apply changed options to a loaded entry in place; return False if it needs a reload.
+
+    Windows are added, removed or retimed on the live WindowData and only the affected
+    sensors are created, removed or refreshed; snapshots of untouched windows stay in
+    memory. A changed source entity or cost sensor setting still needs a reload.
+    """
+    config = {**entry.data, **entry.options}
+    if config.get("_retain_entity_unique_ids"):
+        return False
+    sources = _get_sources_from_config(config)
+    if not sources or not isinstance(sources[0], dict):
+        return False
+    source_config = sources[0]
+    source_entity = source_config.get(CONF_SOURCE_ENTITY)
+    if isinstance(source_entity, list):
+        source_entity = source_entity[0] if source_entity else None
+    if not source_entity:
+        return False
+    slug = source_slug_from_entity_id(str(source_entity), "source_0")
+    data = hass.data.get(DOMAIN, {}).get(entry.entry_id, {}).get(slug)
+    if data is None or data.entities is None or data._source_entity != str(source_entity):
+        return False
+    entities = data.entities
+    if bool(config.get(CONF_COST_SENSORS, DEFAULT_COST_SENSORS)) != entities.cost_sensors:
+        return False
+    windows, warnings_by_name = _parse_windows(source_config)
+    if not windows:
+        return False
+
+    by_name = _group_by_name(windows)
+    # Remove dropped windows first, while every sensor still matches the old table.
+    removed = [name for name in entities.sensors if name not in by_name]
+    for name in removed:
+        sensor = entities.sensors.pop(name)
+        _MAIN_LOGGER.warning("sensor: reconfigure - removing window %r", name)
+        if sensor._cost_sensor is not None:
+            await _async_remove_entity(hass, sensor._cost_sensor)
+        await _async_remove_entity(hass, sensor)
+
+    # Swap the table and re-point the remaining sensors without yielding in between.
+    entities.source_name = source_config.get(CONF_NAME) or "Window"
+    data.async_reconfigure(
+        windows,
+        warnings_by_name,
+        config.get(CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY),
+        min_delta=config.get(CONF_MIN_DELTA, DEFAULT_MIN_DELTA),
+        min_interval=config.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+        checkpoint_interval=config.get(CONF_CHECKPOINT_INTERVAL, DEFAULT_CHECKPOINT_INTERVAL),
+        count_through_resets=config.get(CONF_COUNT_THROUGH_RESETS, DEFAULT_COUNT_THROUGH_RESETS),
+        export_statistics=config.get(CONF_EXPORT_STATISTICS, DEFAULT_EXPORT_STATISTICS),
+    )
+    new_entities: list[WindowEnergySensor | WindowCostSensor] = []
+    dropped_cost_sensors: list[WindowCostSensor] = []
+    existing_unique_id_by_name: dict[str, str] | None = None
+    for name_index, (window_name, ranges) in enumerate(by_name.items()):
+        if (sensor := entities.sensors.get(window_name)) is None:
+            if existing_unique_id_by_name is None:
+                existing_unique_id_by_name = EntryRegistryIndex(
+                    hass, entry.entry_id
+                ).unique_ids_by_name(slug)
+            new_entities.extend(
+                _create_window_sensors(
+                    hass,
+                    entry.entry_id,
+                    data,
+                    slug,
+                    window_name,
+                    ranges,
+                    name_index,
+                    existing_unique_id_by_name.get(window_name),
+                )
+            )
+            continue
+        rated = entities.cost_sensors and any(r.cost_per_kwh > 0 for r in ranges)
+        if rated and sensor._cost_sensor is None:
+            cost_sensor = WindowCostSensor(sensor, source_slug=slug)
+            sensor.set_cost_sensor(cost_sensor)
+            new_entities.append(cost_sensor)
+        elif not rated and (cost_sensor := sensor._cost_sensor) is not None:
+            sensor.set_cost_sensor(None)
+            dropped_cost_sensors.append(cost_sensor)
+        sensor.set_ranges(ranges)
+        if sensor._cost_sensor is not None:
+            sensor._cost_sensor.async_set_cost(sensor._cost)
+
+    _async_get_scheduler(hass).async_refresh()
+    if new_entities:
+        entities.async_add_entities(new_entities)
+    for cost_sensor in dropped_cost_sensors:
+        await _async_remove_entity(hass, cost_sensor)
+    _MAIN_LOGGER.warning(
+        "sensor: reconfigure - entry_id=%s applied live: %s window(s), %s removed, %s new entity(ies)",
+        entry.entry_id,
+        len(by_name),
+        len(removed),
+        len(new_entities),
+    )
+    return True
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -453,7 +1794,9 @@ async def async_setup_entry(
     hass.data.setdefault(DOMAIN, {})
     entry_data: dict[str, WindowData] = {}
     hass.data[DOMAIN][entry.entry_id] = entry_data
-    all_sensors: list[WindowEnergySensor] = []
+    all_sensors: list[WindowEnergySensor | WindowCostSensor] = []
+    cost_sensors = bool(config.get(CONF_COST_SENSORS, DEFAULT_COST_SENSORS))
+    registry_index = EntryRegistryIndex(hass, entry.entry_id)
 
     for source_index, source_config in enumerate(sources):
         if not isinstance(source_config, dict):
@@ -476,68 +1819,55 @@ async def async_setup_entry(
             continue
 
         slug = source_slug_from_entity_id(source_entity, f"source_{source_index}")
-        store = Store(
-            hass,
-            STORAGE_VERSION,
-            f"{STORAGE_KEY}_{entry.entry_id}_{slug}",
-        )
-        # Preserve existing unique_ids by window name so entity_ids don't reshuffle
-        # when window order changes (older versions used index-based unique_ids).
-        registry = er.async_get(hass)
-        existing_unique_id_by_name: dict[str, str] = {}
-        for entity_entry in registry.entities.get_entries_for_config_entry_id(entry.entry_id):
-            if entity_entry.domain != "sensor" or entity_entry.platform != DOMAIN:
-                continue
-            if not entity_entry.unique_id.startswith(f"{entry.entry_id}_{slug}_"):
-                continue
-            if entity_entry.original_name:
-                key = _window_name_from_original_name(entity_entry.original_name, slug)
-                if key and key not in existing_unique_id_by_name:
-                    existing_unique_id_by_name[key] = entity_entry.unique_id
+        store = async_get_snapshot_store(hass).async_source_store(entry.entry_id, slug)
+        totals_store = async_get_totals_store(hass).async_source_store(entry.entry_id, slug)
+        existing_unique_id_by_name = registry_index.unique_ids_by_name(slug)
         # Use HA configured timezone so window start/end and "today" match the frontend
-        tz_str = getattr(hass.config, "time_zone", None) or "UTC"
-        tz = await hass.async_add_executor_job(dt_util.get_time_zone, tz_str)
-        if tz is None:
-            tz = dt_util.get_default_time_zone()
+        tz = await _async_get_time_zone_cache(hass).async_get()
         data = WindowData(
             hass=hass,
             entry_id=entry.entry_id,
             source_entity=source_entity,
             windows=windows,
             store=store,
+            totals_store=totals_store,
             tz=tz,
             config_warnings_by_name=warnings_by_name,
+            save_delay=config.get(CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY),
+            min_delta=config.get(CONF_MIN_DELTA, DEFAULT_MIN_DELTA),
+            min_interval=config.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+            history=async_get_source_history(hass),
+            checkpoint_interval=config.get(CONF_CHECKPOINT_INTERVAL, DEFAULT_CHECKPOINT_INTERVAL),
+            count_through_resets=config.get(
+                CONF_COUNT_THROUGH_RESETS, DEFAULT_COUNT_THROUGH_RESETS
+            ),
+            statistics=async_get_statistics_exporter(hass),
+            export_statistics=config.get(CONF_EXPORT_STATISTICS, DEFAULT_EXPORT_STATISTICS),
         )
         await data.load()
         entry_data[slug] = data
-
-        # Group time ranges by window name: one sensor per name, value = sum over its ranges
-        by_name: OrderedDict[str, list[WindowConfig]] = OrderedDict()
-        for w in windows:
-            by_name.setdefault(w.name, []).append(w)
-
-        for name_index, (window_name, ranges) in enumerate(by_name.items()):
-            _MAIN_LOGGER.warning(
-                "sensor: async_setup_entry - creating sensor source=%r window=%r ranges=%s",
-                source_entity,
-                window_name,
-                len(ranges),
-            )
-            sensor = WindowEnergySensor(
-                hass=hass,
-                entry_id=entry.entry_id,
-                config_name=source_name,
-                window_name=window_name,
-                ranges=ranges,
-                data=data,
-                all_windows=windows,
-                is_first=(name_index == 0),
-                source_slug=slug,
-                source_index=source_index,
-                name_index=name_index,
-                existing_unique_id=existing_unique_id_by_name.get(window_name),
+        entry.async_on_unload(data.async_flush)
+        entry.async_on_unload(_async_get_scheduler(hass).async_add(data))
+
+        data.entities = SourceEntities(
+            async_add_entities=async_add_entities,
+            source_name=source_name,
+            source_index=source_index,
+            cost_sensors=cost_sensors,
+        )
+        for name_index, (window_name, ranges) in enumerate(_group_by_name(windows).items()):
+            all_sensors.extend(
+                _create_window_sensors(
+                    hass,
+                    entry.entry_id,
+                    data,
+                    slug,
+                    window_name,
+                    ranges,
+                    name_index,
+                    existing_unique_id_by_name.get(window_name),
+                )
             )
-            all_sensors.append(sensor)
 
     # Remove entities for windows that no longer exist (or old source after change)
     # unless they are in the retain list (user chose not to remove when changing source).
@@ -546,22 +1876,8 @@ async def async_setup_entry(
         new_options = {k: v for k, v in (entry.options or {}).items() if k != "_retain_entity_unique_ids"}
         hass.config_entries.async_update_entry(entry, options=new_options or None)
     current_unique_ids = {sensor.unique_id for sensor in all_sensors}
-    registry = er.async_get(hass)
-    for entity_entry in registry.entities.get_entries_for_config_entry_id(
-        entry.entry_id
-    ):
-        if (
-            entity_entry.domain == "sensor"
-            and entity_entry.platform == DOMAIN
-            and entity_entry.unique_id not in current_unique_ids
-            and entity_entry.unique_id not in retain_ids
-        ):
-            _MAIN_LOGGER.warning(
-                "sensor: removing orphaned entity %s (unique_id: %s)",
-                entity_entry.entity_id,
-                entity_entry.unique_id,
-            )
-            registry.async_remove(entity_entry.entity_id)
+    orphans = registry_index.orphans(current_unique_ids | retain_ids)
+    entry.async_on_unload(_async_get_orphan_cleanup(hass).async_schedule(entry.entry_id, orphans))
 
     _MAIN_LOGGER.warning(
         "sensor: async_setup_entry - adding %s entities: %s",
@@ -578,7 +1894,7 @@ async def async_setup_entry(
         entry.entry_id,
         len(all_sensors),
     )
-    async_add_entities(all_sensors, update_before_add=True)
+    async_add_entities(all_sensors)
 
 
 class WindowEnergySensor(RestoreSensor):
@@ -588,8 +1904,9 @@ class WindowEnergySensor(RestoreSensor):
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
     _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
     _attr_icon = "mdi:clock-outline"
-    _attr_should_poll = True
-    _attr_scan_interval = timedelta(seconds=30)
+    # Push-only: values change on source state changes, window start/end and midnight,
+    # all of which call _handle_data_update via WindowData.
+    _attr_should_poll = False
 
     def __init__(
         self,
@@ -599,8 +1916,6 @@ class WindowEnergySensor(RestoreSensor):
         window_name: str,
         ranges: list[WindowConfig],
         data: WindowData,
-        all_windows: list[WindowConfig],
-        is_first: bool = False,
         source_slug: str | None = None,
         source_index: int = 0,
         name_index: int = 0,
@@ -611,8 +1926,6 @@ class WindowEnergySensor(RestoreSensor):
         self._window_name = window_name
         self._ranges = ranges
         self._data = data
-        self._all_windows = all_windows
-        self._is_first = is_first
         self._attr_name = f"{source_slug} {window_name}" if source_slug else window_name
         if source_slug:
             self._attr_unique_id = existing_unique_id or _stable_window_unique_id(
@@ -620,8 +1933,24 @@ class WindowEnergySensor(RestoreSensor):
             )
         else:
             self._attr_unique_id = existing_unique_id or f"{entry_id}_{name_index}"
-        self._last_source_value: float | None = None
-        self._last_status: str | None = None
+        self._last_written: tuple[Any, dict[str, Any] | None] | None = None
+        self._last_written_value: Any = None
+        self._last_written_at = 0.0
+        self._unsub_trailing: Callable[[], None] | None = None
+        self._cost: float | None = None
+        self._cost_sensor: WindowCostSensor | None = None
+
+    def set_cost_sensor(self, cost_sensor: WindowCostSensor | None) -> None:
+        """Publish cost through a separate sensor instead of the cost attribute."""
+        self._cost_sensor = cost_sensor
+
+    @callback
+    def set_ranges(self, ranges: list[WindowConfig]) -> None:
+        """Use new time ranges for this window (options changed) and refresh."""
+        self._ranges = ranges
+        self._update_value()
+        if self.entity_id:
+            self.async_write_if_changed(force=True)
 
     async def async_added_to_hass(self) -> None:
         """Restore state and register listeners."""
@@ -634,85 +1963,88 @@ class WindowEnergySensor(RestoreSensor):
         if (last := await self.async_get_last_sensor_data()) is not None:
             self._attr_native_value = last.native_value
 
-        self._data.add_update_callback(self._handle_data_update)
-
-        self.async_on_remove(
-            async_track_state_change_event(
-                self.hass,
-                [self._data._source_entity],
-                lambda e: self._handle_data_update(),
-            )
-        )
-
-        if self._is_first:
-            unsubs = []
-            for w in self._all_windows:
-                unsubs.append(
-                    async_track_time_change(
-                        self.hass,
-                        lambda t, window=w: self._data._handle_window_start(window, t),
-                        hour=w.start_h,
-                        minute=w.start_m,
-                        second=0,
-                    )
-                )
-                unsubs.append(
-                    async_track_time_change(
-                        self.hass,
-                        lambda t, window=w: self._data._handle_window_end(window, t),
-                        hour=w.end_h,
-                        minute=w.end_m,
-                        second=0,
-                    )
-                )
-            unsubs.append(
-                async_track_time_change(
-                    self.hass,
-                    self._data._handle_midnight,
-                    hour=0,
-                    minute=0,
-                    second=2,
-                )
-            )
-            for unsub in unsubs:
-                self.async_on_remove(unsub)
+        # One shared source listener per WindowData; this sensor only registers for fan-out.
+        self.async_on_remove(self._data.add_update_callback(self._handle_data_update))
+        self.async_on_remove(lambda: self._data.writer.async_discard(self))
+        self.async_on_remove(self._cancel_trailing_write)
 
         self._update_value()
         if self.entity_id:
-            self.async_write_ha_state()
-
-    async def async_update(self) -> None:
-        """Poll source and refresh displayed value; write if value, status, or source changed."""
-        old_value = self._attr_native_value
-        old_status = self._last_status
-        old_source = self._last_source_value
-        self._update_value()
-        value_or_status_changed = old_value != self._attr_native_value or old_status != self._last_status
-        source_changed = old_source != self._last_source_value
-        if self.entity_id and (value_or_status_changed or source_changed):
-            self.async_write_ha_state()
+            self.async_write_if_changed(force=True)
 
     @callback
     def _handle_data_update(self) -> None:
-        """Update value when source entity state or snapshot data changes; write if value, status, or source changed."""
-        old_value = self._attr_native_value
-        old_status = self._last_status
-        old_source = self._last_source_value
+        """Update value when source entity state or snapshot data changes; queue a batched write."""
         self._update_value()
-        value_or_status_changed = old_value != self._attr_native_value or old_status != self._last_status
-        source_changed = old_source != self._last_source_value
-        if self.entity_id and (value_or_status_changed or source_changed):
-            if value_or_status_changed:
-                _MAIN_LOGGER.debug(
-                    "sensor: state updated - %r (value or status changed)",
-                    self._window_name,
+        if self.entity_id:
+            # Source listener and boundary timers are all @callback, so we are on the event loop
+            self._data.writer.async_schedule(
+                self, force=self._data.evaluation_context().boundary
+            )
+
+    @callback
+    def async_write_if_changed(self, force: bool = False) -> bool:
+        """Write state unless state and attributes equal the last write; return True if written.
+
+        Unless forced, a value-only change is held back while it is smaller than the
+        entry's min_delta or sooner than min_interval after the last write.
+        """
+        rendered = (self.state, self.extra_state_attributes)
+        if rendered == self._last_written:
+            return False
+        if not force and self._last_written is not None and not self._is_significant(rendered):
+            return False
+        self._cancel_trailing_write()
+        self._last_written = rendered
+        self._last_written_value = self._attr_native_value
+        self._last_written_at = self.hass.loop.time()
+        self.async_write_ha_state()
+        if self._cost_sensor is not None:
+            self._cost_sensor.async_set_cost(self._cost)
+        return True
+
+    def _is_significant(self, rendered: tuple[Any, dict[str, Any] | None]) -> bool:
+        """True if a write now passes the entry's change threshold and minimum interval."""
+        if self._last_written is None or _without_cost(rendered[1]) != _without_cost(
+            self._last_written[1]
+        ):
+            return True
+        new, old = self._attr_native_value, self._last_written_value
+        if new is None or old is None:
+            return True
+        if abs(float(new) - float(old)) < self._data._min_delta:
+            return False
+        remaining = self._data._min_interval - (self.hass.loop.time() - self._last_written_at)
+        if remaining > 0:
+            # Trailing edge: write the held-back value once the interval has passed
+            if self._unsub_trailing is None:
+                self._unsub_trailing = async_call_later(
+                    self.hass, remaining, self._handle_trailing_write
                 )
-            # Must run on event loop; callback can be invoked from another thread (e.g. time_change)
-            self.hass.add_job(self.async_write_ha_state)
+            return False
+        return True
+
+    @callback
+    def _handle_trailing_write(self, _now: datetime) -> None:
+        """Minimum interval passed: write the latest held-back value."""
+        self._unsub_trailing = None
+        self._data.writer.async_schedule(self, force=True)
+
+    def _cancel_trailing_write(self) -> None:
+        """Cancel a pending trailing write, if any."""
+        if self._unsub_trailing is not None:
+            self._unsub_trailing()
+            self._unsub_trailing = None
 
     def _update_value(self) -> None:
+        """Recompute value and attributes; all ranges read one clock snapshot."""
+        with self._data.evaluation_pass():
+            self._update_value_in_pass()
+
+    def _update_value_in_pass(self) -> None:
         total_value: float | None = None
         combined_status = "before_window"
+        frozen = True
         total_cost = 0.0
         range_attrs: list[dict[str, str]] = []
         rates: list[float] = []
@@ -743,6 +2075,8 @@ class WindowEnergySensor(RestoreSensor):
                 "start": _time_str(r.start_h, r.start_m),
                 "end": _time_str(r.end_h, r.end_m),
             })
+            if status not in _FROZEN_STATUSES:
+                frozen = False
             if status.startswith("during_window"):
                 combined_status = status
             elif status.startswith("after_window") and not combined_status.startswith("during_window"):
@@ -756,12 +2090,74 @@ class WindowEnergySensor(RestoreSensor):
         }
         if (cw := self._data._config_warnings_by_name.get(self._window_name)):
             attrs["config_warnings"] = list(cw)
+        if (daily := self._data.daily_summary(self._window_name)) is not None:
+            attrs.update(daily)
         if rates:
-            # Always expose cost when rate is configured so automations can track a running balance.
-            attrs[ATTR_COST] = round(total_cost, 2)
+            if self._cost_sensor is not None:
+                # Cost changes on every source update; keep it off the recorded attributes.
+                # The cost sensor is written together with this sensor's state.
+                self._cost = round(total_cost, 2) if total_value is not None else None
+            else:
+                # Always expose cost when rate is configured so automations can track a running balance.
+                attrs[ATTR_COST] = round(total_cost, 2)
             uniq_rates = sorted({round(float(x), 6) for x in rates})
             attrs["cost_per_kwh"] = uniq_rates[0] if len(uniq_rates) == 1 else uniq_rates
         self._attr_extra_state_attributes = attrs
-        self._last_source_value = self._data.get_source_value()
-        self._last_status = combined_status
+        self._data.set_sleeping(self._handle_data_update, frozen)
+
+
+class WindowCostSensor(SensorEntity):
+    """Running cost of a window (energy x cost per kWh), fed by its energy sensor.
+
+    The cost restarts at 0 every midnight, so last_reset is local midnight of the
+    snapshot date (MONETARY does not allow TOTAL_INCREASING).
+    """
+
+    _attr_device_class = SensorDeviceClass.MONETARY
+    _attr_state_class = SensorStateClass.TOTAL
+    _attr_icon = "mdi:cash"
+    _attr_should_poll = False
 
+    def __init__(self, energy_sensor: WindowEnergySensor, source_slug: str | None = None) -> None:
+        self._window_name = energy_sensor._window_name
+        self._attr_name = (
+            f"{source_slug} {self._window_name} cost" if source_slug else f"{self._window_name} cost"
+        )
+        self._attr_unique_id = f"{energy_sensor.unique_id}{_COST_UNIQUE_ID_SUFFIX}"
+        self._data = energy_sensor._data
+        self._attr_extra_state_attributes = {
+            ATTR_SOURCE_ENTITY: energy_sensor._data._source_entity,
+        }
+        self._added = False
+
+    @property
+    def native_unit_of_measurement(self) -> str | None:
+        """Currency configured in Home Assistant."""
+        return self.hass.config.currency if self.hass else None
+
+    async def async_added_to_hass(self) -> None:
+        """Take the window name as friendly name (entity_id already includes the source)."""
+        await super().async_added_to_hass()
+        self._attr_name = f"{self._window_name} cost"
+        self._attr_last_reset = self._period_start()
+        self._added = True
+
+    def _period_start(self) -> datetime:
+        """Local midnight of the day the cost is counted for."""
+        day = self._data._snapshot_date or self._data.evaluation_context().date
+        return datetime.combine(date.fromisoformat(day), time(0), tzinfo=self._data._tz)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop writing state once removed."""
+        self._added = False
+
+    @callback
+    def async_set_cost(self, cost: float | None) -> None:
+        """Set the cost (called when the energy sensor writes); write state when it changed."""
+        last_reset = self._period_start()
+        if cost == self._attr_native_value and last_reset == self._attr_last_reset:
+            return
+        self._attr_native_value = cost
+        self._attr_last_reset = last_reset
+        if self._added:
+            self.async_write_ha_state()
@@ -0,0 +1,91 @@
+"""Services for Energy Window Tracker."""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, timedelta
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_END_DATE,
+    ATTR_START_DATE,
+    DOMAIN,
+    HISTORY_DAYS,
+    SERVICE_RECALCULATE,
+)
+from .sensor import WindowData
+
+_MAIN_LOGGER = logging.getLogger("custom_components.energy_window_tracker")
+
+RECALCULATE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_START_DATE): cv.date,
+        vol.Optional(ATTR_END_DATE): cv.date,
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    }
+)
+
+
+def _window_data(hass: HomeAssistant, entry_id: str | None) -> list[WindowData]:
+    """WindowData of every loaded source, or only of one entry."""
+    return [
+        data
+        for other_id, entry_data in hass.data.get(DOMAIN, {}).items()
+        if entry_id is None or other_id == entry_id
+        for data in entry_data.values()
+        if isinstance(data, WindowData)
+    ]
+
+
+async def _async_recalculate(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Recompute window totals of past days from recorder history.
+
+    Days are handled one at a time (oldest first) across all sources, so each
+    (source, day) is read from the recorder once and shared by every window and entry
+    on that source. Today is left to the live snapshots.
+    """
+    yesterday = dt_util.now().date() - timedelta(days=1)
+    start: date = max(call.data[ATTR_START_DATE], yesterday - timedelta(days=HISTORY_DAYS - 1))
+    end: date = min(call.data.get(ATTR_END_DATE, yesterday), yesterday)
+    if start > end:
+        raise ServiceValidationError(
+            f"Nothing to recalculate between {start} and {end}: the range must end before today"
+        )
+    sources = _window_data(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+    if not sources:
+        raise ServiceValidationError("No loaded Energy Window Tracker entry to recalculate")
+    _MAIN_LOGGER.warning(
+        "services: recalculate %s to %s - %s source(s)", start, end, len(sources)
+    )
+    changed: dict[int, WindowData] = {}
+    days = 0
+    day = start
+    while day <= end:
+        for data in sources:
+            if await data.async_recalculate_day(day):
+                changed[id(data)] = data
+        days += 1
+        day += timedelta(days=1)
+    for data in changed.values():
+        data.async_recalculated()
+    _MAIN_LOGGER.warning(
+        "services: recalculate done - %s day(s), %s source(s) updated", days, len(changed)
+    )
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services (once, for all entries)."""
+
+    async def _async_handle_recalculate(call: ServiceCall) -> None:
+        await _async_recalculate(hass, call)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_RECALCULATE, _async_handle_recalculate, schema=RECALCULATE_SCHEMA
+    )
@@ -0,0 +1,302 @@
+"""Domain-wide snapshot storage for Energy Window Tracker.
+
+All entries and sources share a small, fixed number of Store files (shards) instead of
+one file per entry/source. Each shard holds::
+
+    {"sources": {"<entry_id>/<source_slug>": {"snapshot_date": ..., "windows": {...}}}}
+
+Sources are assigned to a shard by a stable hash of their entry_id, so a write only
+touches the shard that changed. A source found in another loaded shard (after the shard
+count changed) is moved to its owning shard on load. Per-source files from older versions
+(``{STORAGE_KEY}_{entry_id}_{slug}``) are migrated on first load and then removed.
+
+Daily and period totals of each source live in a second store of the same layout
+(``STORAGE_TOTALS_KEY``), so the frequent snapshot writes do not re-serialize them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DATA_STORE,
+    DATA_TOTALS_STORE,
+    STORAGE_KEY,
+    STORAGE_SHARDS,
+    STORAGE_TOTALS_KEY,
+    STORAGE_VERSION,
+)
+
+_MAIN_LOGGER = logging.getLogger("custom_components.energy_window_tracker")
+
+
+def _source_key(entry_id: str, slug: str) -> str:
+    """Key of one source inside a shard."""
+    return f"{entry_id}/{slug}"
+
+
+def _legacy_store_key(entry_id: str, slug: str) -> str:
+    """Store key used by versions that kept one file per entry/source."""
+    return f"{STORAGE_KEY}_{entry_id}_{slug}"
+
+
+class SnapshotStore:
+    """Sharded, domain-wide store for the snapshots of every entry and source."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        shards: int = STORAGE_SHARDS,
+        key: str = STORAGE_KEY,
+        migrate_legacy: bool = True,
+    ) -> None:
+        self.hass = hass
+        self._stores: list[Store] = [
+            Store(hass, STORAGE_VERSION, key if i == 0 else f"{key}_shard_{i}")
+            for i in range(max(1, shards))
+        ]
+        # Only the snapshot store had per-source files in older versions
+        self._migrate_legacy = migrate_legacy
+        self._shards: list[dict[str, dict[str, Any]]] = [{} for _ in self._stores]
+        # Per shard: source key -> function returning that source's latest payload
+        self._pending: list[dict[str, Callable[[], dict[str, Any]]]] = [
+            {} for _ in self._stores
+        ]
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._preload_task: asyncio.Task[None] | None = None
+        # Source keys whose legacy file was already looked for (found or not)
+        self._legacy_checked: set[str] = set()
+        # Source key -> latest view handed out, so removing a source can detach it
+        self._views: dict[str, SourceSnapshotStore] = {}
+
+    def _shard_index(self, entry_id: str) -> int:
+        """Stable shard for an entry (all sources of an entry share a shard)."""
+        if len(self._stores) == 1:
+            return 0
+        digest = hashlib.md5(entry_id.encode("utf-8"), usedforsecurity=False).hexdigest()
+        return int(digest, 16) % len(self._stores)
+
+    async def async_load(self) -> None:
+        """Read every shard once (concurrently); later calls return immediately."""
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            results = await asyncio.gather(*(store.async_load() for store in self._stores))
+            for i, stored in enumerate(results):
+                sources = stored.get("sources") if isinstance(stored, dict) else None
+                self._shards[i] = dict(sources) if isinstance(sources, dict) else {}
+            self._loaded = True
+            _MAIN_LOGGER.debug(
+                "storage: loaded %s shard(s), %s source(s)",
+                len(self._stores),
+                sum(len(s) for s in self._shards),
+            )
+
+    def _shard_payload(self, index: int) -> dict[str, Any]:
+        """Resolve pending source payloads into a shard and return what to write."""
+        pending = self._pending[index]
+        self._pending[index] = {}
+        for key, data_func in pending.items():
+            self._shards[index][key] = data_func()
+        return {"sources": self._shards[index]}
+
+    async def _async_save_shard(self, index: int) -> None:
+        """Write one shard now (cancels its pending delayed write)."""
+        await self._stores[index].async_save(self._shard_payload(index))
+
+    @callback
+    def _async_delay_save_shard(self, index: int, delay: float) -> None:
+        """Coalesce writes of one shard; Store flushes it on EVENT_HOMEASSISTANT_FINAL_WRITE."""
+        self._stores[index].async_delay_save(lambda: self._shard_payload(index), delay)
+
+    async def async_preload(self, sources: Iterable[tuple[str, str]]) -> None:
+        """Load every shard and migrate all listed legacy files in one concurrent batch.
+
+        Called by each entry's setup with the (entry_id, source_slug) pairs of all entries;
+        concurrent callers share the first batch, so entries then read from memory.
+        """
+        if self._preload_task is None:
+            self._preload_task = self.hass.async_create_task(
+                self._async_preload(list(sources))
+            )
+        await self._preload_task
+
+    async def _async_preload(self, sources: list[tuple[str, str]]) -> None:
+        """Load all shards, then migrate legacy files of sources not yet in a shard."""
+        await self.async_load()
+        await self._async_relocate(sources)
+        missing = [
+            (entry_id, slug)
+            for entry_id, slug in sources
+            if _source_key(entry_id, slug) not in self._shards[self._shard_index(entry_id)]
+        ]
+        await self._async_migrate_legacy(missing)
+
+    async def _async_relocate(self, sources: Iterable[tuple[str, str]]) -> None:
+        """Move sources stored in another shard into the shard that owns them now.
+
+        A source's shard follows its entry_id hash, so changing STORAGE_SHARDS leaves
+        existing snapshots in a shard that is no longer looked at; both shards are rewritten.
+        """
+        dirty: set[int] = set()
+        for entry_id, slug in sources:
+            index = self._shard_index(entry_id)
+            key = _source_key(entry_id, slug)
+            if key in self._shards[index]:
+                continue
+            for other, shard in enumerate(self._shards):
+                if other != index and key in shard:
+                    self._shards[index][key] = shard.pop(key)
+                    dirty.update((index, other))
+                    _MAIN_LOGGER.warning(
+                        "storage: moved snapshots for entry_id=%s source=%s to shard %s",
+                        entry_id,
+                        slug,
+                        index,
+                    )
+                    break
+        if dirty:
+            await asyncio.gather(*(self._async_save_shard(index) for index in dirty))
+
+    async def _async_migrate_legacy(self, sources: list[tuple[str, str]]) -> None:
+        """Import per-source files from older versions into their shards, then remove them.
+
+        All legacy files are read concurrently and each affected shard is written once.
+        """
+        sources = [
+            (entry_id, slug)
+            for entry_id, slug in sources
+            if _source_key(entry_id, slug) not in self._legacy_checked
+        ]
+        if not sources or not self._migrate_legacy:
+            return
+        self._legacy_checked.update(_source_key(entry_id, slug) for entry_id, slug in sources)
+        legacy_stores = [
+            Store(self.hass, STORAGE_VERSION, _legacy_store_key(entry_id, slug))
+            for entry_id, slug in sources
+        ]
+        results = await asyncio.gather(*(store.async_load() for store in legacy_stores))
+        migrated: list[Store] = []
+        dirty: set[int] = set()
+        for (entry_id, slug), legacy, stored in zip(sources, legacy_stores, results):
+            if not stored:
+                continue
+            index = self._shard_index(entry_id)
+            self._shards[index][_source_key(entry_id, slug)] = stored
+            dirty.add(index)
+            migrated.append(legacy)
+            _MAIN_LOGGER.warning(
+                "storage: migrated snapshots for entry_id=%s source=%s to shared store",
+                entry_id,
+                slug,
+            )
+        if not migrated:
+            return
+        await asyncio.gather(*(self._async_save_shard(index) for index in dirty))
+        await asyncio.gather(*(legacy.async_remove() for legacy in migrated))
+
+    @callback
+    def async_source_store(self, entry_id: str, slug: str) -> SourceSnapshotStore:
+        """Store-like view of one source's snapshots."""
+        view = self._views[_source_key(entry_id, slug)] = SourceSnapshotStore(self, entry_id, slug)
+        return view
+
+    @callback
+    def _async_detach_view(self, key: str) -> None:
+        """Stop the live view of a removed source from writing it back (e.g. on unload flush)."""
+        if (view := self._views.pop(key, None)) is not None:
+            view._removed = True
+
+    async def async_remove_source(self, entry_id: str, slug: str) -> None:
+        """Drop a source's snapshots (e.g. after its source entity changed)."""
+        await self.async_load()
+        index = self._shard_index(entry_id)
+        key = _source_key(entry_id, slug)
+        self._async_detach_view(key)
+        self._pending[index].pop(key, None)
+        if self._shards[index].pop(key, None) is not None:
+            await self._async_save_shard(index)
+        if self._migrate_legacy:
+            await Store(self.hass, STORAGE_VERSION, _legacy_store_key(entry_id, slug)).async_remove()
+
+    async def async_remove_entry(self, entry_id: str) -> None:
+        """Drop every source of a removed config entry."""
+        await self.async_load()
+        index = self._shard_index(entry_id)
+        prefix = _source_key(entry_id, "")
+        for key in [k for k in self._views if k.startswith(prefix)]:
+            self._async_detach_view(key)
+        keys = [k for k in (*self._shards[index], *self._pending[index]) if k.startswith(prefix)]
+        if not keys:
+            return
+        for key in keys:
+            self._pending[index].pop(key, None)
+            self._shards[index].pop(key, None)
+        await self._async_save_shard(index)
+
+
+class SourceSnapshotStore:
+    """View of one source inside SnapshotStore with the subset of the Store API WindowData uses."""
+
+    def __init__(self, parent: SnapshotStore, entry_id: str, slug: str) -> None:
+        self._parent = parent
+        self._entry_id = entry_id
+        self._slug = slug
+        self._key = _source_key(entry_id, slug)
+        self._index = parent._shard_index(entry_id)
+        # Set once the source is removed; its pending and later writes are dropped
+        self._removed = False
+
+    async def async_load(self) -> dict[str, Any] | None:
+        """Return this source's stored payload, migrating a legacy per-source file if needed."""
+        await self._parent.async_load()
+        if self._key not in self._parent._shards[self._index]:
+            await self._parent._async_relocate([(self._entry_id, self._slug)])
+        if self._key not in self._parent._shards[self._index]:
+            await self._parent._async_migrate_legacy([(self._entry_id, self._slug)])
+        stored = self._parent._shards[self._index].get(self._key)
+        return dict(stored) if stored else stored
+
+    async def async_save(self, data: dict[str, Any]) -> None:
+        """Store this source's payload and write its shard now."""
+        if self._removed:
+            return
+        self._parent._pending[self._index].pop(self._key, None)
+        self._parent._shards[self._index][self._key] = data
+        await self._parent._async_save_shard(self._index)
+
+    @callback
+    def async_delay_save(self, data_func: Callable[[], dict[str, Any]], delay: float = 0) -> None:
+        """Schedule a coalesced write of this source's shard."""
+        if self._removed:
+            return
+        self._parent._pending[self._index][self._key] = data_func
+        self._parent._async_delay_save_shard(self._index, delay)
+
+
+@callback
+def async_get_snapshot_store(hass: HomeAssistant) -> SnapshotStore:
+    """Return the domain-wide snapshot store, creating it on first use."""
+    if (store := hass.data.get(DATA_STORE)) is None:
+        store = hass.data[DATA_STORE] = SnapshotStore(hass)
+    return store
+
+
+@callback
+def async_get_totals_store(hass: HomeAssistant) -> SnapshotStore:
+    """Return the domain-wide store of daily and period totals, creating it on first use."""
+    if (store := hass.data.get(DATA_TOTALS_STORE)) is None:
+        store = hass.data[DATA_TOTALS_STORE] = SnapshotStore(
+            hass, key=STORAGE_TOTALS_KEY, migrate_legacy=False
+        )
+    return store
@@ -0,0 +1,250 @@
+"""Rolling history and calendar rollups of window totals for Energy Window Tracker.
+
+Each window name keeps a fixed-size ring of daily totals packed as 32-bit floats
+(``array("f")``), indexed by the date's ordinal modulo the ring size, so recording a
+day and reading the last N days need no date bookkeeping per slot. Days without a
+total (no window end seen, or Home Assistant down) hold NaN. The rings are saved with
+the source's snapshots as base64 strings.
+
+Week-to-date and month-to-date totals are separate running sums (PeriodTotals), so
+they cost one addition per window end however long the period.
+"""
+
+from __future__ import annotations
+
+import base64
+import math
+import sys
+from array import array
+from collections.abc import Callable
+from datetime import date
+from typing import Any
+
+from .const import (
+    ATTR_LAST_7_DAYS,
+    ATTR_LAST_30_DAYS,
+    ATTR_MONTH_TO_DATE,
+    ATTR_WEEK_TO_DATE,
+    ATTR_YESTERDAY,
+    HISTORY_DAYS,
+)
+
+_NAN = float("nan")
+
+
+def _pack(values: array) -> str:
+    """Ring as little-endian base64 (storage is portable across hosts)."""
+    if sys.byteorder != "little":
+        values = array("f", values)
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def _unpack(text: str, days: int) -> array | None:
+    try:
+        values = array("f", base64.b64decode(text, validate=True))
+    except (ValueError, TypeError):
+        return None
+    if len(values) != days:
+        return None
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _round(value: float | None) -> float | None:
+    return round(value, 3) if value is not None else None
+
+
+class DailyTotals:
+    """Per-window ring buffers of daily totals (kWh), one slot per day."""
+
+    def __init__(self, days: int = HISTORY_DAYS) -> None:
+        self._days = days
+        self._rings: dict[str, array] = {}
+        # Ordinal of the most recent recorded day; older slots are up to days-1 days back
+        self._last_ordinal: int | None = None
+        # (ordinal of today, window name) -> summary, dropped whenever a total changes
+        self._summaries: dict[tuple[int, str], dict[str, float | None]] = {}
+
+    def __bool__(self) -> bool:
+        return self._last_ordinal is not None
+
+    def add(self, name: str, day: date, value: float) -> None:
+        """Add value to the total of `name` on `day` (several ranges of a window add up)."""
+        ordinal = day.toordinal()
+        if self._last_ordinal is not None and ordinal < self._last_ordinal - self._days + 1:
+            return
+        if self._last_ordinal is None or ordinal > self._last_ordinal:
+            self._advance(ordinal)
+        ring = self._rings.get(name)
+        if ring is None:
+            ring = self._rings[name] = array("f", [_NAN]) * self._days
+        slot = ordinal % self._days
+        ring[slot] = value if math.isnan(ring[slot]) else ring[slot] + value
+        self._summaries.clear()
+
+    def _advance(self, ordinal: int) -> None:
+        """Move the newest day to `ordinal`, clearing the slots of the days skipped over."""
+        if self._last_ordinal is not None:
+            for skipped in range(self._last_ordinal + 1, min(ordinal, self._last_ordinal + self._days) + 1):
+                for ring in self._rings.values():
+                    ring[skipped % self._days] = _NAN
+        self._last_ordinal = ordinal
+
+    def total(self, name: str, day: date) -> float | None:
+        """Recorded total of `name` on `day`, or None."""
+        ring = self._rings.get(name)
+        ordinal = day.toordinal()
+        if ring is None or self._last_ordinal is None:
+            return None
+        if not self._last_ordinal - self._days < ordinal <= self._last_ordinal:
+            return None
+        value = ring[ordinal % self._days]
+        return None if math.isnan(value) else value
+
+    def sum_days(self, name: str, today: date, days: int) -> float | None:
+        """Sum of the `days` days before `today` (today excluded); None without any total."""
+        result: float | None = None
+        ordinal = today.toordinal()
+        for back in range(1, min(days, self._days) + 1):
+            value = self.total(name, date.fromordinal(ordinal - back))
+            if value is not None:
+                result = (result or 0.0) + value
+        return result
+
+    def summary(self, name: str, today: date) -> dict[str, float | None] | None:
+        """Yesterday / last 7 days / last 30 days attributes for a window, or None."""
+        if name not in self._rings:
+            return None
+        key = (today.toordinal(), name)
+        if (cached := self._summaries.get(key)) is None:
+            cached = self._summaries[key] = {
+                ATTR_YESTERDAY: _round(self.sum_days(name, today, 1)),
+                ATTR_LAST_7_DAYS: _round(self.sum_days(name, today, 7)),
+                ATTR_LAST_30_DAYS: _round(self.sum_days(name, today, 30)),
+            }
+        return cached
+
+    def retain(self, names: set[str]) -> None:
+        """Drop the history of windows that no longer exist."""
+        for name in [n for n in self._rings if n not in names]:
+            del self._rings[name]
+        self._summaries.clear()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Stored form: newest day's ordinal and each window's ring as base64 floats."""
+        return {
+            "days": self._days,
+            "last_ordinal": self._last_ordinal,
+            "windows": {name: _pack(ring) for name, ring in self._rings.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Any, days: int = HISTORY_DAYS) -> DailyTotals:
+        """Restore from as_dict() output; malformed or resized data starts empty."""
+        totals = cls(days)
+        if not isinstance(data, dict) or data.get("days") != days:
+            return totals
+        last = data.get("last_ordinal")
+        windows = data.get("windows")
+        if not isinstance(last, int) or not isinstance(windows, dict):
+            return totals
+        for name, text in windows.items():
+            if isinstance(text, str) and (ring := _unpack(text, days)) is not None:
+                totals._rings[name] = ring
+        if totals._rings:
+            totals._last_ordinal = last
+        return totals
+
+
+# Calendar periods of PeriodTotals: attribute name -> period key of a date
+_PERIODS: dict[str, Callable[[date], str]] = {
+    ATTR_WEEK_TO_DATE: lambda day: "{}-W{:02d}".format(*day.isocalendar()[:2]),
+    ATTR_MONTH_TO_DATE: lambda day: f"{day.year}-{day.month:02d}",
+}
+
+
+class PeriodTotals:
+    """Week-to-date and month-to-date totals per window, one running sum per period.
+
+    A window end adds its total in O(1); a sum restarts when the calendar period of
+    the day added (or of the day rolled to at midnight) differs from its own. Weeks
+    are ISO weeks (Monday to Sunday).
+    """
+
+    def __init__(self) -> None:
+        # window name -> attribute -> [period key, sum]
+        self._sums: dict[str, dict[str, list[Any]]] = {}
+
+    def add(self, name: str, day: date, value: float) -> None:
+        """Add a window total of `day` to the running sums of its week and month."""
+        sums = self._sums.setdefault(name, {})
+        for attr, period_of in _PERIODS.items():
+            key = period_of(day)
+            current = sums.get(attr)
+            if current is None or current[0] != key:
+                sums[attr] = [key, value]
+            else:
+                current[1] += value
+
+    def adjust(self, name: str, day: date, today: date, value: float) -> None:
+        """Add a correction to a past day's total, if that day is in the week or month of `today`."""
+        sums = self._sums.setdefault(name, {})
+        for attr, period_of in _PERIODS.items():
+            key = period_of(today)
+            if period_of(day) != key:
+                continue
+            current = sums.get(attr)
+            if current is None or current[0] != key:
+                sums[attr] = [key, value]
+            else:
+                current[1] += value
+
+    def roll(self, day: date) -> None:
+        """Restart the sums of periods that ended before `day` (called at midnight)."""
+        for sums in self._sums.values():
+            for attr, period_of in _PERIODS.items():
+                key = period_of(day)
+                if (current := sums.get(attr)) is not None and current[0] != key:
+                    sums[attr] = [key, 0.0]
+
+    def summary(self, name: str, day: date) -> dict[str, float] | None:
+        """Week-to-date / month-to-date attributes of a window on `day`, or None."""
+        if (sums := self._sums.get(name)) is None:
+            return None
+        result: dict[str, float] = {}
+        for attr, period_of in _PERIODS.items():
+            current = sums.get(attr)
+            in_period = current is not None and current[0] == period_of(day)
+            result[attr] = round(current[1], 3) if in_period else 0.0
+        return result
+
+    def retain(self, names: set[str]) -> None:
+        """Drop the sums of windows that no longer exist."""
+        for name in [n for n in self._sums if n not in names]:
+            del self._sums[name]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Stored form: {window name: {attribute: [period key, sum]}}."""
+        return {name: {attr: list(v) for attr, v in sums.items()} for name, sums in self._sums.items()}
+
+    @classmethod
+    def from_dict(cls, data: Any) -> PeriodTotals:
+        """Restore from as_dict() output, skipping malformed entries."""
+        totals = cls()
+        if not isinstance(data, dict):
+            return totals
+        for name, sums in data.items():
+            if not isinstance(sums, dict):
+                continue
+            for attr in _PERIODS:
+                entry = sums.get(attr)
+                if (
+                    isinstance(entry, list)
+                    and len(entry) == 2
+                    and isinstance(entry[0], str)
+                    and isinstance(entry[1], (int, float))
+                ):
+                    totals._sums.setdefault(name, {})[attr] = [entry[0], float(entry[1])]
+        return totals
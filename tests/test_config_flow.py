@@ -14,8 +14,13 @@ from homeassistant.core import HomeAssistant
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.energy_window_tracker.const import (
+    CONF_CHECKPOINT_INTERVAL,
     CONF_COST_PER_KWH,
+    CONF_COST_SENSORS,
+    CONF_COUNT_THROUGH_RESETS,
+    CONF_EXPORT_STATISTICS,
     CONF_NAME,
+    CONF_SAVE_DELAY,
     CONF_SOURCE_ENTITY,
     CONF_SOURCES,
     CONF_WINDOW_END,
@@ -343,7 +348,7 @@ async def test_options_flow_update_source_entity_submit_remove_previous(
     hass.states.async_set("sensor.today_import", "0")
     entry = mock_config_entry
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ), patch.object(
@@ -376,7 +381,7 @@ async def test_options_flow_update_source_entity_remove_previous_unchanged_sourc
     hass.states.async_set("sensor.today_load", "0")
     entry = mock_config_entry
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -408,7 +413,7 @@ async def test_options_flow_update_source_entity_submit_retain_previous(
     hass.states.async_set("sensor.today_import", "0")
     entry = mock_config_entry
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ), patch.object(
@@ -430,3 +435,40 @@ async def test_options_flow_update_source_entity_submit_retain_previous(
     assert entry
     sources = entry.options.get(CONF_SOURCES) or entry.data.get(CONF_SOURCES) or []
     assert sources[0][CONF_SOURCE_ENTITY] == "sensor.today_import"
+
+
+@pytest.mark.asyncio
+async def test_options_flow_settings_saves_save_delay(
+    hass: HomeAssistant, mock_config_entry: config_entries.ConfigEntry
+) -> None:
+    """[Happy] Options flow: Settings step stores save_delay and keeps the configured source."""
+    entry = mock_config_entry
+    with patch.object(hass.config_entries, "async_reload", new_callable=AsyncMock):
+        opts_result = await hass.config_entries.options.async_init(entry.entry_id)
+        assert "settings" in opts_result["menu_options"]
+        result = await hass.config_entries.options.async_configure(
+            opts_result["flow_id"],
+            {"next_step_id": "settings"},
+        )
+        assert result["type"] is data_entry_flow.FlowResultType.FORM
+        assert result["step_id"] == "settings"
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"],
+            {
+                CONF_SAVE_DELAY: 30,
+                CONF_COST_SENSORS: True,
+                CONF_CHECKPOINT_INTERVAL: 15,
+                CONF_COUNT_THROUGH_RESETS: True,
+                CONF_EXPORT_STATISTICS: True,
+            },
+        )
+    assert result["type"] is data_entry_flow.FlowResultType.CREATE_ENTRY
+    entry = hass.config_entries.async_get_entry(entry.entry_id)
+    assert entry
+    assert entry.options[CONF_SAVE_DELAY] == 30
+    assert entry.options[CONF_COST_SENSORS] is True
+    assert entry.options[CONF_CHECKPOINT_INTERVAL] == 15
+    assert entry.options[CONF_COUNT_THROUGH_RESETS] is True
+    assert entry.options[CONF_EXPORT_STATISTICS] is True
+    sources = entry.options.get(CONF_SOURCES) or entry.data.get(CONF_SOURCES) or []
+    assert sources[0][CONF_SOURCE_ENTITY] == "sensor.today_load"
@@ -183,7 +183,7 @@ async def test_options_add_window_invalid_time_range_shows_error(
     """[Unhappy] Options Add window with start >= end shows window_start_after_end."""
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -216,7 +216,7 @@ async def test_options_add_window_invalid_time_value_shows_field_error(
 
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -251,7 +251,7 @@ async def test_options_edit_window_invalid_time_range_shows_error(
     """[Unhappy] Options Edit window with start >= end shows error and keeps form."""
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -309,7 +309,7 @@ async def test_options_manage_windows_with_default_empty_window_name(
     entry.add_to_hass(hass)
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -335,7 +335,7 @@ async def test_options_manage_windows_empty_submit_returns_to_menu(
     hass.states.async_set("sensor.today_load", "0")
     # Start with one window; delete it so we have zero
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -369,7 +369,7 @@ async def test_options_add_window_add_another_then_save_two_ranges(
     """[Happy] Options Add window: Add another time range, submit with two ranges; entry has new window with 2 ranges."""
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ), patch.object(
@@ -448,7 +448,7 @@ async def test_options_manage_windows_shows_unique_names_only(
     entry.add_to_hass(hass)
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -492,7 +492,7 @@ async def test_options_edit_window_replaces_all_ranges_for_that_name(
     entry.add_to_hass(hass)
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ), patch.object(
@@ -562,7 +562,7 @@ async def test_options_edit_window_preserves_window_order_in_list(
     entry.add_to_hass(hass)
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ), patch.object(
@@ -626,7 +626,7 @@ async def test_options_edit_window_add_another_time_range_then_save(
     entry.add_to_hass(hass)
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ), patch.object(
@@ -692,7 +692,7 @@ async def test_options_update_source_empty_entity_rejected(
 
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -906,7 +906,7 @@ async def test_sensor_source_unknown_state_reports_unavailable(
     """[Unhappy] When source entity state is 'unknown', sensor reports unavailable or unknown."""
     hass.states.async_set("sensor.today_load", "unknown")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -926,7 +926,7 @@ async def test_sensor_source_unavailable_state_reports_unavailable(
     """[Unhappy] When source entity state is 'unavailable', sensor reports unavailable or unknown."""
     hass.states.async_set("sensor.today_load", "unavailable")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -945,7 +945,7 @@ async def test_sensor_source_numeric_state_reports_value(
     """[Happy] When source entity has numeric state, sensor reports a numeric value (0 or computed)."""
     hass.states.async_set("sensor.today_load", "5.25")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -987,7 +987,7 @@ async def test_setup_entry_multiple_windows_creates_multiple_sensors(
     entry.add_to_hass(hass)
     hass.states.async_set("sensor.today_load", "5.0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -1008,7 +1008,7 @@ async def test_storage_load_none_no_crash(hass: HomeAssistant, mock_config_entry
     """[Unhappy] Store.async_load returning None (no stored data) does not crash load()."""
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value=None,
     ):
@@ -1027,7 +1027,7 @@ async def test_storage_load_empty_dict_creates_entities(
     """[Happy] When Store.async_load returns empty dict, setup creates entities and sensor has state."""
     hass.states.async_set("sensor.today_load", "1.5")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -1069,7 +1069,7 @@ async def test_sensor_writes_state_when_source_value_changes_even_if_displayed_u
     noon_today = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
     hass.states.async_set("sensor.today_load", "1.0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ), patch(
@@ -1101,7 +1101,7 @@ async def test_sensor_does_not_write_state_when_source_value_unchanged(
     noon_today = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
     hass.states.async_set("sensor.today_load", "1.0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ), patch(
@@ -1123,6 +1123,43 @@ async def test_sensor_does_not_write_state_when_source_value_unchanged(
     assert second_calls == first_calls, "async_write_ha_state should not be called again when source value is unchanged"
 
 
+@pytest.mark.asyncio
+async def test_sensor_is_push_only_and_updates_on_window_start(
+    hass: HomeAssistant, mock_config_entry: ConfigEntry
+) -> None:
+    """[Happy] Sensor does not poll; window start and source changes push the new state."""
+    before_window = dt_util.now().replace(hour=8, minute=0, second=0, microsecond=0)
+    window_start = before_window.replace(hour=9)
+    hass.states.async_set("sensor.today_load", "5.0")
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={},
+    ), patch(
+        "custom_components.energy_window_tracker.sensor.dt_util.now",
+        return_value=before_window,
+    ):
+        assert await hass.config_entries.async_setup(mock_config_entry.entry_id)
+        await hass.async_block_till_done()
+    entity = _get_sensor_entity(hass, mock_config_entry.entry_id)
+    assert entity is not None
+    assert entity.should_poll is False
+    assert hass.states.get(entity.entity_id).attributes.get("status") == "before_window"
+
+    with patch(
+        "custom_components.energy_window_tracker.sensor.dt_util.now",
+        return_value=window_start,
+    ):
+        entity._data._handle_window_start(entity._data._windows[0], window_start)
+        await hass.async_block_till_done()
+        state = hass.states.get(entity.entity_id)
+        assert state.attributes.get("status") == "during_window"
+        assert float(state.state) == 0.0
+        hass.states.async_set("sensor.today_load", "6.0")
+        await hass.async_block_till_done()
+        assert float(hass.states.get(entity.entity_id).state) == 1.0
+
+
 def _multi_range_config_entry():
     """Config entry with one window name and multiple time ranges (e.g. Shoulder: 00:00-11:00, 14:00-16:00, 23:00-23:59)."""
     return MockConfigEntry(
@@ -1156,7 +1193,7 @@ async def test_sensor_writes_state_when_source_changes_multiple_ranges(
     noon_today = datetime.now().replace(hour=15, minute=0, second=0, microsecond=0)
     hass.states.async_set("sensor.today_load", "1.0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ), patch(
@@ -1191,7 +1228,7 @@ async def test_sensor_does_not_write_state_when_source_unchanged_multiple_ranges
     noon_today = datetime.now().replace(hour=15, minute=0, second=0, microsecond=0)
     hass.states.async_set("sensor.today_load", "1.0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ), patch(
@@ -1230,7 +1267,7 @@ async def test_load_keeps_snapshots_when_stored_date_is_today(
     }
     hass.states.async_set("sensor.today_load", "3.5")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value=stored,
     ), patch(
@@ -1268,7 +1305,7 @@ async def test_load_discards_snapshots_when_stored_date_not_today(
     }
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value=stored,
     ):
@@ -1290,7 +1327,7 @@ async def test_get_window_value_ignores_snapshots_when_date_not_today(
     """[Unhappy] get_window_value treats snapshots as missing when _snapshot_date is not today."""
     hass.states.async_set("sensor.today_load", "5.0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -1327,7 +1364,7 @@ async def test_sensor_updates_after_load_with_yesterday_snapshots(
     hass.states.async_set("sensor.today_load", "2.0")
     noon_today = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value=stored,
     ), patch(
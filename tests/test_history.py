@@ -0,0 +1,458 @@
+"""Tests for recorder lookups of past source values, the statistics export and recalculation."""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.components.recorder import Recorder, get_instance
+from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.components.recorder.tasks import RecorderTask
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from custom_components.energy_window_tracker import history
+from custom_components.energy_window_tracker.const import (
+    DATA_HISTORY,
+    DOMAIN,
+    SERVICE_RECALCULATE,
+)
+from custom_components.energy_window_tracker.sensor import _statistic_id
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(recorder_mock: Recorder, enable_custom_integrations):
+    """Set up the recorder before hass is used (overrides the conftest fixture)."""
+    yield
+
+
+def _entry(entry_id: str, options: dict[str, Any] | None = None) -> MockConfigEntry:
+    """Config entry with one source and one 12:00-17:00 window."""
+    return MockConfigEntry(
+        domain=DOMAIN,
+        title=entry_id,
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [{"name": "Peak", "start": "12:00", "end": "17:00"}],
+                }
+            ]
+        },
+        options=options or {},
+        entry_id=entry_id,
+    )
+
+
+async def _record(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory, readings: list[tuple[datetime, str]]
+) -> None:
+    """Record source states at the given local times."""
+    for when, value in readings:
+        freezer.move_to(when)
+        hass.states.async_set("sensor.today_load", value)
+        await async_wait_recording_done(hass)
+
+
+async def test_late_start_snapshot_recovered_from_recorder(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """[Happy] A start snapshot missed while HA was down is looked up in the recorder, not counted from 0."""
+    noon = dt_util.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    await _record(
+        hass,
+        freezer,
+        [
+            (noon - timedelta(minutes=5), "10.0"),
+            (noon + timedelta(minutes=5), "12.0"),
+            (noon + timedelta(minutes=60), "15.0"),
+        ],
+    )
+    entry = _entry("recover_entry_id")
+    entry.add_to_hass(hass)
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value=None,
+    ), patch(
+        "custom_components.energy_window_tracker.history._query_values",
+        wraps=history._query_values,
+    ) as mock_query:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        await async_wait_recording_done(hass)
+        await hass.async_block_till_done()
+
+        data = hass.data[DOMAIN][entry.entry_id]["today_load"]
+        assert data._snapshots[0].snapshot_start == pytest.approx(11.0)
+        assert hass.states.get("sensor.today_load_peak").state == "4.0"
+        assert mock_query.call_count == 1
+
+        # The same boundary is answered from the cache
+        values: list[float] = []
+        hass.data[DATA_HISTORY].async_request("sensor.today_load", noon, values.append)
+        assert values == [pytest.approx(11.0)]
+        assert mock_query.call_count == 1
+
+
+async def test_recorder_start_beats_checkpoint_before_window(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """[Regression] The recorder value at the start replaces a checkpoint taken an hour earlier."""
+    noon = dt_util.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    await _record(
+        hass,
+        freezer,
+        [
+            (noon - timedelta(minutes=5), "10.0"),
+            (noon + timedelta(minutes=5), "12.0"),
+            (noon + timedelta(minutes=60), "15.0"),
+        ],
+    )
+    entry = _entry("checkpoint_entry_id", {"checkpoint_interval": 15})
+    entry.add_to_hass(hass)
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={
+            "sources": {
+                "checkpoint_entry_id/today_load": {
+                    "snapshot_date": noon.date().isoformat(),
+                    "windows": {},
+                    "checkpoint": {"updated": noon.timestamp() - 3600, "value": 6.0},
+                }
+            }
+        },
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        await async_wait_recording_done(hass)
+        await hass.async_block_till_done()
+
+    data = hass.data[DOMAIN][entry.entry_id]["today_load"]
+    assert data._snapshots[0].snapshot_start == pytest.approx(11.0)
+    assert hass.states.get("sensor.today_load_peak").state == "4.0"
+
+
+async def test_late_start_keeps_zero_baseline_without_history(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """[Edge] Without a recorded state before the start time the 0.0 baseline stays."""
+    noon = dt_util.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    await _record(hass, freezer, [(noon + timedelta(minutes=60), "15.0")])
+    entry = _entry("no_history_entry_id")
+    entry.add_to_hass(hass)
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value=None,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        await async_wait_recording_done(hass)
+        await hass.async_block_till_done()
+    data = hass.data[DOMAIN][entry.entry_id]["today_load"]
+    assert data._snapshots[0].snapshot_start == 0.0
+    assert hass.states.get("sensor.today_load_peak").state == "15.0"
+
+
+async def test_window_exported_as_hourly_statistics(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """[Happy] A finished window is written per hour to long-term statistics, refinements add to its last hour."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Export",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [{"name": "Peak", "start": "12:00", "end": "14:00"}],
+                }
+            ]
+        },
+        options={"export_statistics": True},
+        entry_id="export_entry_id",
+    )
+    entry.add_to_hass(hass)
+    noon = dt_util.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    freezer.move_to(noon - timedelta(minutes=5))
+    hass.states.async_set("sensor.today_load", "10.0")
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value=None,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    data = hass.data[DOMAIN][entry.entry_id]["today_load"]
+    window = data._windows[0]
+
+    freezer.move_to(noon)
+    data._handle_window_start(window, dt_util.now())
+    # 12:05 refines the start to 10.5, 12:55 / 13:05 mark 12.5 at 13:00
+    for minutes, value in ((5, "11.0"), (55, "12.0"), (65, "13.0"), (115, "14.0")):
+        freezer.move_to(noon + timedelta(minutes=minutes))
+        hass.states.async_set("sensor.today_load", value)
+        await hass.async_block_till_done()
+    freezer.move_to(noon + timedelta(hours=2))
+    data._handle_window_end(window, dt_util.now())
+    await hass.async_block_till_done()
+    await async_wait_recording_done(hass)
+    # 14:05 refines the end from 14.0 to 14.5
+    freezer.move_to(noon + timedelta(minutes=125))
+    hass.states.async_set("sensor.today_load", "15.0")
+    await hass.async_block_till_done()
+    await async_wait_recording_done(hass)
+
+    statistic_id = _statistic_id("today_load", "Peak")
+    stats = await get_instance(hass).async_add_executor_job(
+        statistics_during_period,
+        hass,
+        noon - timedelta(hours=1),
+        None,
+        {statistic_id},
+        "hour",
+        None,
+        {"state", "sum"},
+    )
+    rows = stats[statistic_id]
+    assert [dt_util.utc_from_timestamp(row["start"]) for row in rows] == [
+        dt_util.as_utc(noon),
+        dt_util.as_utc(noon + timedelta(hours=1)),
+    ]
+    assert [row["state"] for row in rows] == [pytest.approx(2.0), pytest.approx(2.0)]
+    assert [row["sum"] for row in rows] == [pytest.approx(2.0), pytest.approx(4.0)]
+
+
+@dataclass(slots=True)
+class _BlockRecorderTask(RecorderTask):
+    """Recorder task that blocks the recorder thread until released."""
+
+    release: threading.Event
+
+    def run(self, instance: Recorder) -> None:
+        self.release.wait(10)
+
+
+async def test_refine_right_after_export_continues_uncommitted_sum(hass: HomeAssistant) -> None:
+    """[Regression] A refinement flushed before the recorder commits the window adds to its last hour."""
+    exporter = history.async_get_statistics_exporter(hass)
+    statistic_id = _statistic_id("today_load", "Peak")
+    noon = dt_util.as_utc(dt_util.now().replace(hour=12, minute=0, second=0, microsecond=0))
+    hours = [noon.timestamp(), (noon + timedelta(hours=1)).timestamp()]
+    # Hold the recorder thread so the first import is still queued when the refinement flushes
+    release = threading.Event()
+    get_instance(hass).queue_task(_BlockRecorderTask(release))
+    exporter.async_add(statistic_id, "Peak", {hours[0]: 2.0, hours[1]: 2.0})
+    await hass.async_block_till_done()
+    exporter.async_add(statistic_id, "Peak", {hours[1]: 0.5})
+    await hass.async_block_till_done()
+    release.set()
+    await async_wait_recording_done(hass)
+
+    stats = await get_instance(hass).async_add_executor_job(
+        statistics_during_period,
+        hass,
+        noon - timedelta(hours=1),
+        None,
+        {statistic_id},
+        "hour",
+        None,
+        {"state", "sum"},
+    )
+    rows = stats[statistic_id]
+    assert [row["state"] for row in rows] == [pytest.approx(2.0), pytest.approx(2.5)]
+    assert [row["sum"] for row in rows] == [pytest.approx(2.0), pytest.approx(4.5)]
+
+
+def test_window_total_across_mid_window_reset() -> None:
+    """[Edge] A reset mid-window clamps to 0 by default; with a reset ratio it keeps the energy before it."""
+    readings = [(0.0, 10.0), (1800.0, 14.0), (2100.0, 13.5), (2400.0, 1.0), (7200.0, 3.0)]
+    assert history.window_total(readings, 0.0, 7200.0) == 0.0
+    # The 13.5 dip is jitter, not a reset: 3.5 counted up to the reset, then 3.0 from 0
+    assert history.window_total(readings, 0.0, 7200.0, reset_ratio=0.5) == pytest.approx(6.5)
+    assert history.window_total(readings, -100.0, 7200.0) is None
+
+
+def test_statistic_ids_of_same_slug_windows_differ() -> None:
+    """[Edge] Window names that slugify the same get distinct statistic ids."""
+    ids = {_statistic_id("today_load", name) for name in ("Peak", "peak", "Peak!")}
+    assert len(ids) == 3
+    assert all(i.startswith(f"{DOMAIN}:today_load_peak_") for i in ids)
+
+
+async def test_recalculate_fills_history_and_statistics_from_recorder(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """[Happy] recalculate recomputes a past day from the recorder, one cached query per source and day."""
+    noon = dt_util.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    yesterday_noon = noon - timedelta(days=1)
+    await _record(
+        hass,
+        freezer,
+        [
+            (yesterday_noon + timedelta(minutes=minutes), value)
+            for minutes, value in (
+                (-5, "10.0"),
+                (5, "11.0"),
+                (55, "12.0"),
+                (65, "13.0"),
+                (115, "14.0"),
+                (125, "15.0"),
+            )
+        ],
+    )
+    freezer.move_to(noon - timedelta(hours=2))
+    hass.states.async_set("sensor.today_load", "1.0")
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Recalculate",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [{"name": "Peak", "start": "12:00", "end": "14:00"}],
+                }
+            ]
+        },
+        options={"export_statistics": True},
+        entry_id="recalculate_entry_id",
+    )
+    entry.add_to_hass(hass)
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value=None,
+    ), patch(
+        "custom_components.energy_window_tracker.history._query_day",
+        wraps=history._query_day,
+    ) as mock_query:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        for _ in range(2):
+            await hass.services.async_call(
+                DOMAIN,
+                SERVICE_RECALCULATE,
+                {"start_date": yesterday_noon.date()},
+                blocking=True,
+            )
+        await hass.async_block_till_done()
+        await async_wait_recording_done(hass)
+        assert mock_query.call_count == 1
+
+    data = hass.data[DOMAIN][entry.entry_id]["today_load"]
+    assert data.daily_totals.total("Peak", yesterday_noon.date()) == pytest.approx(4.0)
+    assert hass.states.get("sensor.today_load_peak").attributes["yesterday"] == 4.0
+
+    statistic_id = _statistic_id("today_load", "Peak")
+    stats = await get_instance(hass).async_add_executor_job(
+        statistics_during_period,
+        hass,
+        yesterday_noon - timedelta(hours=1),
+        None,
+        {statistic_id},
+        "hour",
+        None,
+        {"state", "sum"},
+    )
+    rows = stats[statistic_id]
+    assert [row["state"] for row in rows] == [pytest.approx(2.0), pytest.approx(2.0)]
+    assert [row["sum"] for row in rows] == [pytest.approx(2.0), pytest.approx(4.0)]
+
+
+def _night_entry(entry_id: str) -> MockConfigEntry:
+    """Config entry with one source and one 00:00-07:00 window."""
+    return MockConfigEntry(
+        domain=DOMAIN,
+        title=entry_id,
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [{"name": "Night", "start": "00:00", "end": "07:00"}],
+                }
+            ]
+        },
+        entry_id=entry_id,
+    )
+
+
+async def test_midnight_window_keeps_zero_baseline_after_daily_reset(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """[Regression] A 00:00 window on a daily counter is not recovered to yesterday's total."""
+    midnight = dt_util.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    await _record(hass, freezer, [(midnight - timedelta(minutes=5), "28.8")])
+    entry = _night_entry("night_entry_id")
+    entry.add_to_hass(hass)
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value=None,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    data = hass.data[DOMAIN][entry.entry_id]["today_load"]
+
+    await _record(hass, freezer, [(midnight + timedelta(seconds=1), "0.0")])
+    # The scheduler resets the day and then opens the 00:00 window in the same slot
+    freezer.move_to(midnight + timedelta(seconds=2))
+    async_fire_time_changed(hass, dt_util.utcnow())
+    await hass.async_block_till_done()
+    assert data._snapshots[0].snapshot_start == 0.0
+    await async_wait_recording_done(hass)
+    await hass.async_block_till_done()
+    await _record(hass, freezer, [(midnight + timedelta(minutes=30), "0.5")])
+    await hass.async_block_till_done()
+
+    assert data._resets_at_midnight is True
+    assert data._snapshots[0].snapshot_start == 0.0
+    assert hass.states.get("sensor.today_load_night").state == "0.5"
+
+
+async def test_recovered_start_above_current_value_is_rejected(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """[Regression] After a restart past midnight, a recorder value above the current reading is ignored."""
+    midnight = dt_util.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    await _record(
+        hass,
+        freezer,
+        [
+            (midnight - timedelta(minutes=5), "28.8"),
+            (midnight + timedelta(seconds=1), "0.0"),
+            (midnight + timedelta(minutes=30), "0.5"),
+        ],
+    )
+    entry = _night_entry("night_restart_entry_id")
+    entry.add_to_hass(hass)
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value=None,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        await async_wait_recording_done(hass)
+        await hass.async_block_till_done()
+    data = hass.data[DOMAIN][entry.entry_id]["today_load"]
+    assert data._recovering == set()
+    assert data._snapshots[0].snapshot_start == 0.0
+    assert hass.states.get("sensor.today_load_night").state == "0.5"
@@ -23,7 +23,7 @@ async def test_setup_and_unload_entry(
     """[Happy] Setting up and unloading a config entry via the core config entries interface."""
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
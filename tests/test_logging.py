@@ -54,7 +54,7 @@ async def test_setup_and_unload_logging(
         caplog.set_level(logging.DEBUG, logger=logger_name)
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -139,7 +139,7 @@ async def test_options_flow_save_logging(
     hass.states.async_set("sensor.today_load", "0")
     hass.states.async_set("sensor.today_import", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -174,7 +174,7 @@ async def test_sensor_setup_and_load_logging(
         caplog.set_level(logging.DEBUG, logger=logger_name)
     hass.states.async_set("sensor.today_load", "10.5")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -197,7 +197,7 @@ async def test_sensor_get_source_value_non_numeric_logging(
         caplog.set_level(logging.DEBUG, logger=logger_name)
     hass.states.async_set("sensor.today_load", "not_a_number")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -236,7 +236,7 @@ async def test_sensor_midnight_reset_logging(
         caplog.set_level(logging.DEBUG, logger=logger_name)
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -264,11 +264,11 @@ async def test_sensor_save_logging(
         caplog.set_level(logging.DEBUG, logger=logger_name)
     hass.states.async_set("sensor.today_load", "5.0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ), patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_save",
+        "custom_components.energy_window_tracker.storage.Store.async_save",
         new_callable=AsyncMock,
     ):
         assert await hass.config_entries.async_setup(mock_config_entry.entry_id)
@@ -304,7 +304,7 @@ async def test_sensor_cost_calc_fail_logging(
         caplog.set_level(logging.DEBUG, logger=logger_name)
     hass.states.async_set("sensor.today_load", "10")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -0,0 +1,131 @@
+"""Tests for the offline replay of exported source history."""
+
+from __future__ import annotations
+
+import io
+import json
+from datetime import date
+from pathlib import Path
+
+import pytest
+from homeassistant.util import dt as dt_util
+
+from custom_components.energy_window_tracker.replay import (
+    ReplayEngine,
+    _iter_json_objects,
+    iter_readings,
+    iter_rows,
+    main,
+)
+from custom_components.energy_window_tracker.sensor import _parse_windows
+
+CSV_EXPORT = """entity_id,state,last_changed
+sensor.other,99.0,2026-03-01T11:00:00.000Z
+sensor.today_load,1.0,2026-03-01T11:55:00.000Z
+sensor.today_load,2.0,2026-03-01T12:05:00.000Z
+sensor.today_load,unavailable,2026-03-01T13:00:00.000Z
+sensor.today_load,6.0,2026-03-01T14:05:00.000Z
+sensor.today_load,0.5,2026-03-02T00:05:00.000Z
+sensor.today_load,3.0,2026-03-02T12:00:00.000Z
+sensor.today_load,5.0,2026-03-02T13:00:00.000Z
+"""
+
+
+def _windows(*spans: tuple[str, str, str]):
+    windows, _ = _parse_windows(
+        {"windows": [{"name": name, "start": start, "end": end} for name, start, end in spans]}
+    )
+    return windows
+
+
+def test_replay_csv_day_totals() -> None:
+    """[Happy] Boundaries are interpolated between readings; each day is yielded once it is over."""
+    engine = ReplayEngine(_windows(("Peak", "12:00", "14:00"), ("Eve", "13:00", "14:00")), dt_util.UTC)
+    readings = iter_readings(iter_rows(io.StringIO(CSV_EXPORT), "csv"), "sensor.today_load")
+    results = list(engine.run(readings))
+    assert [r.day for r in results] == [date(2026, 3, 1), date(2026, 3, 2)]
+    # Start 1.5 (interpolated at 12:00); end 2.0 (readings around 14:00 are 2 h apart)
+    assert results[0].totals == {"Peak": 0.5, "Eve": 0.0}
+    # End after the last reading uses its value
+    assert results[1].totals == {"Peak": 2.0, "Eve": 0.0}
+
+
+def test_replay_json_streamed_and_resets() -> None:
+    """[Edge] Nested JSON arrays decode across small chunks; count_through_resets keeps energy before a reset."""
+    states = [
+        {"entity_id": "sensor.today_load", "state": state, "last_updated": when}
+        for state, when in (
+            ("10.0", "2026-03-01T12:00:00+00:00"),
+            ("14.0", "2026-03-01T12:30:00+00:00"),
+            ("1.0", "2026-03-01T12:40:00+00:00"),
+            ("3.0", "2026-03-01T14:00:00+00:00"),
+        )
+    ]
+    text = json.dumps([states])
+    rows = list(_iter_json_objects(io.StringIO(text), chunk_size=7))
+    assert rows == states
+
+    windows = _windows(("Peak", "12:00", "14:00"))
+    plain = ReplayEngine(windows, dt_util.UTC).run(iter_readings(rows))
+    assert [r.totals for r in plain] == [{"Peak": 0.0}]
+    through = ReplayEngine(windows, dt_util.UTC, count_through_resets=True).run(iter_readings(rows))
+    # 4.0 before the reset, then 3.0 counted from 0
+    assert [r.totals for r in through] == [{"Peak": 7.0}]
+
+
+def test_replay_cli(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    """[Happy] The CLI prints per-day rows and a total per window."""
+    export = tmp_path / "export.csv"
+    export.write_text(CSV_EXPORT, encoding="utf-8")
+    assert main([str(export), "--entity", "sensor.today_load", "--window", "Peak=12:00-14:00"]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        "date,window,kwh",
+        "2026-03-01,Peak,0.500",
+        "2026-03-02,Peak,2.000",
+        "total,Peak,2.500",
+    ]
+
+
+def test_replay_midnight_window_on_daily_counter() -> None:
+    """[Regression] A 00:00 window on a counter that resets at midnight starts from 0 every day."""
+    rows = io.StringIO(
+        "entity_id,state,last_changed\n"
+        + "".join(
+            f"sensor.today_load,{state},2026-03-0{day}T{when}Z\n"
+            for day in (1, 2, 3)
+            for when, state in (("00:05:00", "0.1"), ("06:55:00", "2.0"), ("23:55:00", "28.8"))
+        )
+    )
+    engine = ReplayEngine(_windows(("Night", "00:00", "07:00")), dt_util.UTC)
+    results = list(engine.run(iter_readings(iter_rows(rows, "csv"))))
+    # 2.0 at the 07:00 end (last reading before it), counted from 0.0 at midnight
+    assert [r.totals for r in results] == [{"Night": 2.0}] * 3
+
+
+def test_replay_late_window_ends_before_midnight_reset() -> None:
+    """[Regression] An end followed by a daily reset keeps the last reading, not the 0.0 after it."""
+    rows = io.StringIO(
+        "entity_id,state,last_changed\n"
+        + "".join(
+            f"sensor.today_load,{state},2026-03-0{day}T{when}Z\n"
+            for day in (1, 2)
+            for when, state in (("00:05:00", "0.05"), ("23:00:00", "10.0"), ("23:55:00", "11.0"))
+        )
+        + "sensor.today_load,0.05,2026-03-03T00:05:00Z\n"
+    )
+    engine = ReplayEngine(_windows(("Late", "23:00", "23:59")), dt_util.UTC)
+    results = list(engine.run(iter_readings(iter_rows(rows, "csv"))))
+    assert [r.totals for r in results[:2]] == [{"Late": 1.0}] * 2
+
+
+def test_replay_cli_reports_unreadable_export(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """[Error] Missing or undecodable exports are reported as usage errors, not tracebacks."""
+    for path, content in ((tmp_path / "missing.csv", None), (tmp_path / "bad.json", "[{\"state\": ")):
+        if content is not None:
+            path.write_text(content, encoding="utf-8")
+        with pytest.raises(SystemExit) as exc:
+            main([str(path), "--window", "Peak=12:00-14:00"])
+        assert exc.value.code == 2
+        assert str(path) in capsys.readouterr().err
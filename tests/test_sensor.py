@@ -6,15 +6,24 @@ https://developers.home-assistant.io/docs/development_testing/#writing-tests-for
 
 from __future__ import annotations
 
+from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, patch
 
 import pytest
+from freezegun.api import FrozenDateTimeFactory
 from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
+from homeassistant.core import CoreState, HomeAssistant, StateMachine
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.util import dt as dt_util
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.energy_window_tracker.totals import DailyTotals
 
 
 def _get_tracker_sensors(hass: HomeAssistant, entry_id: str) -> list:
@@ -50,7 +59,7 @@ async def test_sensor_setup_creates_entities(
     """[Happy] async_setup_entry creates one sensor per window when store is empty."""
     hass.states.async_set("sensor.today_load", "10.5")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -74,7 +83,7 @@ async def test_sensor_attributes(
     """[Happy] Sensor exposes source_entity, status, ranges (start, end) when source is available."""
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -102,7 +111,7 @@ async def test_sensor_setup_when_store_returns_none_creates_entity(
     """[Unhappy] When Store.async_load returns None, setup does not crash and one entity is created."""
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value=None,
     ):
@@ -122,7 +131,7 @@ async def test_sensor_when_source_unavailable_entity_has_attributes(
     """[Unhappy] When source is unavailable, entity still exists and exposes source_entity and ranges."""
     hass.states.async_set("sensor.today_load", "unavailable")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -163,7 +172,7 @@ async def test_unique_ids_stable_when_windows_reordered(hass: HomeAssistant) ->
     entry.add_to_hass(hass)
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -197,7 +206,7 @@ async def test_unique_ids_stable_when_windows_reordered(hass: HomeAssistant) ->
 
     assert await hass.config_entries.async_unload(entry.entry_id)
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -232,7 +241,7 @@ async def test_unique_ids_do_not_collide_when_names_slugify_same(hass: HomeAssis
     entry.add_to_hass(hass)
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -269,7 +278,7 @@ async def test_cost_attributes_present_when_rate_configured_before_window(hass:
     hass.states.async_set("sensor.today_load", "5.0")
     before_window = dt_util.now().replace(hour=8, minute=0, second=0, microsecond=0)
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ), patch(
@@ -297,7 +306,7 @@ async def test_late_snapshot_uses_zero_baseline_and_shows_current_total(
     # stale snapshot_date forces "during_window (no snapshot)" path before late snapshot runs
     stored = {"snapshot_date": "2020-01-01", "windows": {}}
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value=stored,
     ), patch(
@@ -348,7 +357,7 @@ async def test_sensor_exposes_config_warnings_for_invalid_stored_times(hass: Hom
     entry.add_to_hass(hass)
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -402,7 +411,7 @@ async def test_preserves_existing_unique_id_from_registry_when_original_name_has
 
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -438,7 +447,7 @@ async def test_renaming_one_window_does_not_change_others_unique_ids(hass: HomeA
     entry.add_to_hass(hass)
     hass.states.async_set("sensor.today_load", "0")
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -469,7 +478,7 @@ async def test_renaming_one_window_does_not_change_others_unique_ids(hass: HomeA
 
     assert await hass.config_entries.async_unload(entry.entry_id)
     with patch(
-        "custom_components.energy_window_tracker.sensor.Store.async_load",
+        "custom_components.energy_window_tracker.storage.Store.async_load",
         new_callable=AsyncMock,
         return_value={},
     ):
@@ -482,3 +491,1287 @@ async def test_renaming_one_window_does_not_change_others_unique_ids(hass: HomeA
     # Renamed window should result in a different entity_id and unique_id.
     assert "sensor.today_load_super_peak" in after
     assert after["sensor.today_load_super_peak"] != initial["sensor.today_load_peak"]
+
+
+@pytest.mark.asyncio
+async def test_window_sensors_share_one_source_listener(hass: HomeAssistant) -> None:
+    """[Happy] All window sensors of a source share one state listener and all update on change."""
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Shared",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [
+                        {"name": "Peak", "start": "09:00", "end": "12:00"},
+                        {"name": "Off-Peak", "start": "12:00", "end": "17:00"},
+                        {"name": "Night", "start": "00:00", "end": "06:00"},
+                    ],
+                }
+            ]
+        },
+        options={},
+        entry_id="shared_listener_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "1.0")
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={},
+    ), patch(
+        "custom_components.energy_window_tracker.sensor.async_track_state_change_event",
+        wraps=async_track_state_change_event,
+    ) as mock_track:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    assert len(_get_tracker_sensors(hass, entry.entry_id)) == 3
+    assert mock_track.call_count == 1
+    data = hass.data["energy_window_tracker"][entry.entry_id]["today_load"]
+    assert len(data._update_callbacks) == 3
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert data._update_callbacks == []
+    assert data._unsub_source is None
+
+
+@pytest.mark.asyncio
+async def test_boundary_scheduler_batches_boundaries_at_same_time(hass: HomeAssistant) -> None:
+    """[Happy] One timer serves all windows; an end and a start at 12:00 fire in one batch."""
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Scheduler",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [
+                        {"name": "Peak", "start": "09:00", "end": "12:00"},
+                        {"name": "Off-Peak", "start": "12:00", "end": "17:00"},
+                    ],
+                }
+            ]
+        },
+        options={},
+        entry_id="scheduler_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "4.0")
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={},
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    scheduler = hass.data["energy_window_tracker_scheduler"]
+    # Midnight reset plus 09:00, 12:00 and 17:00 boundaries, one slot each
+    assert scheduler._slots == [2, 9 * 3600, 12 * 3600, 17 * 3600]
+    data = hass.data["energy_window_tracker"][entry.entry_id]["today_load"]
+    peak, off_peak = data._windows
+
+    noon = dt_util.now(data._tz).replace(hour=12, minute=0, second=0, microsecond=0)
+    scheduler._arm(noon - timedelta(minutes=1))
+    assert scheduler._next_fire == noon
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_delay_save",
+    ) as mock_save, patch(
+        "custom_components.energy_window_tracker.sensor.dt_util.now",
+        return_value=noon,
+    ):
+        async_fire_time_changed(hass, noon)
+        await hass.async_block_till_done()
+    assert data._snapshots[peak.index].snapshot_end == 4.0
+    assert data._snapshots[off_peak.index].snapshot_start == 4.0
+    # One snapshot write for the batch, plus one totals write for Peak's end
+    assert mock_save.call_count == 2
+    assert scheduler._next_fire == noon.replace(hour=17)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    assert scheduler._unsub_timer is None
+
+
+@pytest.mark.asyncio
+async def test_midnight_window_start_fires_after_midnight_reset(hass: HomeAssistant) -> None:
+    """[Regression] A 00:00 window start shares the midnight slot and is not wiped by the reset."""
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Night",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.meter",
+                    "name": "Energy",
+                    "windows": [{"name": "Night", "start": "00:00", "end": "06:00"}],
+                }
+            ]
+        },
+        options={},
+        entry_id="midnight_start_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.meter", "100.0")
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={},
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    scheduler = hass.data["energy_window_tracker_scheduler"]
+    assert scheduler._slots == [2, 6 * 3600]
+    data = hass.data["energy_window_tracker"][entry.entry_id]["meter"]
+    window = data._windows[0]
+
+    midnight = dt_util.now(data._tz).replace(hour=0, minute=0, second=0, microsecond=0)
+    fired = midnight + timedelta(seconds=2)
+    scheduler._arm(midnight - timedelta(minutes=1))
+    assert scheduler._next_fire == fired
+    with patch(
+        "custom_components.energy_window_tracker.sensor.dt_util.now",
+        return_value=fired,
+    ):
+        async_fire_time_changed(hass, fired)
+        await hass.async_block_till_done()
+    assert data._snapshots[window.index].snapshot_start == 100.0
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_midnight_window_counts_from_daily_reset_after_midnight_slot(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """[Regression] A daily counter resetting after the 00:00:02 slot starts the window from 0."""
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Night",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.meter",
+                    "name": "Energy",
+                    "windows": [{"name": "Night", "start": "00:00", "end": "06:00"}],
+                }
+            ]
+        },
+        options={},
+        entry_id="late_reset_entry_id",
+    )
+    entry.add_to_hass(hass)
+    midnight = dt_util.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    freezer.move_to(midnight - timedelta(minutes=1))
+    hass.states.async_set("sensor.meter", "20.0")
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value=None,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    data = hass.data["energy_window_tracker"][entry.entry_id]["meter"]
+    window = data._windows[0]
+
+    freezer.move_to(midnight + timedelta(seconds=2))
+    async_fire_time_changed(hass, dt_util.utcnow())
+    await hass.async_block_till_done()
+    assert data._snapshots[window.index].snapshot_start == 20.0
+
+    freezer.move_to(midnight + timedelta(seconds=10))
+    hass.states.async_set("sensor.meter", "0.05")
+    await hass.async_block_till_done()
+    assert data._snapshots[window.index].snapshot_start == 0.0
+    freezer.move_to(midnight + timedelta(hours=1))
+    hass.states.async_set("sensor.meter", "1.0")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.meter_night").state == "1.0"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_boundary_in_dst_gap_fires_after_gap_without_skipping_slots(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """[Edge] A 02:30 boundary on a spring-forward day fires at 03:30 and the 03:15 slot still follows."""
+    await hass.config.async_update(time_zone="America/New_York")
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Gap",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [{"name": "Gap", "start": "02:30", "end": "03:15"}],
+                }
+            ]
+        },
+        options={},
+        entry_id="dst_gap_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "4.0")
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={},
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    scheduler = hass.data["energy_window_tracker_scheduler"]
+    data = hass.data["energy_window_tracker"][entry.entry_id]["today_load"]
+    # 2024-03-10: clocks jump from 02:00 EST to 03:00 EDT, so 02:30 does not exist
+    before_gap = datetime(2024, 3, 10, 1, 59, tzinfo=data._tz)
+    scheduler._arm(before_gap)
+    fired = scheduler._next_fire
+    assert fired == datetime(2024, 3, 10, 7, 30, tzinfo=dt_util.UTC)
+    assert (fired.hour, fired.minute) == (3, 30)
+    assert fired.utcoffset() == timedelta(hours=-4)
+
+    freezer.move_to(fired)
+    async_fire_time_changed(hass, fired)
+    await hass.async_block_till_done()
+    # The 03:15 end (already past at 03:30) fires right after the start instead of being skipped
+    snap = data._snapshots[data._windows[0].index]
+    assert (snap.snapshot_start, snap.snapshot_end) == (4.0, 4.0)
+    assert scheduler._next_slot == (before_gap.date() + timedelta(days=1), 2)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_writes_coalesced_and_flushed_on_unload(hass: HomeAssistant) -> None:
+    """[Happy] A burst of snapshots is one delayed write; unload flushes it immediately."""
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Coalesce",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [
+                        {"name": "Peak", "start": "09:00", "end": "12:00"},
+                        {"name": "Off-Peak", "start": "12:00", "end": "17:00"},
+                    ],
+                }
+            ]
+        },
+        options={"save_delay": 60},
+        entry_id="coalesce_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "3.0")
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={},
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    data = hass.data["energy_window_tracker"][entry.entry_id]["today_load"]
+    assert data._save_delay == 60
+
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_save",
+        new_callable=AsyncMock,
+    ) as mock_save:
+        for window in data._windows:
+            data._handle_window_start(window, dt_util.now())
+        await hass.async_block_till_done()
+        assert mock_save.call_count == 0
+        assert data._save_pending
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+    assert mock_save.call_count == 1
+    saved = mock_save.call_args[0][0]["sources"]["coalesce_entry_id/today_load"]
+    assert saved["windows"]["0"]["snapshot_start"] == 3.0
+    assert saved["windows"]["1"]["snapshot_start"] == 3.0
+    assert not data._save_pending
+
+
+@pytest.mark.asyncio
+async def test_time_zone_resolved_once_and_updated_live(hass: HomeAssistant) -> None:
+    """[Happy] All sources share one resolved time zone; a core config change updates them live."""
+    entries = []
+    for entry_id, source in (("tz_entry_a", "sensor.today_load"), ("tz_entry_b", "sensor.today_import")):
+        entry = MockConfigEntry(
+            domain="energy_window_tracker",
+            title=entry_id,
+            data={
+                "sources": [
+                    {
+                        "source_entity": source,
+                        "name": "Energy",
+                        "windows": [{"name": "Peak", "start": "09:00", "end": "17:00"}],
+                    }
+                ]
+            },
+            options={},
+            entry_id=entry_id,
+        )
+        entry.add_to_hass(hass)
+        entries.append(entry)
+        hass.states.async_set(source, "0")
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={},
+    ), patch(
+        "custom_components.energy_window_tracker.sensor.dt_util.get_time_zone",
+        wraps=dt_util.get_time_zone,
+    ) as mock_get_tz:
+        # Setting up the first entry sets up the domain, which loads both entries
+        assert await hass.config_entries.async_setup(entries[0].entry_id)
+        await hass.async_block_till_done()
+        assert mock_get_tz.call_count == 1
+
+        data_a = hass.data["energy_window_tracker"]["tz_entry_a"]["today_load"]
+        data_b = hass.data["energy_window_tracker"]["tz_entry_b"]["today_import"]
+        assert data_a._tz is data_b._tz
+
+        await hass.config.async_update(time_zone="Asia/Tokyo")
+        await hass.async_block_till_done()
+    assert str(data_a._tz) == "Asia/Tokyo"
+    assert data_b._tz is data_a._tz
+    scheduler = hass.data["energy_window_tracker_scheduler"]
+    assert scheduler._next_fire.tzinfo is data_a._tz
+
+
+def test_parse_windows_compiles_table_with_minute_offsets_and_active_lookup() -> None:
+    """[Happy] Parsed windows are an immutable table; active windows are found by bisect."""
+    from custom_components.energy_window_tracker.sensor import _parse_windows
+
+    table, warnings = _parse_windows(
+        {
+            "windows": [
+                {"name": "Morning", "start": "06:00", "end": "09:30"},
+                {"name": "Day", "start": "09:00", "end": "17:00"},
+                {"name": "Evening", "start": "17:00", "end": "21:00"},
+            ]
+        }
+    )
+    assert warnings == {}
+    morning, day, evening = table
+    assert len(table) == 3 and table[1] is day
+    assert (morning.start_min, morning.end_min) == (360, 570)
+    assert table.get(2) is evening and table.get(5) is None
+    with pytest.raises(AttributeError):
+        day.start_h = 10  # type: ignore[misc]
+
+    assert table.active_at(0) == ()
+    assert table.active_at(360) == (morning,)
+    assert table.active_at(545) == (morning, day)
+    assert table.active_at(570) == (day,)
+    assert table.active_at(1020) == (evening,)
+    assert table.active_at(1260) == ()
+
+
+@pytest.mark.asyncio
+async def test_source_value_parsed_once_per_state_change(hass: HomeAssistant) -> None:
+    """[Happy] A state change is parsed once and shared by every range and sensor of the source."""
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Parse once",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [
+                        {"name": "Off-Peak", "start": "00:00", "end": "07:00"},
+                        {"name": "Off-Peak", "start": "22:00", "end": "23:59"},
+                        {"name": "Peak", "start": "07:00", "end": "22:00"},
+                    ],
+                }
+            ]
+        },
+        options={},
+        entry_id="parse_once_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "1.0")
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={},
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    data = hass.data["energy_window_tracker"][entry.entry_id]["today_load"]
+
+    with patch.object(
+        StateMachine, "get", autospec=True, side_effect=StateMachine.get
+    ) as mock_get, patch.object(
+        data, "_parse_source_state", wraps=data._parse_source_state
+    ) as mock_parse:
+        hass.states.async_set("sensor.today_load", "2.5")
+        await hass.async_block_till_done()
+    assert mock_parse.call_count == 1
+    assert not [c for c in mock_get.call_args_list if c.args[1:] == ("sensor.today_load",)]
+    assert data.get_source_value() == 2.5
+    assert data.source_last_updated == hass.states.get("sensor.today_load").last_updated
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    hass.states.async_set("sensor.today_load", "3.0")
+    assert data.get_source_value() == 3.0
+
+
+@pytest.mark.asyncio
+async def test_update_pass_reads_clock_once_for_all_ranges_and_sensors(
+    hass: HomeAssistant,
+) -> None:
+    """[Happy] One source change reads the clock once; every range sees the same instant."""
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Clock once",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [
+                        {"name": "Off-Peak", "start": "00:00", "end": "07:00"},
+                        {"name": "Off-Peak", "start": "22:00", "end": "23:59"},
+                        {"name": "Peak", "start": "07:00", "end": "22:00"},
+                    ],
+                }
+            ]
+        },
+        options={},
+        entry_id="clock_once_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "1.0")
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={},
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    data = hass.data["energy_window_tracker"][entry.entry_id]["today_load"]
+
+    with patch(
+        "custom_components.energy_window_tracker.sensor.dt_util.now",
+        wraps=dt_util.now,
+    ) as mock_now:
+        hass.states.async_set("sensor.today_load", "2.0")
+        await hass.async_block_till_done()
+    assert mock_now.call_count == 1
+    assert data._context is None
+
+    with data.evaluation_pass() as ctx:
+        with data.evaluation_pass() as inner:
+            assert inner is ctx
+        assert data.evaluation_context() is ctx
+        assert ctx.minute_of_day == ctx.now.hour * 60 + ctx.now.minute
+        assert ctx.date == ctx.now.date().isoformat()
+    assert data._context is None
+
+
+@pytest.mark.asyncio
+async def test_cost_sensors_option_moves_cost_off_energy_attributes(hass: HomeAssistant) -> None:
+    """[Happy] With cost_sensors on, cost is a monetary sensor and energy attributes stay static."""
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Cost sensors",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [
+                        {"name": "Peak", "start": "09:00", "end": "17:00", "cost_per_kwh": 0.5},
+                        {"name": "Night", "start": "00:00", "end": "06:00"},
+                    ],
+                }
+            ]
+        },
+        options={"cost_sensors": True},
+        entry_id="cost_sensors_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "5.0")
+    noon = dt_util.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={
+            "sources": {
+                "cost_sensors_entry_id/today_load": {
+                    "snapshot_date": noon.date().isoformat(),
+                    "windows": {"0": {"snapshot_start": 1.0, "snapshot_end": None}},
+                }
+            }
+        },
+    ), patch(
+        "custom_components.energy_window_tracker.sensor.dt_util.now",
+        return_value=noon,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+        # Peak energy, Peak cost, Night energy (no rate, so no cost sensor)
+        assert len(_get_tracker_sensors(hass, entry.entry_id)) == 3
+        energy = hass.states.get("sensor.today_load_peak")
+        cost = hass.states.get("sensor.today_load_peak_cost")
+        assert energy.state == "4.0"
+        assert "cost" not in energy.attributes
+        assert energy.attributes["cost_per_kwh"] == 0.5
+        assert cost.state == "2.0"
+        assert cost.attributes["device_class"] == "monetary"
+        assert cost.attributes["unit_of_measurement"] == hass.config.currency
+        assert cost.attributes["friendly_name"] == "Peak cost"
+        assert hass.states.get("sensor.today_load_night_cost") is None
+
+        hass.states.async_set("sensor.today_load", "7.0")
+        await hass.async_block_till_done()
+        new_energy = hass.states.get("sensor.today_load_peak")
+    assert new_energy.state == "6.0"
+    assert new_energy.attributes == energy.attributes
+    assert hass.states.get("sensor.today_load_peak_cost").state == "3.0"
+
+
+async def test_cost_sensor_last_reset_follows_midnight_rollover(hass: HomeAssistant) -> None:
+    """[Happy] The cost sensor's last_reset is local midnight of its day and moves at the rollover."""
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Cost reset",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [
+                        {"name": "Peak", "start": "09:00", "end": "17:00", "cost_per_kwh": 0.5}
+                    ],
+                }
+            ]
+        },
+        options={"cost_sensors": True},
+        entry_id="cost_reset_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "5.0")
+    noon = dt_util.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    midnight = noon.replace(hour=0)
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={
+            "sources": {
+                "cost_reset_entry_id/today_load": {
+                    "snapshot_date": noon.date().isoformat(),
+                    "windows": {"0": {"snapshot_start": 1.0, "snapshot_end": None}},
+                }
+            }
+        },
+    ), patch(
+        "custom_components.energy_window_tracker.sensor.dt_util.now",
+        return_value=noon,
+    ) as mock_now:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        cost = hass.states.get("sensor.today_load_peak_cost")
+        assert cost.state == "2.0"
+        assert cost.attributes["state_class"] == "total"
+        assert cost.attributes["last_reset"] == midnight.isoformat()
+
+        tomorrow = midnight + timedelta(days=1, seconds=2)
+        mock_now.return_value = tomorrow
+        data = hass.data["energy_window_tracker"][entry.entry_id]["today_load"]
+        data._handle_midnight(tomorrow)
+        await hass.async_block_till_done()
+    cost = hass.states.get("sensor.today_load_peak_cost")
+    assert cost.state == "0.0"
+    assert cost.attributes["last_reset"] == (midnight + timedelta(days=1)).isoformat()
+
+
+@pytest.mark.asyncio
+async def test_options_change_applied_live_without_reload(hass: HomeAssistant) -> None:
+    """[Happy] Editing windows updates only the affected sensors; untouched snapshots are kept."""
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Hot apply",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [
+                        {"name": "Night", "start": "00:00", "end": "06:00"},
+                        {"name": "Peak", "start": "09:00", "end": "17:00"},
+                        {"name": "Evening", "start": "17:00", "end": "21:00"},
+                    ],
+                }
+            ]
+        },
+        options={},
+        entry_id="hot_apply_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "5.0")
+    noon = dt_util.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={
+            "sources": {
+                "hot_apply_entry_id/today_load": {
+                    "snapshot_date": noon.date().isoformat(),
+                    "windows": {
+                        "0": {"snapshot_start": 0.5, "snapshot_end": 1.5},
+                        "1": {"snapshot_start": 2.0, "snapshot_end": None},
+                    },
+                }
+            }
+        },
+    ), patch(
+        "custom_components.energy_window_tracker.sensor.dt_util.now",
+        return_value=noon,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        data = hass.data["energy_window_tracker"][entry.entry_id]["today_load"]
+        night_sensor = data.entities.sensors["Night"]
+        assert hass.states.get("sensor.today_load_peak").state == "3.0"
+
+        with patch.object(
+            hass.config_entries, "async_reload", new_callable=AsyncMock
+        ) as mock_reload:
+            hass.config_entries.async_update_entry(
+                entry,
+                options={
+                    "sources": [
+                        {
+                            "source_entity": "sensor.today_load",
+                            "name": "Energy",
+                            "windows": [
+                                {"name": "Peak", "start": "09:00", "end": "18:00"},
+                                {"name": "Night", "start": "00:00", "end": "06:00"},
+                                {"name": "Late", "start": "22:00", "end": "23:00"},
+                            ],
+                        }
+                    ]
+                },
+            )
+            await hass.async_block_till_done()
+        assert mock_reload.call_count == 0
+
+        assert hass.data["energy_window_tracker"][entry.entry_id]["today_load"] is data
+        assert data.entities.sensors["Night"] is night_sensor
+        peak, night, late = data._windows
+        # Night unchanged: both snapshots moved to its new index
+        assert data._snapshots[night.index].snapshot_start == 0.5
+        assert data._snapshots[night.index].snapshot_end == 1.5
+        # Peak only moved its end: the start snapshot is kept, so it keeps counting
+        assert data._snapshots[peak.index].snapshot_start == 2.0
+        peak_state = hass.states.get("sensor.today_load_peak")
+        assert peak_state.state == "3.0"
+        assert peak_state.attributes["ranges"] == [{"start": "09:00", "end": "18:00"}]
+        assert data._snapshots[late.index].snapshot_start is None
+
+    assert hass.states.get("sensor.today_load_evening") is None
+    registry = er.async_get(hass)
+    assert registry.async_get("sensor.today_load_evening") is None
+    assert hass.states.get("sensor.today_load_late") is not None
+    scheduler = hass.data["energy_window_tracker_scheduler"]
+    assert 18 * 3600 in scheduler._slots and 17 * 3600 not in scheduler._slots
+
+
+@pytest.mark.asyncio
+async def test_orphans_removed_in_one_batch_after_start(hass: HomeAssistant) -> None:
+    """[Happy] Registry is read once per entry; orphans of all entries are removed once HA started."""
+    registry = er.async_get(hass)
+    entries = []
+    for entry_id, source in (("orphan_entry_a", "sensor.today_load"), ("orphan_entry_b", "sensor.today_import")):
+        entry = MockConfigEntry(
+            domain="energy_window_tracker",
+            title=entry_id,
+            data={
+                "sources": [
+                    {
+                        "source_entity": source,
+                        "name": "Energy",
+                        "windows": [{"name": "Peak", "start": "09:00", "end": "17:00"}],
+                    }
+                ]
+            },
+            options={},
+            entry_id=entry_id,
+        )
+        entry.add_to_hass(hass)
+        entries.append(entry)
+        hass.states.async_set(source, "0")
+        registry.async_get_or_create(
+            "sensor",
+            "energy_window_tracker",
+            f"{entry_id}_gone_window",
+            config_entry=entry,
+            suggested_object_id=f"{entry_id}_gone",
+        )
+
+    hass.state = CoreState.starting
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={},
+    ), patch.object(
+        registry.entities,
+        "get_entries_for_config_entry_id",
+        wraps=registry.entities.get_entries_for_config_entry_id,
+    ) as mock_walk:
+        assert await hass.config_entries.async_setup(entries[0].entry_id)
+        await hass.async_block_till_done()
+    assert mock_walk.call_count == 2
+    assert registry.async_get("sensor.orphan_entry_a_gone") is not None
+    assert registry.async_get("sensor.orphan_entry_b_gone") is not None
+    assert len(hass.data["energy_window_tracker_orphans"]._pending) == 2
+
+    hass.state = CoreState.running
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+    assert registry.async_get("sensor.orphan_entry_a_gone") is None
+    assert registry.async_get("sensor.orphan_entry_b_gone") is None
+    assert registry.async_get("sensor.today_load_peak") is not None
+    assert hass.data["energy_window_tracker_orphans"]._pending == {}
+
+
+@pytest.mark.asyncio
+async def test_source_change_writes_changed_sensors_in_one_batch(hass: HomeAssistant) -> None:
+    """[Happy] A source change flushes all sensors once and skips those whose rendering is unchanged."""
+    from custom_components.energy_window_tracker.sensor import WindowEnergySensor
+
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Batch",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [
+                        {"name": "Night", "start": "00:00", "end": "06:00"},
+                        {"name": "Peak", "start": "09:00", "end": "12:00"},
+                        {"name": "Off-Peak", "start": "12:00", "end": "17:00"},
+                    ],
+                }
+            ]
+        },
+        options={},
+        entry_id="batch_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "5.0")
+    afternoon = dt_util.now().replace(hour=13, minute=0, second=0, microsecond=0)
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={
+            "sources": {
+                "batch_entry_id/today_load": {
+                    "snapshot_date": afternoon.date().isoformat(),
+                    "windows": {
+                        "0": {"snapshot_start": 0.0, "snapshot_end": 0.5},
+                        "1": {"snapshot_start": 1.0, "snapshot_end": 4.0},
+                        "2": {"snapshot_start": 4.0, "snapshot_end": None},
+                    },
+                }
+            }
+        },
+    ), patch(
+        "custom_components.energy_window_tracker.sensor.dt_util.now",
+        return_value=afternoon,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        data = hass.data["energy_window_tracker"][entry.entry_id]["today_load"]
+
+        with patch.object(
+            data.writer, "_async_flush", wraps=data.writer._async_flush
+        ) as mock_flush, patch.object(
+            WindowEnergySensor, "async_write_ha_state", autospec=True
+        ) as mock_write:
+            hass.states.async_set("sensor.today_load", "6.0")
+            hass.states.async_set("sensor.today_load", "6.0", {"unit_of_measurement": "kWh"})
+            await hass.async_block_till_done()
+    # Two source events, one flush; only Off-Peak (during its window) rendered differently
+    assert mock_flush.call_count == 1
+    assert [call.args[0]._window_name for call in mock_write.call_args_list] == ["Off-Peak"]
+    assert data.writer._dirty == {}
+
+
+@pytest.mark.asyncio
+async def test_min_delta_and_interval_hold_back_writes_until_boundary(hass: HomeAssistant) -> None:
+    """[Happy] Small or too-frequent changes are held back; the interval and window end write them."""
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Hysteresis",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [{"name": "Peak", "start": "12:00", "end": "17:00"}],
+                }
+            ]
+        },
+        options={"min_delta": 0.5, "min_interval": 60},
+        entry_id="hysteresis_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "5.0")
+    afternoon = dt_util.now().replace(hour=13, minute=0, second=0, microsecond=0)
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={
+            "sources": {
+                "hysteresis_entry_id/today_load": {
+                    "snapshot_date": afternoon.date().isoformat(),
+                    "windows": {"0": {"snapshot_start": 4.0, "snapshot_end": None}},
+                }
+            }
+        },
+    ), patch(
+        "custom_components.energy_window_tracker.sensor.dt_util.now",
+        return_value=afternoon,
+    ) as mock_now:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.today_load_peak").state == "1.0"
+
+        # Below min_delta: held back
+        hass.states.async_set("sensor.today_load", "5.2")
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.today_load_peak").state == "1.0"
+
+        # Enough change but within min_interval: held back until the interval has passed
+        hass.states.async_set("sensor.today_load", "5.6")
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.today_load_peak").state == "1.0"
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=61))
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.today_load_peak").state == "1.6"
+
+        # Window end writes the exact final total at once
+        hass.states.async_set("sensor.today_load", "5.7")
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.today_load_peak").state == "1.6"
+        mock_now.return_value = afternoon.replace(hour=17)
+        data = hass.data["energy_window_tracker"][entry.entry_id]["today_load"]
+        data._handle_window_end(data._windows[0], mock_now.return_value)
+        await hass.async_block_till_done()
+    state = hass.states.get("sensor.today_load_peak")
+    assert state.state == "1.7"
+    assert state.attributes["status"] == "after_window"
+
+
+async def test_min_delta_holds_back_writes_of_rated_window(hass: HomeAssistant) -> None:
+    """[Regression] The cost attribute follows the value, so it does not bypass min_delta."""
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Hysteresis cost",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [
+                        {"name": "Peak", "start": "12:00", "end": "17:00", "cost_per_kwh": 0.3}
+                    ],
+                }
+            ]
+        },
+        options={"min_delta": 1.0, "min_interval": 600},
+        entry_id="hysteresis_cost_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "5.0")
+    afternoon = dt_util.now().replace(hour=13, minute=0, second=0, microsecond=0)
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={
+            "sources": {
+                "hysteresis_cost_entry_id/today_load": {
+                    "snapshot_date": afternoon.date().isoformat(),
+                    "windows": {"0": {"snapshot_start": 4.0, "snapshot_end": None}},
+                }
+            }
+        },
+    ), patch(
+        "custom_components.energy_window_tracker.sensor.dt_util.now",
+        return_value=afternoon,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        state = hass.states.get("sensor.today_load_peak")
+        assert (state.state, state.attributes["cost"]) == ("1.0", 0.3)
+
+        for value in ("5.1", "5.2", "5.3", "5.4", "5.5"):
+            hass.states.async_set("sensor.today_load", value)
+            await hass.async_block_till_done()
+        state = hass.states.get("sensor.today_load_peak")
+        assert (state.state, state.attributes["cost"]) == ("1.0", 0.3)
+
+        # Once the value is written, cost is written with it
+        hass.states.async_set("sensor.today_load", "6.0")
+        await hass.async_block_till_done()
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=601))
+        await hass.async_block_till_done()
+    state = hass.states.get("sensor.today_load_peak")
+    assert (state.state, state.attributes["cost"]) == ("2.0", 0.6)
+
+
+async def test_frozen_windows_sleep_until_next_boundary(hass: HomeAssistant) -> None:
+    """[Happy] Sensors before or after their window skip source updates until a boundary wakes them."""
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Sleep",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [
+                        {"name": "Morning", "start": "06:00", "end": "09:00"},
+                        {"name": "Peak", "start": "12:00", "end": "17:00"},
+                        {"name": "Evening", "start": "18:00", "end": "20:00"},
+                    ],
+                }
+            ]
+        },
+        entry_id="sleep_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "5.0")
+    afternoon = dt_util.now().replace(hour=13, minute=0, second=0, microsecond=0)
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={
+            "sources": {
+                "sleep_entry_id/today_load": {
+                    "snapshot_date": afternoon.date().isoformat(),
+                    "windows": {
+                        "0": {"snapshot_start": 1.0, "snapshot_end": 2.5},
+                        "1": {"snapshot_start": 4.0, "snapshot_end": None},
+                    },
+                }
+            }
+        },
+    ), patch(
+        "custom_components.energy_window_tracker.sensor.dt_util.now",
+        return_value=afternoon,
+    ) as mock_now:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        data = hass.data["energy_window_tracker"][entry.entry_id]["today_load"]
+        peak = data.entities.sensors["Peak"]
+        assert len(data._update_callbacks) == 3
+        assert list(data._awake_callbacks) == [peak._handle_data_update]
+
+        hass.states.async_set("sensor.today_load", "5.5")
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.today_load_peak").state == "1.5"
+        assert hass.states.get("sensor.today_load_morning").state == "1.5"
+        assert hass.states.get("sensor.today_load_evening").state == "0.0"
+
+        # Source going unavailable reaches sleeping sensors too
+        hass.states.async_set("sensor.today_load", "unavailable")
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.today_load_morning").state == "unknown"
+        hass.states.async_set("sensor.today_load", "5.6")
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.today_load_morning").state == "1.5"
+        assert list(data._awake_callbacks) == [peak._handle_data_update]
+
+        # Window end freezes Peak; the Evening start wakes Evening
+        mock_now.return_value = afternoon.replace(hour=17)
+        data._handle_window_end(data._windows[1], mock_now.return_value)
+        await hass.async_block_till_done()
+        assert data._awake_callbacks == {}
+        mock_now.return_value = afternoon.replace(hour=18)
+        data._handle_window_start(data._windows[2], mock_now.return_value)
+        await hass.async_block_till_done()
+        evening = data.entities.sensors["Evening"]
+        assert list(data._awake_callbacks) == [evening._handle_data_update]
+        hass.states.async_set("sensor.today_load", "6.0")
+        await hass.async_block_till_done()
+    assert hass.states.get("sensor.today_load_evening").state == "0.4"
+    assert hass.states.get("sensor.today_load_peak").state == "1.6"
+
+
+async def test_boundary_snapshots_interpolated_between_readings(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """[Happy] Snapshots use the value at the boundary instant, not the stale or late reading."""
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Interpolate",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [{"name": "Peak", "start": "12:00", "end": "17:00"}],
+                }
+            ]
+        },
+        entry_id="interpolate_entry_id",
+    )
+    entry.add_to_hass(hass)
+    noon = dt_util.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    freezer.move_to(noon - timedelta(minutes=2))
+    hass.states.async_set("sensor.today_load", "10.0")
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value=None,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    data = hass.data["energy_window_tracker"][entry.entry_id]["today_load"]
+    window = data._windows[0]
+
+    # Late timer: readings on both sides of 12:00 are already buffered
+    freezer.move_to(noon + timedelta(minutes=2))
+    hass.states.async_set("sensor.today_load", "10.4")
+    await hass.async_block_till_done()
+    freezer.move_to(noon + timedelta(minutes=3))
+    data._handle_window_start(window, dt_util.now())
+    await hass.async_block_till_done()
+    assert data._snapshots[window.index].snapshot_start == pytest.approx(10.2)
+
+    # On-time timer with a stale reading: provisional snapshot, refined by the next reading
+    end = noon.replace(hour=17)
+    freezer.move_to(end - timedelta(minutes=5))
+    hass.states.async_set("sensor.today_load", "20.0")
+    await hass.async_block_till_done()
+    freezer.move_to(end)
+    data._handle_window_end(window, dt_util.now())
+    await hass.async_block_till_done()
+    assert data._snapshots[window.index].snapshot_end == 20.0
+    freezer.move_to(end + timedelta(minutes=5))
+    hass.states.async_set("sensor.today_load", "21.0")
+    await hass.async_block_till_done()
+    assert data._snapshots[window.index].snapshot_end == pytest.approx(20.5)
+    state = hass.states.get("sensor.today_load_peak")
+    assert state.state == "10.3"
+    assert state.attributes["status"] == "after_window"
+
+    # Later readings leave the refined snapshot alone
+    hass.states.async_set("sensor.today_load", "22.0")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.today_load_peak").state == "10.3"
+
+
+async def test_checkpoint_resumes_missed_start_and_reset_while_down(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """[Happy] A checkpoint stands in for a missed start snapshot and carries energy over a reset."""
+    for entry_id, source_entity in (
+        ("reset_entry_id", "sensor.today_load"),
+        ("resume_entry_id", "sensor.grid_import"),
+    ):
+        MockConfigEntry(
+            domain="energy_window_tracker",
+            title=entry_id,
+            data={
+                "sources": [
+                    {
+                        "source_entity": source_entity,
+                        "name": "Energy",
+                        "windows": [{"name": "Peak", "start": "12:00", "end": "17:00"}],
+                    }
+                ]
+            },
+            options={"checkpoint_interval": 15},
+            entry_id=entry_id,
+        ).add_to_hass(hass)
+    afternoon = dt_util.now().replace(hour=13, minute=0, second=0, microsecond=0)
+    noon = afternoon.replace(hour=12)
+    freezer.move_to(afternoon)
+    hass.states.async_set("sensor.today_load", "1.0")
+    hass.states.async_set("sensor.grid_import", "10.0")
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={
+            "sources": {
+                # Reset while down: the first reading is below the checkpoint
+                "reset_entry_id/today_load": {
+                    "snapshot_date": afternoon.date().isoformat(),
+                    "windows": {"0": {"snapshot_start": 4.0, "snapshot_end": None}},
+                    "checkpoint": {"updated": noon.timestamp() + 600, "value": 9.0},
+                },
+                # Down over the window start: the checkpoint before it is the baseline
+                "resume_entry_id/grid_import": {
+                    "snapshot_date": afternoon.date().isoformat(),
+                    "windows": {},
+                    "checkpoint": {"updated": noon.timestamp() - 300, "value": 8.0},
+                },
+            }
+        },
+    ):
+        # Setting up the domain sets up both entries
+        assert await hass.config_entries.async_setup("reset_entry_id")
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.today_load_peak").state == "6.0"
+        assert hass.states.get("sensor.grid_import_peak").state == "2.0"
+        grid = hass.data["energy_window_tracker"]["resume_entry_id"]["grid_import"]
+        assert grid._snapshots[0].snapshot_start == 8.0
+        # The recorder value at 12:00 would still replace it (no recorder here)
+        assert grid._recovering == {0}
+
+        # A new reading is checkpointed (at most once per interval)
+        freezer.tick(timedelta(minutes=1))
+        hass.states.async_set("sensor.grid_import", "10.5")
+        await hass.async_block_till_done()
+        assert grid._data_to_save()["checkpoint"]["value"] == 10.5
+        freezer.tick(timedelta(minutes=1))
+        hass.states.async_set("sensor.grid_import", "10.6")
+        await hass.async_block_till_done()
+        assert grid._data_to_save()["checkpoint"]["value"] == 10.5
+    assert hass.states.get("sensor.grid_import_peak").state == "2.6"
+
+
+async def test_count_through_resets_keeps_energy_after_meter_reset(hass: HomeAssistant) -> None:
+    """[Happy] A source reset mid-window keeps the counted energy; jitter is not a reset."""
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="Resets",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [
+                        {"name": "Morning", "start": "06:00", "end": "09:00"},
+                        {"name": "Peak", "start": "12:00", "end": "17:00"},
+                    ],
+                }
+            ]
+        },
+        options={"count_through_resets": True},
+        entry_id="resets_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "10.0")
+    afternoon = dt_util.now().replace(hour=13, minute=0, second=0, microsecond=0)
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={
+            "sources": {
+                "resets_entry_id/today_load": {
+                    "snapshot_date": afternoon.date().isoformat(),
+                    "windows": {
+                        "0": {"snapshot_start": 1.0, "snapshot_end": 3.0},
+                        "1": {"snapshot_start": 6.0, "snapshot_end": None},
+                    },
+                }
+            }
+        },
+    ), patch(
+        "custom_components.energy_window_tracker.sensor.dt_util.now",
+        return_value=afternoon,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.today_load_peak").state == "4.0"
+
+        # Jitter: a small drop is not a reset
+        hass.states.async_set("sensor.today_load", "9.9")
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.today_load_peak").state == "3.9"
+
+        # Reset: the counter restarts from 0 and the window continues from 3.9
+        hass.states.async_set("sensor.today_load", "0.2")
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.today_load_peak").state == "4.1"
+        hass.states.async_set("sensor.today_load", "1.0")
+        await hass.async_block_till_done()
+        data = hass.data["energy_window_tracker"][entry.entry_id]["today_load"]
+        assert data._data_to_save()["last_value"] == 1.0
+    assert hass.states.get("sensor.today_load_peak").state == "4.9"
+    # Finished windows are not touched by the reset
+    assert hass.states.get("sensor.today_load_morning").state == "2.0"
+
+
+async def test_daily_history_attributes_from_window_totals(hass: HomeAssistant) -> None:
+    """[Happy] Window totals are kept per day and exposed as yesterday / 7 / 30 day attributes."""
+    entry = MockConfigEntry(
+        domain="energy_window_tracker",
+        title="History",
+        data={
+            "sources": [
+                {
+                    "source_entity": "sensor.today_load",
+                    "name": "Energy",
+                    "windows": [{"name": "Peak", "start": "12:00", "end": "17:00"}],
+                }
+            ]
+        },
+        entry_id="daily_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "6.0")
+    afternoon = dt_util.now().replace(hour=13, minute=0, second=0, microsecond=0)
+    today = afternoon.date()
+    history = DailyTotals()
+    history.add("Peak", today - timedelta(days=1), 2.0)
+    history.add("Peak", today - timedelta(days=3), 1.0)
+    history.add("Peak", today - timedelta(days=10), 5.0)
+    with patch(
+        "custom_components.energy_window_tracker.storage.Store.async_load",
+        new_callable=AsyncMock,
+        return_value={
+            "sources": {
+                "daily_entry_id/today_load": {
+                    "snapshot_date": today.isoformat(),
+                    "windows": {"0": {"snapshot_start": 4.0, "snapshot_end": None}},
+                    "history": history.as_dict(),
+                }
+            }
+        },
+    ), patch(
+        "custom_components.energy_window_tracker.sensor.dt_util.now",
+        return_value=afternoon,
+    ) as mock_now:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        attrs = hass.states.get("sensor.today_load_peak").attributes
+        assert (attrs["yesterday"], attrs["last_7_days"], attrs["last_30_days"]) == (2.0, 3.0, 8.0)
+
+        # Window end records today's total
+        hass.states.async_set("sensor.today_load", "7.0")
+        await hass.async_block_till_done()
+        data = hass.data["energy_window_tracker"][entry.entry_id]["today_load"]
+        mock_now.return_value = afternoon.replace(hour=17)
+        data._handle_window_end(data._windows[0], mock_now.return_value)
+        await hass.async_block_till_done()
+        assert data.daily_totals.total("Peak", today) == 3.0
+        assert data._totals_to_save()["history"]["last_ordinal"] == today.toordinal()
+        attrs = hass.states.get("sensor.today_load_peak").attributes
+        assert (attrs["week_to_date"], attrs["month_to_date"]) == (3.0, 3.0)
+
+        # Next day: today's total becomes yesterday
+        mock_now.return_value = (afternoon + timedelta(days=1)).replace(hour=0, second=2)
+        data._handle_midnight(mock_now.return_value)
+        await hass.async_block_till_done()
+    attrs = hass.states.get("sensor.today_load_peak").attributes
+    assert (attrs["yesterday"], attrs["last_7_days"], attrs["last_30_days"]) == (3.0, 6.0, 11.0)
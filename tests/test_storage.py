@@ -0,0 +1,254 @@
+"""Tests for the domain-wide snapshot store (one shared file instead of one per entry/source)."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.energy_window_tracker.const import (
+    DOMAIN,
+    STORAGE_KEY,
+    STORAGE_TOTALS_KEY,
+)
+from custom_components.energy_window_tracker.storage import (
+    SnapshotStore,
+    async_get_snapshot_store,
+)
+from custom_components.energy_window_tracker.totals import DailyTotals
+
+
+def _entry(entry_id: str, source_entity: str) -> MockConfigEntry:
+    """Config entry with one source and one 09:00-17:00 window."""
+    return MockConfigEntry(
+        domain=DOMAIN,
+        title=entry_id,
+        data={
+            "sources": [
+                {
+                    "source_entity": source_entity,
+                    "name": "Energy",
+                    "windows": [{"name": "Peak", "start": "09:00", "end": "17:00"}],
+                }
+            ]
+        },
+        options={},
+        entry_id=entry_id,
+    )
+
+
+def _stored(data: dict[str, Any], key: str) -> dict[str, Any]:
+    """Wrap data the way Store writes it to .storage."""
+    return {"version": 1, "minor_version": 1, "key": key, "data": data}
+
+
+@pytest.mark.asyncio
+async def test_legacy_per_source_file_is_migrated_and_removed(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """[Happy] A per-entry/source file from older versions is imported into the shared store."""
+    today = dt_util.now().date().isoformat()
+    legacy_key = f"{STORAGE_KEY}_legacy_entry_id_today_load"
+    hass_storage[legacy_key] = _stored(
+        {"snapshot_date": today, "windows": {"0": {"snapshot_start": 1.5, "snapshot_end": None}}},
+        legacy_key,
+    )
+    entry = _entry("legacy_entry_id", "sensor.today_load")
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "4.0")
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    data = hass.data[DOMAIN][entry.entry_id]["today_load"]
+    assert data._snapshots[0].snapshot_start == 1.5
+    assert legacy_key not in hass_storage
+    shared = hass_storage[STORAGE_KEY]["data"]["sources"]
+    assert shared["legacy_entry_id/today_load"]["windows"]["0"]["snapshot_start"] == 1.5
+
+
+@pytest.mark.asyncio
+async def test_entries_share_one_file_and_removal_drops_entry(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """[Happy] Snapshots of several entries land in one file; removing an entry drops its sources."""
+    entries = [
+        _entry("entry_a", "sensor.today_load"),
+        _entry("entry_b", "sensor.today_import"),
+    ]
+    hass.states.async_set("sensor.today_load", "1.0")
+    hass.states.async_set("sensor.today_import", "2.0")
+    for entry in entries:
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    for entry in entries:
+        for data in hass.data[DOMAIN][entry.entry_id].values():
+            data._handle_window_start(data._windows[0], dt_util.now())
+    for entry in entries:
+        assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    sources = hass_storage[STORAGE_KEY]["data"]["sources"]
+    assert sources["entry_a/today_load"]["windows"]["0"]["snapshot_start"] == 1.0
+    assert sources["entry_b/today_import"]["windows"]["0"]["snapshot_start"] == 2.0
+    assert not [k for k in hass_storage if k.startswith(f"{STORAGE_KEY}_entry_")]
+
+    assert await hass.config_entries.async_remove("entry_a")
+    await hass.async_block_till_done()
+    sources = hass_storage[STORAGE_KEY]["data"]["sources"]
+    assert "entry_a/today_load" not in sources
+    assert "entry_b/today_import" in sources
+
+
+@pytest.mark.asyncio
+async def test_sharded_store_writes_only_the_owning_shard(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """[Happy] With several shards, saving a source writes only the shard that owns its entry."""
+    store = SnapshotStore(hass, shards=4)
+    await store.async_load()
+    view = store.async_source_store("entry_a", "today_load")
+    await view.async_save({"snapshot_date": "2024-01-01", "windows": {}})
+
+    index = store._shard_index("entry_a")
+    assert index == store._shard_index("entry_a")
+    shard_key = STORAGE_KEY if index == 0 else f"{STORAGE_KEY}_shard_{index}"
+    written = [k for k in hass_storage if k.startswith(STORAGE_KEY)]
+    assert written == [shard_key]
+    assert await store.async_source_store("entry_a", "today_load").async_load() == {
+        "snapshot_date": "2024-01-01",
+        "windows": {},
+    }
+    assert async_get_snapshot_store(hass) is async_get_snapshot_store(hass)
+
+
+@pytest.mark.asyncio
+async def test_first_entry_setup_preloads_all_entries_in_one_batch(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """[Happy] Setting up one entry reads every entry's legacy file in a single batch."""
+    today = dt_util.now().date().isoformat()
+    entries = [
+        _entry("entry_a", "sensor.today_load"),
+        _entry("entry_b", "sensor.today_import"),
+    ]
+    for entry, slug, value in ((entries[0], "today_load", 1.0), (entries[1], "today_import", 2.0)):
+        key = f"{STORAGE_KEY}_{entry.entry_id}_{slug}"
+        hass_storage[key] = _stored(
+            {"snapshot_date": today, "windows": {"0": {"snapshot_start": value, "snapshot_end": None}}},
+            key,
+        )
+        entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "3.0")
+    hass.states.async_set("sensor.today_import", "3.0")
+
+    store = async_get_snapshot_store(hass)
+    with patch.object(
+        SnapshotStore, "_async_migrate_legacy", autospec=True, side_effect=SnapshotStore._async_migrate_legacy
+    ) as mock_migrate:
+        # Entries are set up together at boot; both share the preload batch
+        await asyncio.gather(
+            *(hass.config_entries.async_setup(entry.entry_id) for entry in entries)
+        )
+        await hass.async_block_till_done()
+
+    assert mock_migrate.call_args_list[0].args[1] == [
+        ("entry_a", "today_load"),
+        ("entry_b", "today_import"),
+    ]
+    assert store._loaded
+    assert hass.data[DOMAIN]["entry_a"]["today_load"]._snapshots[0].snapshot_start == 1.0
+    assert hass.data[DOMAIN]["entry_b"]["today_import"]._snapshots[0].snapshot_start == 2.0
+    assert not [k for k in hass_storage if k.startswith(f"{STORAGE_KEY}_entry_")]
+
+
+@pytest.mark.asyncio
+async def test_source_in_another_shard_is_found_after_shard_count_change(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """[Edge] Snapshots written with one shard count are still found (and moved) with another."""
+    store = SnapshotStore(hass, shards=4)
+    index = store._shard_index("entry_a")
+    other = (index + 1) % 4
+    other_key = STORAGE_KEY if other == 0 else f"{STORAGE_KEY}_shard_{other}"
+    payload = {"snapshot_date": "2024-01-01", "windows": {}}
+    hass_storage[other_key] = _stored({"sources": {"entry_a/today_load": payload}}, other_key)
+
+    assert await store.async_source_store("entry_a", "today_load").async_load() == payload
+    assert "entry_a/today_load" in store._shards[index]
+    assert hass_storage[other_key]["data"]["sources"] == {}
+
+
+@pytest.mark.asyncio
+async def test_removed_source_is_not_written_back_by_pending_save(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """[Edge] A pending save of a removed source does not restore it when the entry unloads."""
+    entry = _entry("entry_a", "sensor.today_load")
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "4.0")
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    data = hass.data[DOMAIN]["entry_a"]["today_load"]
+    data._schedule_save()
+    assert data._save_pending
+
+    await async_get_snapshot_store(hass).async_remove_source("entry_a", "today_load")
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    stored = hass_storage.get(STORAGE_KEY, {}).get("data", {}).get("sources", {})
+    assert "entry_a/today_load" not in stored
+
+
+@pytest.mark.asyncio
+async def test_totals_move_to_their_own_store_and_skip_snapshot_writes(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """[Happy] Totals saved with the snapshots by older versions move to the totals store."""
+    today = dt_util.now().date()
+    history = DailyTotals()
+    history.add("Peak", today - timedelta(days=1), 2.0)
+    hass_storage[STORAGE_KEY] = _stored(
+        {
+            "sources": {
+                "entry_a/today_load": {
+                    "snapshot_date": today.isoformat(),
+                    "windows": {"0": {"snapshot_start": 1.0, "snapshot_end": None}},
+                    "history": history.as_dict(),
+                }
+            }
+        },
+        STORAGE_KEY,
+    )
+    entry = _entry("entry_a", "sensor.today_load")
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.today_load", "4.0")
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    data = hass.data[DOMAIN]["entry_a"]["today_load"]
+    assert data.daily_totals.total("Peak", today - timedelta(days=1)) == 2.0
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    snapshots = hass_storage[STORAGE_KEY]["data"]["sources"]["entry_a/today_load"]
+    assert "history" not in snapshots
+    totals = hass_storage[STORAGE_TOTALS_KEY]["data"]["sources"]["entry_a/today_load"]
+    assert totals["history"] == history.as_dict()
+
+    # A snapshot-only save leaves the totals store alone
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    data = hass.data[DOMAIN]["entry_a"]["today_load"]
+    assert not data._totals_save_pending
+    del hass_storage[STORAGE_TOTALS_KEY]
+    await data.save()
+    assert STORAGE_TOTALS_KEY not in hass_storage
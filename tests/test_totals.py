@@ -0,0 +1,99 @@
+"""Tests for the rolling history of daily window totals and the week/month rollups."""
+
+from __future__ import annotations
+
+import math
+from datetime import date, timedelta
+
+from custom_components.energy_window_tracker.const import (
+    ATTR_LAST_7_DAYS,
+    ATTR_LAST_30_DAYS,
+    ATTR_MONTH_TO_DATE,
+    ATTR_WEEK_TO_DATE,
+    ATTR_YESTERDAY,
+)
+from custom_components.energy_window_tracker.totals import DailyTotals, PeriodTotals
+
+TODAY = date(2026, 3, 15)
+
+
+def test_daily_totals_sums_and_summary() -> None:
+    """[Happy] Ranges of one window add up per day; sums exclude today and days without data."""
+    totals = DailyTotals(days=40)
+    totals.add("Peak", TODAY - timedelta(days=1), 1.5)
+    totals.add("Peak", TODAY - timedelta(days=1), 0.5)
+    totals.add("Peak", TODAY - timedelta(days=5), 3.0)
+    totals.add("Peak", TODAY - timedelta(days=20), 4.0)
+    totals.add("Peak", TODAY, 9.0)
+
+    assert totals.total("Peak", TODAY - timedelta(days=1)) == 2.0
+    assert totals.total("Peak", TODAY - timedelta(days=2)) is None
+    assert totals.summary("Peak", TODAY) == {
+        ATTR_YESTERDAY: 2.0,
+        ATTR_LAST_7_DAYS: 5.0,
+        ATTR_LAST_30_DAYS: 9.0,
+    }
+    assert totals.summary("Off-peak", TODAY) is None
+
+
+def test_daily_totals_ring_wraps_and_clears_skipped_days() -> None:
+    """[Edge] Days older than the ring are dropped; skipped days read as no data."""
+    totals = DailyTotals(days=7)
+    for back in range(7):
+        totals.add("Peak", TODAY - timedelta(days=back), 1.0)
+    assert totals.sum_days("Peak", TODAY + timedelta(days=1), 30) == 7.0
+
+    # Ten days later: every old slot is outside the ring
+    totals.add("Peak", TODAY + timedelta(days=10), 2.0)
+    assert totals.total("Peak", TODAY) is None
+    assert totals.sum_days("Peak", TODAY + timedelta(days=11), 30) == 2.0
+    # A late total for a day that fell out of the ring is ignored
+    totals.add("Peak", TODAY, 5.0)
+    assert totals.total("Peak", TODAY) is None
+
+
+def test_daily_totals_round_trip_and_bad_data() -> None:
+    """[Happy] Stored form restores the same totals; malformed or resized data starts empty."""
+    totals = DailyTotals(days=30)
+    totals.add("Peak", TODAY - timedelta(days=1), 1.25)
+    totals.add("Evening", TODAY - timedelta(days=2), 0.5)
+    stored = totals.as_dict()
+
+    restored = DailyTotals.from_dict(stored, days=30)
+    assert restored.total("Peak", TODAY - timedelta(days=1)) == 1.25
+    assert restored.total("Evening", TODAY - timedelta(days=2)) == 0.5
+    assert not math.isnan(restored.sum_days("Peak", TODAY, 30))
+
+    assert not DailyTotals.from_dict(stored, days=60)
+    assert not DailyTotals.from_dict({"days": 30, "last_ordinal": "x", "windows": {}}, days=30)
+    broken = DailyTotals.from_dict(
+        {**stored, "windows": {"Peak": "not base64!", "Evening": stored["windows"]["Evening"]}},
+        days=30,
+    )
+    assert broken.total("Peak", TODAY - timedelta(days=1)) is None
+    assert broken.total("Evening", TODAY - timedelta(days=2)) == 0.5
+
+
+def test_period_totals_add_roll_and_round_trip() -> None:
+    """[Happy] Week/month sums grow per window end and restart on calendar boundaries."""
+    sunday = date(2026, 5, 31)
+    totals = PeriodTotals()
+    totals.add("Peak", sunday - timedelta(days=1), 1.0)
+    totals.add("Peak", sunday, 2.0)
+    assert totals.summary("Peak", sunday) == {ATTR_WEEK_TO_DATE: 3.0, ATTR_MONTH_TO_DATE: 3.0}
+    assert totals.summary("Evening", sunday) is None
+
+    # Monday 1 June: new week and new month
+    monday = sunday + timedelta(days=1)
+    assert totals.summary("Peak", monday) == {ATTR_WEEK_TO_DATE: 0.0, ATTR_MONTH_TO_DATE: 0.0}
+    totals.roll(monday)
+    totals.add("Peak", monday, 0.5)
+    assert totals.summary("Peak", monday) == {ATTR_WEEK_TO_DATE: 0.5, ATTR_MONTH_TO_DATE: 0.5}
+
+    restored = PeriodTotals.from_dict(totals.as_dict())
+    restored.add("Peak", monday + timedelta(days=1), 0.25)
+    assert restored.summary("Peak", monday + timedelta(days=1)) == {
+        ATTR_WEEK_TO_DATE: 0.75,
+        ATTR_MONTH_TO_DATE: 0.75,
+    }
+    assert PeriodTotals.from_dict({"Peak": {ATTR_WEEK_TO_DATE: "bad"}}).summary("Peak", monday) is None